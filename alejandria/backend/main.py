@@ -5,6 +5,7 @@ from typing import Dict, List, Any
 import json
 import uuid
 import asyncio
+import aiohttp
 import logging
 from datetime import datetime
 
@@ -14,7 +15,32 @@ logger = logging.getLogger(__name__)
 
 # Importar componentes de la aplicación
 from src.services.search_service import SearchService
-from src.agent_summarizer import summarize_pdf
+from src.agent_summarizer import (
+    summarize_text,
+    summary_messages,
+    parse_summary_output,
+    empty_summary,
+    needs_map_reduce,
+    call_llm_for_map_reduce,
+    SUMMARY_SYSTEM_PROMPT,
+    SUMMARY_MAX_TOKENS,
+)
+from src.config import LLM_MODEL
+from src.llm_client import llm_client, LLMError
+from src.llm_scheduler import llm_scheduler, LLMQueueTimeout
+from src.json_stream import JSONStreamExtractor
+from src.services.summary_cache import get_summary_cache, summary_key
+from src.scraping.http_client import close_session
+from src.scraping.identity import get_paper_index
+from src.services.pdf_store import pdf_store, store_key, PdfDownloadError
+from src.services.summary_broadcast import summary_broadcaster
+from src.services.prefetch import schedule_prefetch, cancel_prefetch
+from src.services.job_queue import job_manager, JobQueueFull
+from src.services.ws_session import WsSession, negotiate_encoding
+from src.config import WS_RESYNC_GRACE, PREFETCH_ENABLED, PREFETCH_SUMMARIES
+from src.services.extraction_service import extraction_service, ExtractionQueueFull, ExtractionTimeout
+from src.services.local_index import get_local_index, index_fulltext
+from src.services.embeddings import flush_embedding_service
 
 app = FastAPI(title="Alejandria API")
 
@@ -34,6 +60,15 @@ app.add_middleware(
 # Inicializar el servicio de búsqueda
 search_service = SearchService()
 
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    """Detiene la cola de trabajos, cierra los pools de conexiones HTTP (scraping y LLM) y de extracción de PDFs y guarda el índice de embeddings."""
+    await close_session()
+    await job_manager.shutdown()
+    await llm_client.close()
+    extraction_service.shutdown()
+    await asyncio.to_thread(flush_embedding_service)
+
 def is_websocket_connected(ws: WebSocket) -> bool:
     """Verifica si el WebSocket sigue conectado"""
     try:
@@ -41,7 +76,7 @@ def is_websocket_connected(ws: WebSocket) -> bool:
     except Exception:
         return False
 
-async def safe_send_json(ws: WebSocket, data: Dict, connection_id: str) -> bool:
+async def safe_send_json(ws, data: Dict, connection_id: str) -> bool:
     """Envía un mensaje JSON de forma segura"""
     try:
         await ws.send_json(data)
@@ -54,29 +89,45 @@ async def safe_send_json(ws: WebSocket, data: Dict, connection_id: str) -> bool:
 import threading
 active_websockets = {}
 active_websockets_lock = threading.Lock()
+def expire_session(session: WsSession) -> None:
+    """Descarta una sesión que no se ha reanudado dentro del periodo de gracia."""
+    if session.connected:
+        return
+    with active_websockets_lock:
+        if active_websockets.get(session.ws_id) is session:
+            active_websockets.pop(session.ws_id, None)
+    # Cancelar sus trabajos de extracción (en cola o en curso) y sus suscripciones a resúmenes compartidos
+    asyncio.create_task(job_manager.cancel_owner(session.ws_id))
+    asyncio.create_task(cancel_prefetch(session.ws_id))
+    summary_broadcaster.unsubscribe_owner(session.ws_id)
+    logger.info(f"[WS:{session.ws_id}] Sesión expirada")
 
 @app.websocket("/ws/search")
 async def websocket_endpoint(websocket: WebSocket):
     """Endpoint WebSocket para búsquedas en tiempo real y streaming de extracción."""
     connection_id = str(uuid.uuid4())[:8]
-    ws_id = None
 
     # Aceptar la conexión
     await websocket.accept()
     logger.info(f"[WS:{connection_id}] Conexión WebSocket aceptada")
 
+    # Protocolo v2: la sesión numera los mensajes y sobrevive a reconexiones (resync)
+    encoding = negotiate_encoding(websocket.query_params.get("encoding"))
+    ws_id = str(uuid.uuid4())
+    session = WsSession(ws_id, websocket, encoding=encoding)
+
     try:
-        # Registrar el websocket con un ws_id único para extracción
-        ws_id = str(uuid.uuid4())
+        # Registrar la sesión con un ws_id único para extracción
         with active_websockets_lock:
-            active_websockets[ws_id] = websocket
+            active_websockets[ws_id] = session
 
+        await session.hello()
         # Enviar el ws_id al frontend para que lo use en /extract-ideas
-        await safe_send_json(websocket, {
+        await session.send_control({
             "type": "ws_id",
             "ws_id": ws_id,
             "timestamp": datetime.utcnow().isoformat()
-        }, connection_id)
+        })
 
         # Mantener la conexión abierta y procesar múltiples búsquedas
         while is_websocket_connected(websocket):
@@ -89,15 +140,46 @@ async def websocket_endpoint(websocket: WebSocket):
                     "message": "Mensaje recibido correctamente",
                     "timestamp": datetime.utcnow().isoformat()
                 }
-                logger.info(f"[WS:{connection_id}] Enviando ACK")
-                await safe_send_json(websocket, ack_message, connection_id)
                 message = json.loads(data)
                 message_type = message.get("type")
+                logger.info(f"[WS:{connection_id}] Enviando ACK")
+                if message_type == "resync":
+                    # Sin numerar: un seq de la sesión nueva haría descartar al cliente los mensajes reenviados
+                    await session.send_control(ack_message)
+                else:
+                    await safe_send_json(session, ack_message, connection_id)
+
+                if message_type == "resync":
+                    # Reconexión: continuar la sesión anterior desde el último mensaje recibido
+                    previous_id = message.get("ws_id")
+                    last_seq = int(message.get("last_seq", 0) or 0)
+                    with active_websockets_lock:
+                        previous = active_websockets.get(previous_id)
+                    if previous is None or previous is session or previous.connected:
+                        await session.send_control({
+                            "type": "resync_failed",
+                            "ws_id": ws_id,
+                            "reason": "Sesión desconocida o expirada",
+                            "timestamp": datetime.utcnow().isoformat()
+                        })
+                        continue
+                    if previous.expiry is not None:
+                        previous.expiry.cancel()
+                        previous.expiry = None
+                    with active_websockets_lock:
+                        active_websockets.pop(ws_id, None)
+                    ws_id, session = previous.ws_id, previous
+                    await session.resume(websocket, last_seq, encoding=encoding)
+                    continue
 
                 if message_type == "search":
+                    # Una búsqueda nueva invalida el prefetch de la anterior
+                    await cancel_prefetch(ws_id)
                     try:
                         query = message.get("query", "").strip()
-                        sources = ["arxiv"]
+                        sources = message.get("sources") or ["arxiv"]
+                        if isinstance(sources, str):
+                            sources = [sources]
 
                         # Extraer todos los parámetros relevantes del mensaje
                         max_results = message.get("max_results", 10)
@@ -106,27 +188,27 @@ async def websocket_endpoint(websocket: WebSocket):
                         start = message.get("start", 0)
                         sortorder = message.get("sortorder", "descending")
 
-                        logger.info(f"[WS:{connection_id}] Parámetros recibidos del frontend: query={query}, max_results={max_results}, sortby={sortby}, type_query={type_query}, start={start}, sortorder={sortorder}")
+                        logger.info(f"[WS:{connection_id}] Parámetros recibidos del frontend: query={query}, sources={sources}, max_results={max_results}, sortby={sortby}, type_query={type_query}, start={start}, sortorder={sortorder}")
 
                         if not query:
                             error_msg = "La consulta no puede estar vacía"
                             logger.error(f"[WS:{connection_id}] {error_msg}")
-                            await safe_send_json(websocket, {
+                            await safe_send_json(session, {
                                 "type": "error",
                                 "error": error_msg,
                                 "timestamp": datetime.utcnow().isoformat()
                             }, connection_id)
                             continue
 
-                        logger.info(f"[WS:{connection_id}] Iniciando búsqueda: '{query}' en Arxiv")
-                        await safe_send_json(websocket, {
+                        logger.info(f"[WS:{connection_id}] Iniciando búsqueda: '{query}' en {sources}")
+                        await safe_send_json(session, {
                             "type": "search_started",
-                            "message": f"Buscando en Arxiv: {query}",
+                            "message": f"Buscando en {', '.join(sources)}: {query}",
                             "timestamp": datetime.utcnow().isoformat()
                         }, connection_id)
-                        await safe_send_json(websocket, {
+                        await safe_send_json(session, {
                             "type": "processing_started",
-                            "message": "Procesando Arxiv...",
+                            "message": f"Procesando {', '.join(sources)}...",
                             "sources": sources,
                             "timestamp": datetime.utcnow().isoformat()
                         }, connection_id)
@@ -135,12 +217,15 @@ async def websocket_endpoint(websocket: WebSocket):
                         search_results = await search_service.search(
                             query=query,
                             sources=sources,
-                            websocket=websocket,
+                            websocket=session,
                             max_results=max_results,
                             sortby=sortby,
                             type_query=type_query,
                             start=start,
-                            sortorder=sortorder
+                            sortorder=sortorder,
+                            semantic=message.get("semantic"),
+                            dedup=message.get("dedup"),
+                            semantic_dedup=message.get("semantic_dedup")
                         )
 
                         if search_results.get("status") == "error":
@@ -150,7 +235,7 @@ async def websocket_endpoint(websocket: WebSocket):
 
                         total_results = sum(len(r) for r in search_results.get('results', {}).values())
                         logger.info(f"[WS:{connection_id}] Búsqueda completada con {total_results} resultados")
-                        await safe_send_json(websocket, {
+                        await safe_send_json(session, {
                             "type": "search_completed",
                             "query": query,
                             "total_results": total_results,
@@ -159,10 +244,24 @@ async def websocket_endpoint(websocket: WebSocket):
                             "timestamp": datetime.utcnow().isoformat()
                         }, connection_id)
 
+                        # Prefetch especulativo (opt-in) de los primeros PDFs en segundo plano
+                        if message.get("prefetch", PREFETCH_ENABLED):
+                            job_ids = await schedule_prefetch(
+                                ws_id,
+                                search_results.get('results', {}),
+                                top_k=message.get("prefetch_top_k"),
+                                summaries=bool(message.get("prefetch_summaries", PREFETCH_SUMMARIES)),
+                            )
+                            await safe_send_json(session, {
+                                "type": "prefetch_started",
+                                "job_ids": job_ids,
+                                "timestamp": datetime.utcnow().isoformat()
+                            }, connection_id)
+
                     except Exception as e:
                         error_msg = f"Error inesperado: {str(e)}"
                         logger.error(f"[WS:{connection_id}] {error_msg}", exc_info=True)
-                        await safe_send_json(websocket, {
+                        await safe_send_json(session, {
                             "type": "error",
                             "error": error_msg,
                             "timestamp": datetime.utcnow().isoformat()
@@ -171,7 +270,7 @@ async def websocket_endpoint(websocket: WebSocket):
             except json.JSONDecodeError as e:
                 error_msg = f"Error decodificando JSON: {str(e)}"
                 logger.error(error_msg)
-                await safe_send_json(websocket, {
+                await safe_send_json(session, {
                     "type": "error",
                     "error": "Formato de mensaje inválido. Se espera un JSON válido.",
                     "timestamp": datetime.datetime.utcnow().isoformat()
@@ -184,7 +283,7 @@ async def websocket_endpoint(websocket: WebSocket):
             except Exception as e:
                 error_msg = f"Error inesperado: {str(e)}"
                 logger.error(error_msg, exc_info=True)
-                await safe_send_json(websocket, {
+                await safe_send_json(session, {
                     "type": "error",
                     "error": "Error interno del servidor",
                     "timestamp": datetime.datetime.utcnow().isoformat()
@@ -197,9 +296,10 @@ async def websocket_endpoint(websocket: WebSocket):
     finally:
         logger.info(f"[WS:{connection_id}] Cerrando conexión WebSocket...")
         try:
-            if ws_id:
-                with active_websockets_lock:
-                    active_websockets.pop(ws_id, None)
+            if session.websocket is websocket or session.websocket is None:
+                # Mantener la sesión un tiempo por si el cliente se reconecta y pide resync
+                session.detach()
+                session.expiry = asyncio.get_running_loop().call_later(WS_RESYNC_GRACE, expire_session, session)
             await websocket.close()
             logger.info(f"[WS:{connection_id}] Conexión WebSocket cerrada")
         except Exception as e:
@@ -210,6 +310,45 @@ async def websocket_endpoint(websocket: WebSocket):
 async def root():
     return {"message": "Alejandria API"}
 
+@app.get("/search/cache/stats")
+async def search_cache_stats():
+    """Contadores de aciertos/fallos de la caché de resultados de búsqueda."""
+    return search_service.cache_stats()
+
+@app.get("/jobs")
+async def list_jobs(ws_id: str = None):
+    """Trabajos de extracción (todos o los de un ws_id)."""
+    return {"jobs": job_manager.list(owner=ws_id), "stats": job_manager.stats()}
+
+@app.get("/jobs/stats")
+async def job_stats():
+    """Profundidad de la cola, trabajos en curso, tiempo medio de espera y resúmenes compartidos."""
+    return {**job_manager.stats(), "coalescing": summary_broadcaster.stats()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(content={"error": "Trabajo no encontrado"}, status_code=404)
+    return job_manager.describe(job)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancela un trabajo en cola o en curso."""
+    if not await job_manager.cancel(job_id):
+        return JSONResponse(content={"error": "Trabajo no encontrado o ya terminado"}, status_code=404)
+    return {"status": "cancelled", "job_id": job_id}
+
+@app.get("/local-index/stats")
+async def local_index_stats():
+    """Papers en el índice local de texto completo (fuente "local")."""
+    return get_local_index().stats()
+
+@app.get("/llm/stats")
+async def llm_stats():
+    """Huecos ocupados, cola por prioridad, tiempos de espera y timeouts del planificador del LLM."""
+    return llm_scheduler.stats()
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": "2025-05-19T22:47:45+00:00"}
@@ -218,136 +357,135 @@ async def health_check():
 async def extract_ideas(request: Request):
     """
     Extrae ideas/conceptos de un PDF usando el agente de resumen.
-    Si ws_id es proporcionado, hace streaming por WebSocket y NO espera el resultado final.
+    Si ws_id es proporcionado, encola el trabajo y responde con su job_id; el estado del trabajo
+    (job_status) y el streaming llegan por WebSocket.
     Si no hay ws_id, hace streaming HTTP (chunked).
     """
-    import tempfile
-    import requests
-    import os
-
     # Leer el form-data manualmente para soportar streaming
     form = await request.form()
     pdf_url = form.get("pdf_url")
     ws_id = form.get("ws_id")
+    article_id = form.get("article_id")
+    if not pdf_url and article_id:
+        # El cliente puede mandar solo el id (p. ej. 2401.01234): resolverlo con los papers ya buscados
+        record = get_paper_index().get(article_id)
+        pdf_url = record.get("pdf_url") if record else None
+    if not pdf_url:
+        # Sin URL no hay paper que resumir (ni clave con la que compartir la generación)
+        return JSONResponse(content={"error": "Falta pdf_url (o un article_id conocido)"}, status_code=400)
 
     websocket = None
     if ws_id:
         with active_websockets_lock:
             websocket = active_websockets.get(ws_id)
 
-    try:
-        print(f"[extract-ideas] Intentando descargar PDF desde: {pdf_url}")
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            r = requests.get(pdf_url, timeout=30)
-            print(f"[extract-ideas] Código de estado de la descarga: {r.status_code}")
-            if r.status_code != 200:
-                print(f"[extract-ideas] Error descargando PDF: {r.status_code} - {r.text[:200]}")
-                return JSONResponse(content={"error": f"Error descargando PDF: {r.status_code}"}, status_code=400)
-            tmp.write(r.content)
-            tmp_path = tmp.name
-            print(f"[extract-ideas] PDF guardado temporalmente en: {tmp_path}")
-
-        # Si hay WebSocket, lanzar el procesamiento en background y responder inmediatamente
-        if websocket:
-            import threading
-            def run_summarizer():
-                try:
-                    print(f"[extract-ideas] (thread) Llamando a summarize_pdf para: {tmp_path} (WebSocket streaming)")
-                    from src.agent_summarizer import summarize_pdf
-                    _, result = summarize_pdf(tmp_path, ws=websocket, ws_id=ws_id)
-                    print(f"[extract-ideas] (thread) summarize_pdf terminado para: {tmp_path}")
-                except Exception as e:
-                    print(f"[extract-ideas] (thread) Error en summarize_pdf: {str(e)}")
-                finally:
-                    try:
-                        os.unlink(tmp_path)
-                    except Exception:
-                        pass
+    # Si hay WebSocket, encolar el trabajo completo (descarga, parseo y resumen) y responder inmediatamente
+    if websocket:
+        paper_key, _ = store_key(pdf_url)
+        # Si otro cliente ya está resumiendo este paper, suscribirse a su stream sin encolar nada
+        if summary_broadcaster.join(paper_key, websocket, ws_id, article_id=article_id):
+            return JSONResponse(content={"status": "joined", "ws_id": ws_id})
+
+        async def produce(generation):
+            print(f"[extract-ideas] (job) Obteniendo PDF desde: {pdf_url}")
+            pdf_path = await pdf_store.fetch(pdf_url)
+            text = await extraction_service.extract(pdf_path)
+            await index_fulltext(pdf_url, text)
+            print(f"[extract-ideas] (job) Llamando a summarize_text para: {pdf_url} (WebSocket streaming)")
+            _, result = await summarize_text(text, ws_id=ws_id, sender=generation)
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            print(f"[extract-ideas] (job) summarize_text terminado para: {pdf_url}")
+
+        async def run_extraction():
+            # Una sola generación por paper, repartida entre todos los clientes que lo pidan
+            await summary_broadcaster.run(paper_key, produce, websocket, ws_id, article_id=article_id)
 
-            threading.Thread(target=run_summarizer, daemon=True).start()
-            # Responder inmediatamente, el frontend recibirá el streaming por WebSocket
-            return JSONResponse(content={"status": "processing", "ws_id": ws_id})
+        try:
+            job = await job_manager.submit(
+                run_extraction,
+                owner=ws_id,
+                description=f"extract-ideas {pdf_url}",
+                notify=websocket.send_json,
+                metadata={"article_id": article_id, "pdf_url": pdf_url},
+            )
+        except JobQueueFull as e:
+            return JSONResponse(content={"error": str(e)}, status_code=503)
+        # El frontend recibirá el estado del trabajo y el streaming por WebSocket
+        return JSONResponse(content={
+            "status": "queued",
+            "ws_id": ws_id,
+            "job_id": job.id,
+            "queue_position": job_manager.position(job),
+        })
 
-        # Si NO hay WebSocket, hacer streaming HTTP (chunked)
-        else:
-            def stream_generator():
+    try:
+        print(f"[extract-ideas] Obteniendo PDF desde: {pdf_url}")
+        try:
+            pdf_path = await pdf_store.fetch(pdf_url)
+        except (PdfDownloadError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[extract-ideas] Error descargando PDF: {str(e)}")
+            return JSONResponse(content={"error": f"Error descargando PDF: {str(e)}"}, status_code=400)
+        print(f"[extract-ideas] PDF disponible en: {pdf_path}")
+
+        # Parsear el PDF en el pool de procesos (no compite por el GIL con el event loop)
+        try:
+            text = await extraction_service.extract(pdf_path)
+        except ExtractionQueueFull as e:
+            return JSONResponse(content={"error": str(e)}, status_code=503)
+        except ExtractionTimeout as e:
+            return JSONResponse(content={"error": str(e)}, status_code=504)
+        except Exception as e:
+            print(f"[extract-ideas] Error extrayendo texto del PDF: {str(e)}")
+            return JSONResponse(content={"error": f"Error extrayendo texto del PDF: {str(e)}"}, status_code=500)
+        await index_fulltext(pdf_url, text)
+
+        # Sin WebSocket, hacer streaming HTTP (chunked); ante el planificador del LLM el cliente es su IP
+        owner = f"http:{request.client.host}" if request.client else None
+
+        async def stream_generator():
+            # Si el cliente se desconecta, Starlette cancela el generador y se cierra el stream del LLM
+            if not text or "[ERROR]" in text:
+                yield json.dumps({"error": "No se pudo extraer texto del PDF."}) + "\n"
+                return
+            if needs_map_reduce(text):
+                # Paper largo: resumen por fragmentos, el resultado combinado llega de una vez
                 try:
-                    from src.agent_summarizer import call_llm_for_summary, extract_full_text_from_pdf
-                    text = extract_full_text_from_pdf(tmp_path)
-                    if not text or "[ERROR]" in text:
-                        yield json.dumps({"error": "No se pudo extraer texto del PDF."}) + "\n"
-                        return
-                    system_prompt = (
-                        "Actúa como un experto en análisis pedagógico de papers. "
-                        "Dado el texto de un artículo científico, extrae las secciones clave EN ESPAÑOL: "
-                        "ideas principales, metodologías, comparaciones, algoritmos, etc. "
-                        "Retorna tu respuesta en formato JSON con las claves: "
-                        "{ 'main_ideas': [...], 'methods': [...], 'comparisons': [...], 'algorithms': [...], 'other': [...] } "
-                        "Sin nada adicional."
-                    )
-                    user_prompt = text
-                    payload = {
-                        "model": "deepseek-r1-distill-qwen-14b",
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        "max_tokens": 1500,
-                        "n": 1,
-                        "temperature": 0,
-                        "stream": True
-                    }
-                    headers = {
-                        "Authorization": f"Bearer lm-studio",
-                        "Content-Type": "application/json"
-                    }
-                    import requests
-                    response = requests.post("http://localhost:1234/v1/chat/completions", json=payload, headers=headers, stream=True)
-                    if response.status_code != 200:
-                        yield json.dumps({"error": f"Error en la llamada al LLM: {response.status_code} {response.text}"}) + "\n"
-                        return
-                    full_output = ""
-                    for line in response.iter_lines():
-                        if line:
-                            decoded_line = line.decode("utf-8").strip()
-                            if decoded_line.startswith("data:"):
-                                data_line = decoded_line[5:].strip()
-                                if data_line == "[DONE]":
-                                    break
-                                try:
-                                    data_json = json.loads(data_line)
-                                    if "choices" in data_json:
-                                        for choice in data_json["choices"]:
-                                            if "delta" in choice and "content" in choice["delta"]:
-                                                content = choice["delta"]["content"]
-                                                full_output += content
-                                                yield content
-                                except Exception:
-                                    pass
-                    # Al final, intentar extraer el JSON y devolverlo como bloque final
-                    import re
-                    match = re.search(r"```(?:json)?\s*(\{.*\})\s*```", full_output, re.DOTALL)
-                    if match:
-                        json_str = match.group(1)
-                    else:
-                        start_index = full_output.find("{")
-                        end_index = full_output.rfind("}")
-                        if start_index != -1 and end_index != -1 and end_index > start_index:
-                            json_str = full_output[start_index:end_index+1]
-                        else:
-                            json_str = "{}"
-                    try:
-                        result = json.loads(json_str)
-                    except Exception:
-                        result = {}
-                    yield "\n---JSON_RESULT---\n" + json.dumps(result)
-                finally:
-                    os.unlink(tmp_path)
-            return StreamingResponse(stream_generator(), media_type="text/plain")
+                    full_output, result = await call_llm_for_map_reduce(text, ws_id=owner)
+                except (LLMError, LLMQueueTimeout) as e:
+                    yield json.dumps({"error": str(e)}) + "\n"
+                    return
+                yield full_output
+                yield "\n---JSON_RESULT---\n" + json.dumps(result)
+                return
+            cache = get_summary_cache()
+            cache_key = summary_key(text, LLM_MODEL, SUMMARY_SYSTEM_PROMPT, SUMMARY_MAX_TOKENS)
+            cached_output = cache.get(cache_key)
+            if cached_output is not None:
+                print(f"[extract-ideas] Resumen servido desde caché ({cache_key[:12]})")
+                yield cached_output
+                yield "\n---JSON_RESULT---\n" + json.dumps(parse_summary_output(cached_output))
+                return
+            extractor = JSONStreamExtractor()
+            full_output = ""
+            try:
+                async for content in llm_client.stream_chat(summary_messages(text), max_tokens=SUMMARY_MAX_TOKENS, temperature=0, owner=owner):
+                    full_output += content
+                    extractor.feed(content)
+                    yield content
+            except (LLMError, LLMQueueTimeout) as e:
+                yield json.dumps({"error": str(e)}) + "\n"
+                return
+            cache.set(cache_key, full_output, LLM_MODEL, SUMMARY_MAX_TOKENS)
+            # Al final, devolver el JSON (extraído durante el stream) como bloque final
+            result = extractor.result if extractor.result is not None else empty_summary()
+            yield "\n---JSON_RESULT---\n" + json.dumps(result)
+        return StreamingResponse(stream_generator(), media_type="text/plain")
     except Exception as e:
         print(f"[extract-ideas] Error general: {str(e)}")
         return JSONResponse(content={"error": f"Error general: {str(e)}"}, status_code=500)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8100)
+    # permessage-deflate comprime los mensajes JSON del WebSocket si el cliente lo acepta
+    uvicorn.run(app, host="0.0.0.0", port=8100, ws_per_message_deflate=True)
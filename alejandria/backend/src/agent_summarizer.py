@@ -1,171 +1,267 @@
 # agent_summarizer.py
 
 import re
-import requests
 import json
-import PyPDF2
 import asyncio
-from .config import LLM_BASE_URL, LLM_API_KEY, LLM_MODEL
+import logging
+from .config import (
+    LLM_MODEL,
+    PDF_TOKEN_BUDGET,
+    LLM_CONTEXT_TOKENS,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAP_MAX_TOKENS,
+    SUMMARY_MAP_CONCURRENCY,
+)
+from .pdf_extraction import extract_text, estimate_tokens, chunk_text
+from .json_stream import JSONStreamExtractor, extract_json
+from .llm_client import llm_client
+from .llm_scheduler import PRIORITY_INTERACTIVE
+from .services.stream_sender import WebSocketStreamSender
+from .services.summary_cache import get_summary_cache, summary_key
 
-def extract_full_text_from_pdf(pdf_path):
+logger = logging.getLogger(__name__)
+
+def extract_full_text_from_pdf(pdf_path, token_budget=PDF_TOKEN_BUDGET):
     """
-    Extrae todo el texto del PDF.
+    Extrae el texto del PDF por secciones (resumen, introducción, método, conclusión...)
+    dentro del presupuesto de tokens. Ver pdf_extraction.extract_text.
     """
-    text = ""
     try:
-        with open(pdf_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                page_text = page.extract_text() or ""
-                text += page_text + "\n"
+        return extract_text(pdf_path, token_budget=token_budget)
     except Exception as e:
         # Manejo de error para archivos PDF corruptos o ilegibles
-        text += f"\n[ERROR] No se pudo extraer el texto del PDF: {e}\n"
-    return text[:200]  # <-- Devuelve el texto completo, no solo los primeros 200 caracteres
+        return f"\n[ERROR] No se pudo extraer el texto del PDF: {e}\n"
+
+# Prompt y parámetros del resumen: forman parte de la clave de la caché de resúmenes
+SUMMARY_SYSTEM_PROMPT = (
+    "Actúa como un experto en análisis pedagógico de papers. "
+    "Dado el texto de un artículo científico, extrae las secciones clave EN ESPAÑOL: "
+    "ideas principales, metodologías, comparaciones, algoritmos, etc. "
+    "Retorna tu respuesta en formato JSON con las claves: "
+    "{ 'main_ideas': [...], 'methods': [...], 'comparisons': [...], 'algorithms': [...], 'other': [...] } "
+    "Sin nada adicional."
+)
+SUMMARY_MAX_TOKENS = 1500
+SUMMARY_KEYS = ("main_ideas", "methods", "comparisons", "algorithms", "other")
+
+# Prompt de la fase map (un fragmento del paper); también forma parte de la clave de caché
+SUMMARY_MAP_PROMPT = SUMMARY_SYSTEM_PROMPT + (
+    " Recibirás solo un fragmento del artículo: extrae únicamente lo que aparezca en él."
+)
+
+def empty_summary():
+    """Resumen vacío (resultado por defecto si la salida no contiene un JSON válido)."""
+    return {key: [] for key in SUMMARY_KEYS}
+
+def parse_summary_output(full_output):
+    """
+    Extrae el JSON del resumen de la salida completa del LLM (ver json_stream).
+    """
+    return extract_json(full_output, default=empty_summary())
+
+async def replay_summary(full_output, stream_placeholder=None, ws=None, ws_id=None, article_id=None, sender=None):
+    """
+    Reenvía un resumen cacheado con el mismo protocolo que el streaming del LLM
+    (mensajes llm_stream y un llm_stream_done final).
+    """
+    if stream_placeholder:
+        stream_placeholder.text(full_output)
+    if ws and sender is None:
+        sender = WebSocketStreamSender(ws, ws_id, article_id=article_id)
+    result = parse_summary_output(full_output)
+    if sender:
+        sender.push(full_output)
+        sender.finish(cached=True, result=result)
+        await sender.wait_closed()
+    return full_output, result
+
+def summary_messages(text):
+    """Mensajes de chat del prompt de resumen."""
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": text}
+    ]
+
+def needs_map_reduce(text):
+    """True si el texto, el prompt y la respuesta no caben juntos en el contexto del modelo."""
+    prompt_tokens = estimate_tokens(SUMMARY_SYSTEM_PROMPT) + estimate_tokens(text)
+    return prompt_tokens + SUMMARY_MAX_TOKENS > LLM_CONTEXT_TOKENS
+
+def _dedup_key(item):
+    if not isinstance(item, str):
+        item = json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return re.sub(r"[\W_]+", " ", item.casefold()).strip()
+
+def merge_summaries(partials):
+    """
+    Fase reduce: concatena las listas de cada clave en el orden de los fragmentos,
+    descartando los elementos repetidos (sin distinguir mayúsculas ni puntuación).
+    """
+    merged = empty_summary()
+    seen = {key: set() for key in SUMMARY_KEYS}
+    for partial in partials:
+        for key in SUMMARY_KEYS:
+            items = partial.get(key) or []
+            if not isinstance(items, list):
+                items = [items]
+            for item in items:
+                dedup_key = _dedup_key(item)
+                if dedup_key and dedup_key not in seen[key]:
+                    seen[key].add(dedup_key)
+                    merged[key].append(item)
+    return merged
+
+async def map_reduce_summary(text, owner=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Resume un texto que no cabe en el contexto: lo divide por secciones en fragmentos,
+    resume cada fragmento en paralelo (con un máximo de SUMMARY_MAP_CONCURRENCY llamadas)
+    y combina los JSON resultantes. Los fragmentos que fallan se omiten. `owner` (ws_id)
+    y `priority` se pasan al planificador del LLM.
+    Devuelve (salida, resultado) con la salida en el mismo formato que una respuesta del LLM.
+    """
+    chunks = chunk_text(text, SUMMARY_CHUNK_TOKENS)
+    semaphore = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+
+    async def summarize_chunk(index, chunk):
+        messages = [
+            {"role": "system", "content": SUMMARY_MAP_PROMPT},
+            {"role": "user", "content": f"Fragmento {index + 1} de {len(chunks)}:\n\n{chunk}"},
+        ]
+        async with semaphore:
+            output = await llm_client.complete(messages, max_tokens=SUMMARY_MAP_MAX_TOKENS, temperature=0, owner=owner, priority=priority)
+        return parse_summary_output(output)
+
+    results = await asyncio.gather(*(summarize_chunk(i, c) for i, c in enumerate(chunks)), return_exceptions=True)
+    partials = []
+    for index, partial in enumerate(results):
+        if isinstance(partial, BaseException):
+            logger.warning(f"[summarizer] Falló el fragmento {index + 1}/{len(chunks)}: {partial}")
+        else:
+            partials.append(partial)
+    if not partials:
+        raise results[0]
+    result = merge_summaries(partials)
+    full_output = "```json\n" + json.dumps(result, ensure_ascii=False, indent=2) + "\n```"
+    return full_output, result
+
+async def call_llm_for_map_reduce(text, stream_placeholder=None, ws=None, ws_id=None, article_id=None, use_cache=True, sender=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Variante de call_llm_for_summary para papers largos (ver map_reduce_summary).
+    El resultado combinado se envía de una vez, con el mismo protocolo que el streaming.
+    """
+    cache = get_summary_cache() if use_cache else None
+    cache_key = summary_key(text, LLM_MODEL, SUMMARY_MAP_PROMPT, SUMMARY_MAP_MAX_TOKENS)
+    if cache:
+        cached_output = cache.get(cache_key)
+        if cached_output is not None:
+            print(f"[BACKEND LLM_STREAM] Resumen map-reduce servido desde caché ({cache_key[:12]})")
+            return await replay_summary(cached_output, stream_placeholder=stream_placeholder, ws=ws, ws_id=ws_id, article_id=article_id, sender=sender)
+
+    if stream_placeholder:
+        stream_placeholder.text("Paper largo: resumiendo por fragmentos. Espere por favor...")
+    if ws and sender is None:
+        sender = WebSocketStreamSender(ws, ws_id, article_id=article_id)
+    try:
+        full_output, result = await map_reduce_summary(text, owner=ws_id, priority=priority)
+    except asyncio.CancelledError:
+        if sender:
+            sender.cancel()
+        raise
+    except Exception as e:
+        if sender:
+            sender.finish(error=str(e))
+            await sender.wait_closed()
+        raise
+    if stream_placeholder:
+        stream_placeholder.text(full_output)
+    if sender:
+        sender.push(full_output)
+        sender.finish(map_reduce=True, result=result)
+        await sender.wait_closed()
+    if cache:
+        cache.set(cache_key, full_output, LLM_MODEL, SUMMARY_MAP_MAX_TOKENS)
+    return full_output, result
 
-def call_llm_for_summary(text, stream_placeholder=None, ws=None, ws_id=None):
+async def call_llm_for_summary(text, stream_placeholder=None, ws=None, ws_id=None, article_id=None, use_cache=True, sender=None, priority=PRIORITY_INTERACTIVE):
     """
     Llama al LLM para extraer un resumen pedagógico del artículo.
-    Si ws (WebSocket) es provisto, envía el progreso en tiempo real.
-    """
-    system_prompt = (
-        "Actúa como un experto en análisis pedagógico de papers. "
-        "Dado el texto de un artículo científico, extrae las secciones clave EN ESPAÑOL: "
-        "ideas principales, metodologías, comparaciones, algoritmos, etc. "
-        "Retorna tu respuesta en formato JSON con las claves: "
-        "{ 'main_ideas': [...], 'methods': [...], 'comparisons': [...], 'algorithms': [...], 'other': [...] } "
-        "Sin nada adicional."
-    )
-    user_prompt = text
-
-    payload = {
-        "model": LLM_MODEL,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        "max_tokens": 1500,
-        "n": 1,
-        "temperature": 0,
-        "stream": True
-    }
-    headers = {
-        "Authorization": f"Bearer {LLM_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    Si ws (WebSocket) es provisto, envía el progreso en tiempo real. `sender` sustituye al
+    WebSocketStreamSender por defecto (p. ej. una generación compartida entre varios clientes).
+    `priority` es la prioridad de la petición en el planificador del LLM.
+    Las respuestas completas se cachean por (paper, modelo, prompt, max_tokens);
+    en un acierto de caché la salida se reenvía sin llamar al LLM.
+    Si la tarea se cancela (p. ej. el cliente se desconecta), el stream del LLM se cierra.
+    Los textos que no caben en el contexto del modelo se resumen por fragmentos (map-reduce).
+    """
+    if needs_map_reduce(text):
+        return await call_llm_for_map_reduce(text, stream_placeholder=stream_placeholder, ws=ws, ws_id=ws_id, article_id=article_id, use_cache=use_cache, sender=sender, priority=priority)
+
+    cache = get_summary_cache() if use_cache else None
+    cache_key = summary_key(text, LLM_MODEL, SUMMARY_SYSTEM_PROMPT, SUMMARY_MAX_TOKENS)
+    if cache:
+        cached_output = cache.get(cache_key)
+        if cached_output is not None:
+            print(f"[BACKEND LLM_STREAM] Resumen servido desde caché ({cache_key[:12]})")
+            return await replay_summary(cached_output, stream_placeholder=stream_placeholder, ws=ws, ws_id=ws_id, article_id=article_id, sender=sender)
 
     if stream_placeholder:
         stream_placeholder.text("Procesando Prompt de Extracción. Espere por favor...")
 
-    response = requests.post(LLM_BASE_URL + "/chat/completions", json=payload, headers=headers, stream=True)
-    if response.status_code != 200:
-        raise Exception(f"Error en la llamada al LLM: {response.status_code} {response.text}")
-
+    # El envío por WebSocket lo hace una tarea aparte que agrupa los fragmentos
+    if ws and sender is None:
+        sender = WebSocketStreamSender(ws, ws_id, article_id=article_id)
+    # El JSON se extrae a medida que llega: cada elemento completo se envía como evento
+    extractor = JSONStreamExtractor()
     full_output = ""
-    # Detectar si estamos en un thread sin event loop y crear uno temporal para enviar por WS
-    loop = None
-    if ws:
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            # No hay event loop en este thread, crear uno temporal
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-    for line in response.iter_lines():
-        if line:
-            decoded_line = line.decode("utf-8").strip()
-            #print(f"[BACKEND LLM_STREAM] Recibido: {decoded_line[:120]}{'...' if len(decoded_line) > 120 else ''}")
-            if decoded_line.startswith("data:"):
-                data_line = decoded_line[5:].strip()
-                if data_line == "[DONE]":
-                    #print("[BACKEND LLM_STREAM] Fin del stream ([DONE])")
-                    if ws:
-                        msg = {
-                            "type": "llm_stream_done",
-                            "ws_id": ws_id,
-                        }
-                        try:
-                            if loop and loop.is_running():
-                                asyncio.run_coroutine_threadsafe(ws.send_json(msg), loop)
-                            else:
-                                loop.run_until_complete(ws.send_json(msg))
-                        except Exception as e:
-                            #print(f"[BACKEND LLM_STREAM] Error enviando DONE por WS: {e}")
-                            pass
-                    break
-                try:
-                    data_json = json.loads(data_line)
-                    if "choices" in data_json:
-                        for choice in data_json["choices"]:
-                            if "delta" in choice and "content" in choice["delta"]:
-                                content = choice["delta"]["content"]
-                                full_output += content
-                                #print(f"[BACKEND LLM_STREAM] Chunk: {content[:80]}")
-                                if stream_placeholder:
-                                    stream_placeholder.text(full_output)
-                                if ws:
-                                    msg = {
-                                        "type": "llm_stream",
-                                        "ws_id": ws_id,
-                                        "content": content,
-                                        "full_output": full_output
-                                    }
-                                    try:
-                                        if loop and loop.is_running():
-                                            asyncio.run_coroutine_threadsafe(ws.send_json(msg), loop)
-                                        else:
-                                            loop.run_until_complete(ws.send_json(msg))
-                                        #print(f"[BACKEND LLM_STREAM] Enviado chunk por WS (ws_id={ws_id})")
-                                    except Exception as e:
-                                        #print(f"[BACKEND LLM_STREAM] Error enviando chunk por WS: {e}")
-                                        pass
-                except Exception as e:
-                    #print(f"[BACKEND LLM_STREAM] Error procesando chunk: {e}")
-                    pass
-    match = re.search(r"```(?:json)?\s*(\{.*\})\s*```", full_output, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-    else:
-        # Fallback: extraer desde la primera "{" hasta la última "}"
-        start_index = full_output.find("{")
-        end_index = full_output.rfind("}")
-        if start_index != -1 and end_index != -1 and end_index > start_index:
-            json_str = full_output[start_index:end_index+1]
-        else:
-            json_str = "{}"
     try:
-        result = json.loads(json_str)
+        async for content in llm_client.stream_chat(summary_messages(text), max_tokens=SUMMARY_MAX_TOKENS, temperature=0, owner=ws_id, priority=priority):
+            full_output += content
+            if stream_placeholder:
+                stream_placeholder.text(full_output)
+            events = extractor.feed(content)
+            if sender:
+                sender.push(content)
+                for event in events:
+                    if event["event"] != "object":
+                        sender.event(event)
+    except asyncio.CancelledError:
+        if sender:
+            sender.cancel()
+        raise
     except Exception as e:
-        result = {
-            "main_ideas": [],
-            "methods": [],
-            "comparisons": [],
-            "algorithms": [],
-            "other": []
-        }
+        if sender:
+            sender.finish(error=str(e))
+            await sender.wait_closed()
+        raise
+    result = extractor.result if extractor.result is not None else empty_summary()
+    if sender:
+        sender.finish(result=result)
+        await sender.wait_closed()
+    # stream_chat solo termina sin error si el stream llegó a [DONE]: la respuesta está completa
+    if cache:
+        cache.set(cache_key, full_output, LLM_MODEL, SUMMARY_MAX_TOKENS)
     return full_output, result
 
-def summarize_pdf(pdf_path, stream_placeholder=None, ws=None, ws_id=None):
+async def summarize_text(text, stream_placeholder=None, ws=None, ws_id=None, article_id=None, sender=None):
     """
-    Extrae el texto completo del PDF y llama al LLM para obtener el resumen pedagógico.
+    Llama al LLM para obtener el resumen pedagógico de un texto ya extraído del PDF.
     Si ws está presente, hace streaming en tiempo real.
     """
-    text = extract_full_text_from_pdf(pdf_path)
     if not text or "[ERROR]" in text:
-        return "", {
-            "main_ideas": [],
-            "methods": [],
-            "comparisons": [],
-            "algorithms": [],
-            "other": [],
-            "error": "No se pudo extraer texto del PDF."
-        }
-    summary = call_llm_for_summary(text, stream_placeholder=stream_placeholder, ws=ws, ws_id=ws_id)
+        return "", {**empty_summary(), "error": "No se pudo extraer texto del PDF."}
+    summary = await call_llm_for_summary(text, stream_placeholder=stream_placeholder, ws=ws, ws_id=ws_id, article_id=article_id, sender=sender)
     return summary
 
+async def summarize_pdf(pdf_path, stream_placeholder=None, ws=None, ws_id=None, article_id=None):
+    """
+    Extrae el texto completo del PDF y llama al LLM para obtener el resumen pedagógico.
+    Si ws está presente, hace streaming en tiempo real.
+    """
+    text = extract_full_text_from_pdf(pdf_path)
+    return await summarize_text(text, stream_placeholder=stream_placeholder, ws=ws, ws_id=ws_id, article_id=article_id)
+
 # Prueba (opcional)
 if __name__ == "__main__":
     test_pdf = "papers/input/example.pdf"
-    res = summarize_pdf(test_pdf)
+    res = asyncio.run(summarize_pdf(test_pdf))
     print(json.dumps(res, indent=2))
@@ -2,6 +2,11 @@
 Configuration settings for the application
 """
 
+import os
+
+# Raíz del repositorio (alejandria/backend/src -> raíz)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
 # API URLs
 ARXIV_API_URL = "https://export.arxiv.org/api/query"
 TDS_URL = "https://towardsdatascience.com"
@@ -29,3 +34,119 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LLM_BASE_URL = "http://localhost:1234/v1"
 LLM_API_KEY = "lm-studio"
 LLM_MODEL = "deepseek-r1-distill-qwen-14b"
+
+# HTTP client settings (pool compartido de aiohttp)
+HTTP_POOL_LIMIT = 100  # conexiones simultáneas totales
+HTTP_POOL_LIMIT_PER_HOST = 10  # conexiones simultáneas por host
+HTTP_KEEPALIVE_TIMEOUT = 30  # seconds
+# Límites de concurrencia por host (sobrescriben HTTP_POOL_LIMIT_PER_HOST)
+HTTP_HOST_LIMITS = {
+    "export.arxiv.org": 4,
+}
+
+# Verificación de enlaces de GitHub
+GITHUB_VERIFY_CONCURRENCY = 16  # verificaciones simultáneas
+GITHUB_VERIFY_DEADLINE = 5  # seconds por enlace
+
+# Caché de estado de enlaces de GitHub (LRU en memoria + SQLite en disco)
+LINK_CACHE_PATH = os.path.join(PROJECT_ROOT, "input", "database", "link_status.sqlite")
+LINK_CACHE_MAX_ENTRIES = 5000  # entradas en la LRU en memoria
+LINK_CACHE_TTL_OK = 7 * 24 * 3600  # seconds
+LINK_CACHE_TTL_BROKEN = 24 * 3600  # seconds (caché negativa)
+LINK_CACHE_TTL_ERROR = 15 * 60  # seconds (caché negativa para errores transitorios)
+
+# Caché de resultados de búsqueda
+SEARCH_CACHE_TTL = 10 * 60  # seconds
+SEARCH_CACHE_MAX_ENTRIES = 256
+
+# Plazo de cada fuente en una búsqueda (las fuentes se consultan en paralelo)
+SEARCH_SOURCE_TIMEOUT = 30  # seconds
+SEARCH_SOURCE_TIMEOUTS = {  # plazos por fuente (sobrescriben SEARCH_SOURCE_TIMEOUT)
+    "tds": 20,
+}
+
+# Índice en memoria de los papers vistos en las búsquedas, por identidad (ID de arXiv, DOI o URL)
+PAPER_INDEX_MAX_ENTRIES = 50_000
+
+# Índice local de texto completo (SQLite FTS5) sobre los papers ya vistos: fuente "local"
+LOCAL_INDEX_ENABLED = True  # indexar los resultados de las fuentes remotas y los PDFs parseados
+LOCAL_INDEX_PATH = os.path.join(PROJECT_ROOT, "input", "database", "local_index.sqlite")
+LOCAL_INDEX_MAX_BODY_CHARS = 200_000  # caracteres de texto completo indexados por paper
+
+# Embeddings locales (CPU) de título + resumen: re-ranking semántico y colapso de duplicados
+EMBEDDINGS_ENABLED = True  # requiere sentence-transformers; hnswlib (opcional) para el índice ANN
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_STORE_DIR = os.path.join(PROJECT_ROOT, "input", "database", "embeddings")
+EMBEDDING_DUPLICATE_THRESHOLD = 0.95  # similitud coseno a partir de la cual dos resultados son el mismo paper
+EMBEDDING_ANN_SAVE_EVERY = 500  # vectores nuevos entre escrituras del índice ANN a disco (y al cerrar)
+SEMANTIC_RERANK_WEIGHT = 0.5  # peso de la similitud semántica frente a BM25 en `relevance`
+SEARCH_SEMANTIC_RERANK = False  # por defecto; el cliente puede pedirlo con "semantic": true
+SEARCH_DEDUP = True  # colapsar duplicados entre fuentes por identidad o título ("dedup": false para desactivarlo)
+SEARCH_SEMANTIC_DEDUP = False  # además, por similitud de embeddings; el cliente puede pedirlo con "semantic_dedup": true
+EMBEDDING_TIMEOUT = 5  # seconds para los embeddings de una búsqueda (incluida la carga del modelo); después, sin ellos
+
+# Paginación y modo de cosecha masiva de arXiv
+ARXIV_PAGE_SIZE = 100  # tamaño de página inicial
+ARXIV_MIN_PAGE_SIZE = 25
+ARXIV_MAX_PAGE_SIZE = 1000
+ARXIV_PAGE_DELAY = 3.0  # seconds entre peticiones (política de uso de la API de arXiv)
+ARXIV_PAGE_RETRIES = 3  # reintentos por página antes de abandonar
+ARXIV_HARVEST_CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, "input", "scraping", "harvest")
+
+# Extracción de texto de PDFs
+PDF_TOKEN_BUDGET = 24000  # tokens (aprox.) de texto extraído; si no cabe en el contexto se resume por fragmentos
+PDF_READ_BUDGET_FACTOR = 4  # se dejan de leer páginas tras leer FACTOR x presupuesto
+PDF_TEXT_CACHE_DIR = os.path.join(PROJECT_ROOT, "input", "database", "pdf_text")
+
+# Pool de procesos para el parseo de PDFs
+PDF_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))  # procesos de extracción
+PDF_WORKER_MAX_TASKS = 20  # documentos por proceso antes de reciclarlo
+PDF_JOB_TIMEOUT = 120  # seconds por documento
+PDF_MAX_PENDING = 32  # trabajos admitidos (en cola + en curso)
+
+# Almacén de PDFs direccionado por contenido (compartido por backend y pipeline de Streamlit)
+PDF_STORE_DIR = os.path.join(PROJECT_ROOT, "input", "papers", "store")
+PDF_STORE_MAX_BYTES = 2 * 1024 ** 3  # tamaño máximo del almacén antes de expulsar (LRU)
+PDF_STORE_MAX_FILE_BYTES = 100 * 1024 ** 2  # tamaño máximo de un PDF descargado
+PDF_STORE_REVALIDATE_AFTER = 24 * 3600  # seconds; las versiones de arXiv (vN) no se revalidan
+PDF_STORE_EVICT_GRACE = 15 * 60  # seconds; un PDF servido hace menos no se expulsa (puede estar parseándose)
+PDF_DOWNLOAD_TIMEOUT = 60  # seconds
+
+# Caché persistente de resúmenes del LLM (temperature 0 => salida determinista)
+SUMMARY_CACHE_PATH = os.path.join(PROJECT_ROOT, "input", "database", "summary_cache.sqlite")
+SUMMARY_CACHE_MAX_ENTRIES = 2000
+
+# Cliente LLM (endpoint compatible con OpenAI)
+LLM_POOL_LIMIT = 8  # conexiones simultáneas al servidor del LLM
+LLM_CONNECT_TIMEOUT = 10  # seconds
+LLM_READ_TIMEOUT = 300  # seconds sin recibir datos antes de abortar el stream
+LLM_MAX_INFLIGHT = 2  # peticiones simultáneas al LLM (el resto espera en el planificador)
+LLM_QUEUE_TIMEOUT = 300  # seconds máximos de espera por un hueco del LLM
+
+# Resumen map-reduce de papers largos
+LLM_CONTEXT_TOKENS = 8192  # ventana de contexto del modelo
+SUMMARY_CHUNK_TOKENS = 3000  # tokens máximos de texto por fragmento
+SUMMARY_MAP_MAX_TOKENS = 1000  # tokens de respuesta por fragmento
+SUMMARY_MAP_CONCURRENCY = 3  # fragmentos resumidos en paralelo
+
+# Envío por WebSocket de los streams del LLM (agrupación de fragmentos)
+WS_STREAM_FLUSH_INTERVAL = 0.05  # seconds máximos que un fragmento espera a agruparse
+WS_STREAM_MAX_BATCH_CHARS = 4096  # se envía en cuanto el lote alcanza este tamaño
+
+# Protocolo WebSocket v2 (/ws/search): mensajes numerados y reanudación tras reconexión
+WS_PROTOCOL_VERSION = 2
+WS_RESYNC_BUFFER_FRAMES = 2000  # mensajes que se guardan por sesión para reenviarlos al reconectar
+WS_RESYNC_GRACE = 30  # seconds que una sesión desconectada espera a ser reanudada
+
+# Cola de trabajos de /extract-ideas
+JOB_WORKERS = 2  # trabajos ejecutándose a la vez
+JOB_MAX_QUEUED = 100  # trabajos en cola admitidos
+JOB_PER_OWNER_LIMIT = 1  # trabajos en ejecución simultáneos por ws_id
+JOB_HISTORY = 200  # trabajos terminados que se conservan para los endpoints de estado
+JOB_BACKGROUND_LIMIT = 1  # workers que pueden ocupar a la vez los trabajos en segundo plano
+
+# Prefetch especulativo de los mejores resultados tras una búsqueda (opt-in)
+PREFETCH_ENABLED = False  # por defecto; el cliente puede pedirlo con "prefetch": true en la búsqueda
+PREFETCH_TOP_K = 3  # PDFs a descargar y parsear
+PREFETCH_SUMMARIES = False  # además, generar y cachear sus resúmenes ("prefetch_summaries": true)
@@ -0,0 +1,189 @@
+"""
+Extracción incremental de JSON de la salida en streaming del LLM.
+
+`JSONStreamExtractor` consume los fragmentos a medida que llegan y sigue los corchetes,
+las llaves y las cadenas del primer objeto JSON de nivel superior. Mientras se genera emite
+eventos parciales:
+
+- ``{"event": "item", "key": k, "index": i, "value": v}`` al completarse cada elemento de
+  una lista de primer nivel (p. ej. cada idea de ``main_ideas``).
+- ``{"event": "field", "key": k, "value": v}`` al completarse un valor de primer nivel que
+  no es una lista.
+- ``{"event": "object", "value": obj}`` al cerrarse el objeto completo.
+
+El texto dentro de ``<think>...</think>`` (razonamiento de modelos tipo DeepSeek-R1) y los
+objetos que no son JSON válido se ignoran; el resultado es el primer objeto válido.
+"""
+from typing import Any, Dict, List, Optional
+import copy
+import json
+
+_THINK_OPEN = "<think>"
+_THINK_CLOSE = "</think>"
+
+# Qué se espera a continuación dentro del objeto de primer nivel
+_EXPECT_KEY = "key"
+_EXPECT_COLON = "colon"
+_EXPECT_VALUE = "value"
+_EXPECT_COMMA = "comma"
+
+
+def _loads(text: str):
+    try:
+        return True, json.loads(text)
+    except ValueError:
+        return False, None
+
+
+class JSONStreamExtractor:
+    """Extractor incremental (y con estado) del primer objeto JSON de un stream."""
+
+    def __init__(self):
+        self.result: Optional[Dict[str, Any]] = None
+        self._pending = ""  # texto fuera de un objeto que aún puede contener una etiqueta partida
+        self._in_think = False
+        self._reset_candidate()
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def _reset_candidate(self) -> None:
+        self._buf: List[str] = []
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._expect = _EXPECT_KEY
+        self._key_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        """Consume un fragmento y devuelve los eventos que completa."""
+        events: List[Dict[str, Any]] = []
+        if self.done or not delta:
+            return events
+        text = self._pending + delta
+        self._pending = ""
+        i = 0
+        while i < len(text) and not self.done:
+            if not self._stack:
+                i = self._scan_outside(text, i)
+                continue
+            self._consume(text[i], events)
+            i += 1
+        return events
+
+    def _scan_outside(self, text: str, i: int) -> int:
+        """Avanza fuera de cualquier objeto hasta el siguiente '{' que no esté en un bloque <think>."""
+        if self._in_think:
+            end = text.find(_THINK_CLOSE, i)
+            if end == -1:
+                self._pending = text[max(i, len(text) - len(_THINK_CLOSE) + 1):]
+                return len(text)
+            self._in_think = False
+            return end + len(_THINK_CLOSE)
+        think = text.find(_THINK_OPEN, i)
+        brace = text.find("{", i)
+        if think != -1 and (brace == -1 or think < brace):
+            self._in_think = True
+            return think + len(_THINK_OPEN)
+        if brace == -1:
+            # Guardar un posible "<think" partido entre fragmentos
+            tail = text.rfind("<", max(i, len(text) - len(_THINK_OPEN) + 1))
+            if tail != -1 and _THINK_OPEN.startswith(text[tail:]):
+                self._pending = text[tail:]
+            return len(text)
+        self._buf.append("{")
+        self._stack.append("{")
+        return brace + 1
+
+    def _consume(self, char: str, events: List[Dict[str, Any]]) -> None:
+        pos = len(self._buf)
+        self._buf.append(char)
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if len(self._stack) == 1 and self._expect == _EXPECT_KEY and self._key_start is not None:
+                    _, self._key = _loads("".join(self._buf[self._key_start:]))
+                    self._expect = _EXPECT_COLON
+            return
+
+        depth = len(self._stack)
+        if char.isspace():
+            return
+
+        # Inicio de un valor de primer nivel o de un elemento de una lista de primer nivel
+        if depth == 1 and self._expect == _EXPECT_VALUE and self._value_start is None:
+            self._value_start = pos
+            self._expect = _EXPECT_COMMA
+            if char == "[":
+                self._item_index = 0
+        elif depth == 2 and self._stack[-1] == "[" and self._item_start is None and char not in ",]":
+            self._item_start = pos
+
+        if char == '"':
+            self._in_string = True
+            if depth == 1 and self._expect == _EXPECT_KEY:
+                self._key_start = pos
+        elif char in "{[":
+            self._stack.append(char)
+        elif char in "}]":
+            if depth == 2 and self._stack[-1] == "[" and char == "]":
+                self._emit_item(pos, events)
+            self._stack.pop()
+            if depth == 1:
+                self._emit_field(pos, events)
+                self._finish_candidate(events)
+        elif char == ",":
+            if depth == 1:
+                self._emit_field(pos, events)
+                self._expect = _EXPECT_KEY
+                self._key_start = None
+            elif depth == 2 and self._stack[-1] == "[":
+                self._emit_item(pos, events)
+        elif char == ":" and depth == 1 and self._expect == _EXPECT_COLON:
+            self._expect = _EXPECT_VALUE
+
+    def _emit_item(self, end: int, events: List[Dict[str, Any]]) -> None:
+        if self._item_start is None:
+            return
+        ok, value = _loads("".join(self._buf[self._item_start:end]))
+        self._item_start = None
+        if ok and self._key is not None:
+            events.append({"event": "item", "key": self._key, "index": self._item_index, "value": value})
+            self._item_index += 1
+
+    def _emit_field(self, end: int, events: List[Dict[str, Any]]) -> None:
+        if self._value_start is None:
+            return
+        raw = "".join(self._buf[self._value_start:end]).strip()
+        self._value_start = None
+        # Las listas ya se han emitido elemento a elemento
+        if raw.startswith("[") or self._key is None:
+            return
+        ok, value = _loads(raw)
+        if ok:
+            events.append({"event": "field", "key": self._key, "value": value})
+
+    def _finish_candidate(self, events: List[Dict[str, Any]]) -> None:
+        ok, value = _loads("".join(self._buf))
+        if ok and isinstance(value, dict):
+            self.result = value
+            events.append({"event": "object", "value": value})
+        self._reset_candidate()
+
+
+def extract_json(text: str, default: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Primer objeto JSON válido de un texto completo, o una copia de `default`."""
+    extractor = JSONStreamExtractor()
+    extractor.feed(text)
+    if extractor.result is not None:
+        return extractor.result
+    return copy.deepcopy(default) if default is not None else {}
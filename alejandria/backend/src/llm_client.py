@@ -0,0 +1,200 @@
+"""
+Cliente asíncrono en streaming para el endpoint de chat compatible con OpenAI.
+
+- Pool de conexiones keep-alive propio (una sesión aiohttp por event loop).
+- Decodificador SSE incremental: trocea el cuerpo a medida que llega, sin leer línea a línea.
+- Iteración asíncrona de los deltas: el siguiente bloque solo se lee cuando el consumidor
+  pide el siguiente delta, así que un consumidor lento frena la lectura del socket.
+- Si el consumidor abandona el stream (cancelación o cierre del generador), la respuesta
+  se cierra y el servidor del LLM deja de generar.
+- Cada petición ocupa un hueco del planificador (llm_scheduler) mientras dura su stream.
+"""
+
+import asyncio
+import codecs
+import json
+import re
+from typing import AsyncIterator, Dict, List, Optional
+import logging
+
+import aiohttp
+
+from .config import (
+    LLM_BASE_URL,
+    LLM_API_KEY,
+    LLM_MODEL,
+    LLM_POOL_LIMIT,
+    LLM_CONNECT_TIMEOUT,
+    LLM_READ_TIMEOUT,
+    HTTP_KEEPALIVE_TIMEOUT,
+)
+from .llm_scheduler import llm_scheduler, PRIORITY_INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+_LINE_END = re.compile(r"\r\n|\r|\n")
+
+
+class LLMError(Exception):
+    """Error devuelto por el servidor del LLM."""
+
+
+class SSEDecoder:
+    """
+    Decodificador incremental de Server-Sent Events.
+    `feed` recibe bytes arbitrarios y devuelve los campos `data` de los eventos completos.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._data: List[str] = []
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk: bytes) -> List[str]:
+        self._buffer += self._decoder.decode(chunk)
+        events = []
+        while True:
+            # Los eventos se separan por líneas; se admiten \n, \r\n y \r
+            match = _LINE_END.search(self._buffer)
+            if match is None or (match.group() == "\r" and match.end() == len(self._buffer)):
+                # Sin fin de línea, o un \r\n que puede venir partido entre dos bloques
+                break
+            line = self._buffer[:match.start()]
+            self._buffer = self._buffer[match.end():]
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self) -> List[str]:
+        """Entrega el evento pendiente al terminar el cuerpo de la respuesta."""
+        events = []
+        if self._buffer:
+            self._process_line(self._buffer)
+            self._buffer = ""
+        if self._data:
+            events.append("\n".join(self._data))
+            self._data = []
+        return events
+
+    def _process_line(self, line: str) -> Optional[str]:
+        if not line:
+            # Línea vacía: fin del evento
+            if self._data:
+                data, self._data = "\n".join(self._data), []
+                return data
+            return None
+        if line.startswith(":"):
+            # Comentario (keep-alive)
+            return None
+        field, _, value = line.partition(":")
+        if field == "data":
+            self._data.append(value[1:] if value.startswith(" ") else value)
+        return None
+
+
+def _deltas(data: str) -> List[str]:
+    """Extrae el texto de los deltas de un evento `chat.completion.chunk`."""
+    try:
+        payload = json.loads(data)
+    except json.JSONDecodeError:
+        logger.warning(f"[llm_client] Evento SSE no válido: {data[:120]}")
+        return []
+    if "error" in payload:
+        raise LLMError(str(payload["error"]))
+    contents = []
+    for choice in payload.get("choices", []):
+        content = (choice.get("delta") or {}).get("content")
+        if content:
+            contents.append(content)
+    return contents
+
+
+class LLMClient:
+    """Cliente del LLM compartido por todos los agentes del backend."""
+
+    def __init__(self, base_url: str = LLM_BASE_URL, api_key: str = LLM_API_KEY, model: str = LLM_MODEL, pool_limit: int = LLM_POOL_LIMIT):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.pool_limit = pool_limit
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_limit, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=aiohttp.ClientTimeout(total=None, connect=LLM_CONNECT_TIMEOUT, sock_read=LLM_READ_TIMEOUT),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: float = 0,
+        model: Optional[str] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        owner: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Genera los fragmentos de texto de la respuesta a medida que llegan.
+        Termina al recibir `[DONE]`; si el stream se corta antes, lanza LLMError.
+        La petición espera su turno en el planificador según `priority` y `owner` (ws_id);
+        si no obtiene hueco a tiempo, lanza LLMQueueTimeout.
+        """
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "n": 1,
+            "temperature": temperature,
+            "stream": True,
+        }
+        async with llm_scheduler.slot(priority=priority, owner=owner):
+            session = self._get_session()
+            async with session.post(f"{self.base_url}/chat/completions", json=payload) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    raise LLMError(f"Error en la llamada al LLM: {response.status} {body}")
+                decoder = SSEDecoder()
+                completed = False
+                try:
+                    async for chunk in response.content.iter_any():
+                        for data in decoder.feed(chunk):
+                            if data.strip() == "[DONE]":
+                                completed = True
+                                return
+                            for content in _deltas(data):
+                                yield content
+                    for data in decoder.flush():
+                        if data.strip() == "[DONE]":
+                            completed = True
+                            return
+                        for content in _deltas(data):
+                            yield content
+                    raise LLMError("El stream del LLM terminó sin [DONE]")
+                finally:
+                    if not completed:
+                        # Cancelado o abandonado: cerrar la conexión para que el servidor deje de generar
+                        response.close()
+
+    async def complete(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Devuelve la respuesta completa (consumiendo el stream)."""
+        parts = []
+        async for content in self.stream_chat(messages, **kwargs):
+            parts.append(content)
+        return "".join(parts)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+
+llm_client = LLMClient()
@@ -0,0 +1,175 @@
+"""
+Planificador de las llamadas al LLM, compartido por todo el proceso del backend.
+
+El servidor local del LLM es el cuello de botella: este módulo limita cuántas peticiones
+hay en vuelo y decide quién entra cuando se libera un hueco.
+
+- `slots` peticiones simultáneas como máximo; una petición ocupa su hueco mientras dura el stream.
+- Prioridad por petición: los resúmenes interactivos pasan antes que los trabajos por lotes.
+- Dentro de una misma prioridad, turno rotatorio entre propietarios (ws_id), así que un
+  cliente que lanza muchas peticiones no acapara el LLM.
+- Tiempo máximo de espera en cola (LLMQueueTimeout) y métricas de espera y ocupación.
+"""
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from itertools import count
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+import asyncio
+import logging
+import time
+
+from .config import LLM_MAX_INFLIGHT, LLM_QUEUE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0  # resúmenes que un usuario está esperando
+PRIORITY_BATCH = 10  # congruencia, generación de notebooks, prefetch
+
+_DEFAULT_OWNER = "-"
+
+
+class LLMQueueTimeout(Exception):
+    """La petición no obtuvo hueco en el LLM dentro del tiempo de espera."""
+
+
+class _Waiter:
+    __slots__ = ("owner", "priority", "future", "enqueued_at", "order")
+
+    def __init__(self, owner: str, priority: int, future: asyncio.Future, order: int):
+        self.owner = owner
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.order = order
+
+
+class LLMScheduler:
+    """Semáforo con prioridades y reparto equitativo por propietario."""
+
+    def __init__(self, slots: int = LLM_MAX_INFLIGHT, queue_timeout: Optional[float] = LLM_QUEUE_TIMEOUT):
+        self.slots = slots
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        # prioridad -> propietario -> cola de espera (el orden de los propietarios es el turno)
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        self._order = count()
+        # Métricas
+        self.granted = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_hold = 0.0
+        self._completed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queued(self) -> int:
+        return sum(len(waiters) for owners in self._queues.values() for waiters in owners.values())
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE, owner: Optional[str] = None, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """Ocupa un hueco del LLM durante el bloque `async with`."""
+        await self.acquire(priority, owner, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._total_hold += time.monotonic() - started
+            self._completed += 1
+            self.release()
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, owner: Optional[str] = None, timeout: Optional[float] = None) -> None:
+        owner = owner or _DEFAULT_OWNER
+        if self._in_flight < self.slots and not self.queued():
+            self._in_flight += 1
+            self._record_wait(0.0)
+            return
+
+        waiter = _Waiter(owner, priority, asyncio.get_running_loop().create_future(), next(self._order))
+        self._queues.setdefault(priority, OrderedDict()).setdefault(owner, deque()).append(waiter)
+        timeout = self.queue_timeout if timeout is None else timeout
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # El hueco se concedió justo al vencer el plazo: devolverlo
+                self.release()
+            else:
+                waiter.future.cancel()
+                self._remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                logger.warning(f"[llm_scheduler] Tiempo de espera agotado para {owner} (prioridad {priority})")
+                raise LLMQueueTimeout(f"El LLM está ocupado: sin hueco tras {timeout} s en cola")
+            self.cancelled += 1
+            raise
+        self._record_wait(time.monotonic() - waiter.enqueued_at)
+
+    def release(self) -> None:
+        """Libera un hueco y se lo pasa al siguiente en espera, si lo hay."""
+        waiter = self._next_waiter()
+        if waiter is None:
+            self._in_flight -= 1
+            return
+        # El hueco pasa directamente al siguiente: _in_flight no cambia
+        waiter.future.set_result(None)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in sorted(self._queues):
+            owners = self._queues[priority]
+            while owners:
+                owner, waiters = next(iter(owners.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    # Turno rotatorio: el propietario pasa al final de su prioridad
+                    owners.move_to_end(owner)
+                else:
+                    del owners[owner]
+                if not waiter.future.done():
+                    if not owners:
+                        del self._queues[priority]
+                    return waiter
+            del self._queues[priority]
+        return None
+
+    def _remove(self, waiter: _Waiter) -> None:
+        owners = self._queues.get(waiter.priority)
+        if not owners or waiter.owner not in owners:
+            return
+        waiters = owners[waiter.owner]
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            return
+        if not waiters:
+            del owners[waiter.owner]
+        if not owners:
+            del self._queues[waiter.priority]
+
+    def _record_wait(self, wait: float) -> None:
+        self.granted += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "in_flight": self._in_flight,
+            "queued": self.queued(),
+            "queued_by_priority": {
+                priority: sum(len(waiters) for waiters in owners.values())
+                for priority, owners in sorted(self._queues.items())
+            },
+            "granted": self.granted,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "avg_wait": round(self._total_wait / self.granted, 3) if self.granted else 0.0,
+            "max_wait": round(self._max_wait, 3),
+            "avg_hold": round(self._total_hold / self._completed, 3) if self._completed else 0.0,
+        }
+
+
+llm_scheduler = LLMScheduler()
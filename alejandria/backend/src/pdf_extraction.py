@@ -0,0 +1,298 @@
+# pdf_extraction.py
+"""
+Motor de extracción de texto de PDFs por secciones, con presupuesto de tokens
+y caché en disco por SHA-256 del fichero.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+import PyPDF2
+
+from .config import PDF_TOKEN_BUDGET, PDF_READ_BUDGET_FACTOR, PDF_TEXT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar la lógica de extracción para invalidar la caché
+EXTRACTOR_VERSION = 1
+
+# Sección canónica -> patrón del título (sin numeración)
+_SECTION_PATTERNS = [
+    ("abstract", r"abstract|resumen"),
+    ("introduction", r"introduction|introducci[oó]n"),
+    ("related_work", r"related\s+work|background|preliminaries"),
+    ("method", r"methods?|methodology|approach|proposed\s+method|model|framework|metodolog[ií]a"),
+    ("experiments", r"experiments?|experimental\s+(?:setup|results)|evaluation"),
+    ("results", r"results|results\s+and\s+discussion"),
+    ("discussion", r"discussion|analysis|limitations"),
+    ("conclusion", r"conclusions?|concluding\s+remarks|conclusions?\s+and\s+future\s+work|conclusi[oó]n(?:es)?"),
+    ("references", r"references|bibliography|referencias"),
+    ("acknowledgments", r"acknowledge?ments?|agradecimientos"),
+    ("appendix", r"appendix|appendices|supplementary\s+material"),
+]
+_NUMBERING = r"(?:(?:\d{1,2}|[IVX]{1,4}|[A-H])\.?\s+)?"
+_HEADING_RE = [
+    (name, re.compile(rf"^{_NUMBERING}(?:{pattern})\s*:?\s*$", re.IGNORECASE))
+    for name, pattern in _SECTION_PATTERNS
+]
+# "Abstract—We propose ..." / "Abstract. We propose ..." en la misma línea
+_INLINE_ABSTRACT_RE = re.compile(r"^abstract\s*[.:—–-]\s*(\S.*)$", re.IGNORECASE)
+
+# Secciones tras las cuales ya no hay contenido útil para el resumen
+_STOP_SECTIONS = {"references", "acknowledgments", "appendix"}
+
+# Reparto del presupuesto (fracción) entre las secciones que se envían al LLM
+_BUDGET_SHARES = OrderedDict([
+    ("abstract", 0.15),
+    ("introduction", 0.25),
+    ("method", 0.30),
+    ("conclusion", 0.15),
+    ("results", 0.05),
+    ("experiments", 0.05),
+    ("discussion", 0.05),
+])
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida de tokens (~4 caracteres por token)."""
+    return len(text) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Recorta el texto a aproximadamente `max_tokens`, en un límite de palabra."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip() + " [...]"
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 del fichero leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_pages(pdf_path: str) -> Iterator[str]:
+    """Genera el texto de cada página bajo demanda (PyPDF2 carga las páginas de forma perezosa)."""
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+
+def _match_heading(line: str):
+    """Devuelve (sección, resto_de_línea) si la línea es un título de sección conocido."""
+    stripped = line.strip()
+    if not stripped or len(stripped) > 60:
+        return None
+    inline = _INLINE_ABSTRACT_RE.match(stripped)
+    if inline:
+        return "abstract", inline.group(1)
+    for name, pattern in _HEADING_RE:
+        if pattern.match(stripped):
+            return name, ""
+    return None
+
+
+def split_sections(pages: Iterator[str], read_budget: Optional[int] = None) -> "OrderedDict[str, str]":
+    """
+    Recorre las páginas y agrupa las líneas por sección. Deja de leer al llegar a
+    referencias/apéndices o al superar `read_budget` tokens leídos.
+    """
+    sections: "OrderedDict[str, list]" = OrderedDict()
+    current = "front"
+    sections[current] = []
+    tokens_read = 0
+    done = False
+    for page_text in pages:
+        for line in page_text.splitlines():
+            heading = _match_heading(line)
+            if heading:
+                name, rest = heading
+                if name in _STOP_SECTIONS and "introduction" in sections:
+                    done = True
+                    break
+                # Un título repetido (p. ej. "Model" en dos sitios) continúa la misma sección
+                current = name
+                sections.setdefault(current, [])
+                if rest:
+                    sections[current].append(rest)
+                continue
+            sections[current].append(line)
+        tokens_read += estimate_tokens(page_text)
+        if done or (read_budget is not None and tokens_read >= read_budget):
+            break
+    return OrderedDict(
+        (name, _clean(" ".join(lines))) for name, lines in sections.items() if lines
+    )
+
+
+def _clean(text: str) -> str:
+    # Unir palabras cortadas con guion al final de línea y normalizar espacios
+    text = re.sub(r"(\w)- (\w)", r"\1\2", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def allocate_budget(sections: "OrderedDict[str, str]", token_budget: int) -> "OrderedDict[str, str]":
+    """
+    Reparte el presupuesto entre secciones priorizando resumen, introducción,
+    método y conclusión; el sobrante se reasigna en proporción a cada cuota.
+    Devuelve las secciones recortadas en el orden del documento.
+    """
+    if "abstract" not in sections and "front" in sections:
+        # Sin título "Abstract": el texto inicial suele contener título, autores y resumen
+        sections = OrderedDict((("abstract" if k == "front" else k), v) for k, v in sections.items())
+
+    sizes = {name: estimate_tokens(text) for name, text in sections.items()}
+    wanted = [name for name in _BUDGET_SHARES if name in sections]
+    if not wanted:
+        wanted = [name for name in sections if name != "front"] or list(sections)
+
+    shares = {name: _BUDGET_SHARES.get(name, 1.0 / len(wanted)) for name in wanted}
+    total_share = sum(shares.values())
+    granted = {name: min(sizes[name], int(token_budget * shares[name] / total_share)) for name in wanted}
+    # Repartir el sobrante entre las secciones que aún no caben enteras, en proporción a su cuota
+    leftover = token_budget - sum(granted.values())
+    while leftover > 0:
+        hungry = [name for name in wanted if granted[name] < sizes[name]]
+        if not hungry:
+            break
+        hungry_share = sum(shares[name] for name in hungry)
+        given = 0
+        for name in hungry:
+            extra = min(sizes[name] - granted[name], max(1, int(leftover * shares[name] / hungry_share)))
+            granted[name] += extra
+            given += extra
+        leftover -= given
+
+    return OrderedDict(
+        (name, truncate_to_tokens(text, granted[name]))
+        for name, text in sections.items()
+        if granted.get(name, 0) > 0
+    )
+
+
+def format_sections(sections: Dict[str, str]) -> str:
+    """Texto final para el LLM, con un encabezado por sección."""
+    return "\n\n".join(f"## {name.replace('_', ' ').title()}\n{text}" for name, text in sections.items())
+
+
+def parse_formatted_sections(text: str) -> "OrderedDict[str, str]":
+    """Inversa de format_sections: separa el texto por sus encabezados "## Sección"."""
+    sections: "OrderedDict[str, str]" = OrderedDict()
+    for block in re.split(r"(?:^|\n\n)(?=## )", text):
+        if not block.strip():
+            continue
+        if block.startswith("## "):
+            title, _, body = block[3:].partition("\n")
+            sections[title.strip()] = body.strip()
+        else:
+            sections.setdefault("", block.strip())
+    return sections
+
+
+def _split_long(text: str, max_tokens: int) -> List[str]:
+    """Parte un texto demasiado largo en trozos de hasta `max_tokens`, preferiblemente en fin de frase."""
+    max_chars = max_tokens * 4
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(". ", 0, max_chars)
+        if cut < max_chars // 2:
+            cut = text.rfind(" ", 0, max_chars)
+        cut = cut + 1 if cut > 0 else max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].lstrip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Divide el texto por secciones en fragmentos de hasta `max_tokens`. Las secciones
+    enteras se agrupan mientras quepan; una sección mayor que el límite se parte y cada
+    trozo conserva su encabezado.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for title, body in parse_formatted_sections(text).items():
+        heading = f"## {title}\n" if title else ""
+        # Reservar sitio para el encabezado (y su " (cont.)") en cada trozo
+        piece_tokens = max(1, max_tokens - estimate_tokens(heading) - 4)
+        for index, piece in enumerate(_split_long(body, piece_tokens)):
+            block = heading.replace("\n", " (cont.)\n") if index else heading
+            block += piece
+            tokens = estimate_tokens(block)
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            current.append(block)
+            current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class PdfTextCache:
+    """Caché en disco de las secciones extraídas, una entrada JSON por (SHA-256, presupuesto)."""
+
+    def __init__(self, directory: str = PDF_TEXT_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, sha256: str, token_budget: int) -> str:
+        return os.path.join(self.directory, f"{sha256}_{token_budget}_v{EXTRACTOR_VERSION}.json")
+
+    def get(self, sha256: str, token_budget: int) -> Optional["OrderedDict[str, str]"]:
+        try:
+            with open(self._path(sha256, token_budget), "r", encoding="utf-8") as f:
+                return OrderedDict(json.load(f)["sections"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, sha256: str, token_budget: int, sections: Dict[str, str]) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(sha256, token_budget)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"sections": list(sections.items())}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el texto extraído en caché: {e}")
+
+
+_cache = PdfTextCache()
+
+
+def extract_sections(pdf_path: str, token_budget: int = PDF_TOKEN_BUDGET, use_cache: bool = True) -> "OrderedDict[str, str]":
+    """
+    Extrae las secciones relevantes del PDF dentro del presupuesto de tokens.
+    El resultado se cachea por SHA-256 del fichero, así que un mismo paper no se parsea dos veces.
+    """
+    sha256 = file_sha256(pdf_path) if use_cache else None
+    if sha256:
+        cached = _cache.get(sha256, token_budget)
+        if cached is not None:
+            logger.info(f"[pdf_extraction] Texto en caché para {pdf_path} ({sha256[:12]})")
+            return cached
+
+    sections = split_sections(iter_pages(pdf_path), read_budget=token_budget * PDF_READ_BUDGET_FACTOR)
+    sections = allocate_budget(sections, token_budget)
+    if sha256 and sections:
+        _cache.set(sha256, token_budget, sections)
+    return sections
+
+
+def extract_text(pdf_path: str, token_budget: int = PDF_TOKEN_BUDGET, use_cache: bool = True) -> str:
+    """Texto por secciones listo para enviar al LLM."""
+    return format_sections(extract_sections(pdf_path, token_budget=token_budget, use_cache=use_cache))
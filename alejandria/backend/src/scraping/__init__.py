@@ -6,3 +6,4 @@ from .agent_arxiv import ArxivAgent
 from .agent_tds import TdsAgent
 from .agent_github import GitHubAgent
 from .source_processor import SourceProcessor
+from .sources import PaperRecord, SourceAdapter, SourceCapabilities, register_source
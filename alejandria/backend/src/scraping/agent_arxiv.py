@@ -2,12 +2,38 @@
 Agent for scraping ArXiv papers
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import time
 import requests
+import aiohttp
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 import xml.etree.ElementTree as ET
 import logging
 
+from .http_client import get_session, host_limit, close_session
+from .link_cache import check_github_link, get_link_cache
+from .link_verifier import clean_github_link, STATUS_PENDING, STATUS_NO_LINK
+from .agent_link_extractor import extract_github_links
+from ..config import (
+    ARXIV_PAGE_SIZE,
+    ARXIV_MIN_PAGE_SIZE,
+    ARXIV_MAX_PAGE_SIZE,
+    ARXIV_PAGE_DELAY,
+    ARXIV_PAGE_RETRIES,
+    ARXIV_HARVEST_CHECKPOINT_DIR,
+    GITHUB_VERIFY_CONCURRENCY,
+)
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_ATOM_ENTRY = _ATOM + "entry"
+_OPENSEARCH_TOTAL = "{http://a9.com/-/spec/opensearch/1.1/}totalResults"
+STREAM_CHUNK_SIZE = 64 * 1024  # bytes por bloque leído del cuerpo HTTP
+
 
 class ArxivAgent:
     """
@@ -20,14 +46,21 @@ class ArxivAgent:
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
         }
 
+    def _build_search_url(self, query: str, max_results: int, type_query: str, sortby: str, sortorder: str, start: int) -> str:
+        """
+        Build the arXiv API (XML) query URL
+        """
+        return f"http://export.arxiv.org/api/query?search_query={type_query}:{query}&start={start}&max_results={max_results}&sortBy={sortby}&sortOrder={sortorder}"
+
     def search_papers(self, query: str, max_results: int = 10, timeout: int = 30, type_query: str = "all", sortby: str = "relevance", sortorder: str = "descending", start: int = 0) -> List[Dict]:
         """
-        Search ArXiv for papers matching the query (usando la API XML, no BeautifulSoup)
+        Search ArXiv for papers matching the query (usando la API XML, no BeautifulSoup).
+        Versión bloqueante para scripts; dentro del servidor usar fetch_articles.
         """
         print(f"[ArxivAgent] Buscando papers para: '{query}'")
         try:
             # Construir URL de búsqueda usando la API XML de arXiv
-            search_url = f"http://export.arxiv.org/api/query?search_query={type_query}:{query}&start={start}&max_results={max_results}&sortBy={sortby}&sortOrder={sortorder}"
+            search_url = self._build_search_url(query, max_results, type_query, sortby, sortorder, start)
             print(f"[ArxivAgent] URL de búsqueda: {search_url}")
             response = requests.get(
                 search_url,
@@ -36,7 +69,10 @@ class ArxivAgent:
             )
             response.raise_for_status()
             # Procesar respuesta XML con ElementTree (no BeautifulSoup)
-            return self.parse_response(response.text)
+            articles = self.parse_response(response.text)
+            # Verificar los enlaces de GitHub en paralelo antes de devolver
+            self._verify_links_blocking(articles)
+            return articles
         except requests.Timeout:
             print("[ArxivAgent] Timeout al conectar con ArXiv")
             return []
@@ -49,82 +85,445 @@ class ArxivAgent:
             traceback.print_exc()
             return []
 
-    def fetch_articles(self, query: str, max_results: int = 10, timeout: int = 30, type_query: str = "all", sortby: str = "relevance", sortorder: str = "descending", start: int = 0) -> List[Dict]:
+    async def fetch_articles(self, query: str, max_results: int = 10, timeout: int = 30, type_query: str = "all", sortby: str = "relevance", sortorder: str = "descending", start: int = 0) -> List[Dict]:
         """
-        Alias for search_papers to match the expected interface
+        Async search over the shared keep-alive connection pool.
+        No bloquea el event loop: la espera de red se solapa con otras sesiones.
+        """
+        return [
+            article async for article in self.iter_articles(query, max_results, timeout, type_query, sortby, sortorder, start)
+        ]
+
+    async def iter_articles(self, query: str, max_results: int = 10, timeout: int = 30, type_query: str = "all", sortby: str = "relevance", sortorder: str = "descending", start: int = 0) -> AsyncIterator[Dict]:
+        """
+        Async generator over the results: parsea el cuerpo HTTP por bloques y entrega
+        cada artículo en cuanto se cierra su <entry>, sin construir el árbol completo.
+        """
+        if max_results > ARXIV_MAX_PAGE_SIZE:
+            # Peticiones grandes: paginar de forma transparente en lugar de una sola petición
+            async for article in self.harvest(query, max_total=max_results, type_query=type_query, sortby=sortby, sortorder=sortorder, start=start, timeout=timeout, resume=False, checkpoint=False):
+                yield article
+            return
+
+        print(f"[ArxivAgent] Buscando papers (async) para: '{query}'")
+        try:
+            search_url = self._build_search_url(query, max_results, type_query, sortby, sortorder, start)
+            print(f"[ArxivAgent] URL de búsqueda: {search_url}")
+            session = get_session()
+            async with host_limit(search_url):
+                async with session.get(
+                    search_url,
+                    headers=self.headers,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as response:
+                    response.raise_for_status()
+                    # Los enlaces de GitHub quedan en "pending"; el llamador decide cuándo verificarlos
+                    stream = AtomEntryStream()
+                    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        for entry in stream.feed(chunk):
+                            article = self._entry_to_article(entry)
+                            if article is not None:
+                                yield article
+                    for entry in stream.close():
+                        article = self._entry_to_article(entry)
+                        if article is not None:
+                            yield article
+        except asyncio.TimeoutError:
+            print("[ArxivAgent] Timeout al conectar con ArXiv")
+        except aiohttp.ClientError as e:
+            print(f"[ArxivAgent] Error en la petición a ArXiv: {str(e)}")
+        except ET.ParseError as e:
+            print(f"[ArxivAgent] Respuesta XML inválida de ArXiv: {str(e)}")
+        except Exception as e:
+            print(f"[ArxivAgent] Error inesperado: {str(e)}")
+            import traceback
+            traceback.print_exc()
+
+    async def harvest(
+        self,
+        query: str,
+        max_total: Optional[int] = None,
+        type_query: str = "all",
+        sortby: str = "submittedDate",
+        sortorder: str = "descending",
+        start: int = 0,
+        page_size: int = ARXIV_PAGE_SIZE,
+        delay: float = ARXIV_PAGE_DELAY,
+        timeout: int = 60,
+        resume: bool = True,
+        checkpoint: bool = True,
+    ) -> AsyncIterator[Dict]:
         """
-        return self.search_papers(query, max_results, timeout, type_query, sortby, sortorder, start)
+        Bulk harvest mode: recorre los resultados página a página (offsets de `start`).
 
-    def parse_response(self, xml_data):
-        root = ET.fromstring(xml_data)
-        ns = {"atom": "http://www.w3.org/2005/Atom", "arxiv": "http://arxiv.org/schemas/atom"}
+        - El tamaño de página se adapta: se duplica si las páginas llegan rápido y se
+          reduce a la mitad ante timeouts o errores.
+        - Entre peticiones se respeta un retardo mínimo de `delay` segundos.
+        - La página siguiente se descarga mientras se parsea y entrega la actual.
+        - Con `checkpoint` se guarda el siguiente offset en disco una vez por página, cuando
+          el llamador ya procesó su último registro (al pedir el siguiente); si deja de
+          iterar a mitad de página, tras el último registro por el que pidió el siguiente.
+          Con `resume` se continúa desde el último offset guardado para la misma consulta.
+          Si el proceso muere a mitad de página, al reanudar se repiten los registros ya
+          entregados de esa página.
+        - Una página sin entradas no dice nada del total: su `totalResults` (arXiv
+          devuelve a veces 0) se ignora y la página se reintenta como incompleta.
+        """
+        state = None
+        if checkpoint:
+            state = HarvestCheckpoint.for_query(query=query, type_query=type_query, sortby=sortby, sortorder=sortorder, start=start, max_total=max_total)
+        offset = state.load(start) if (state and resume) else start
+        end = start + max_total if max_total else None
+        if state and resume and state.total_results and (end is None or end > state.total_results):
+            end = state.total_results
+        size = max(ARXIV_MIN_PAGE_SIZE, min(page_size, ARXIV_MAX_PAGE_SIZE))
+        throttle = _Throttle(delay)
+        total_results = None
+        failures = 0
+        delivered = None  # offset tras el último registro procesado de la página en curso
+
+        async def fetch_page(page_start: int, page_len: int):
+            await throttle.wait()
+            url = self._build_search_url(query, page_len, type_query, sortby, sortorder, page_start)
+            print(f"[ArxivAgent] Cosechando página start={page_start} size={page_len}")
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            body = await self._fetch_page(url, timeout)
+            return body, loop.time() - started
+
+        def page_len_at(page_start: int) -> int:
+            return size if end is None else min(size, end - page_start)
+
+        if end is not None and offset >= end:
+            return
+        current = (offset, page_len_at(offset))
+        task = asyncio.create_task(fetch_page(*current))
+        try:
+            while task is not None:
+                page_start, page_len = current
+                try:
+                    body, elapsed = await task
+                except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                    failures += 1
+                    if failures > ARXIV_PAGE_RETRIES:
+                        print(f"[ArxivAgent] Cosecha detenida en start={page_start}: {e}")
+                        return
+                    size = max(ARXIV_MIN_PAGE_SIZE, size // 2)
+                    print(f"[ArxivAgent] Error en página start={page_start} ({e}); reintentando con size={size}")
+                    current = (page_start, page_len_at(page_start))
+                    task = asyncio.create_task(fetch_page(*current))
+                    continue
+
+                # Prefetch: pedir ya la página siguiente mientras se parsea la actual
+                next_start = page_start + page_len
+                task = None
+                if end is None or next_start < end:
+                    current = (next_start, page_len_at(next_start))
+                    task = asyncio.create_task(fetch_page(*current))
+
+                articles, page_total = await asyncio.to_thread(self._parse_page, body)
+                # El total solo es fiable en una página con entradas (las vacías traen a veces 0)
+                if page_total is not None and articles:
+                    total_results = page_total
+                    if end is None or end > total_results:
+                        end = total_results
+
+                # arXiv devuelve a veces páginas vacías o recortadas: repetir desde lo recibido
+                received_end = page_start + len(articles)
+                expected_end = page_start + page_len if end is None else min(page_start + page_len, end)
+                if received_end < expected_end:
+                    if task is not None:
+                        task.cancel()
+                    failures += 1
+                    if failures > ARXIV_PAGE_RETRIES:
+                        print(f"[ArxivAgent] Página incompleta en start={page_start}; fin de la cosecha")
+                        task = None
+                    else:
+                        current = (received_end, page_len_at(received_end))
+                        task = asyncio.create_task(fetch_page(*current))
+                else:
+                    failures = 0
+                    # Página rápida: crecer; página lenta: encoger
+                    if elapsed < timeout / 4:
+                        size = min(ARXIV_MAX_PAGE_SIZE, size * 2)
+                    elif elapsed > timeout / 2:
+                        size = max(ARXIV_MIN_PAGE_SIZE, size // 2)
+                    if task is not None and end is not None and current[0] >= end:
+                        task.cancel()
+                        task = None
+
+                for position, article in enumerate(articles, start=page_start + 1):
+                    yield article
+                    delivered = position
+                # El llamador ya procesó toda la página: reanudar después de ella
+                delivered = None
+                if state:
+                    state.save(received_end, total_results=total_results)
+                if end is not None and received_end >= end:
+                    break
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+            # El llamador dejó de iterar a mitad de página: reanudar después del último registro que procesó
+            if state and delivered is not None:
+                state.save(delivered, total_results=total_results)
+
+    async def _fetch_page(self, url: str, timeout: int) -> bytes:
+        """Descarga el cuerpo completo de una página de resultados."""
+        session = get_session()
+        async with host_limit(url):
+            async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                response.raise_for_status()
+                return await response.read()
+
+    def _parse_page(self, body: bytes):
+        """Parsea una página y devuelve (artículos, totalResults del feed)."""
+        stream = AtomEntryStream()
+        entries = stream.feed(body) + stream.close()
+        articles = [a for a in (self._entry_to_article(e) for e in entries) if a is not None]
+        return articles, stream.total_results
+
+    def _verify_links_blocking(self, articles: List[Dict]) -> None:
+        """
+        Verifica los enlaces pendientes con el verificador síncrono y la caché compartida,
+        en hilos (ruta bloqueante). No usa asyncio: funciona también si el llamador ya
+        tiene un event loop en marcha (Jupyter, Streamlit) y no toca la sesión HTTP compartida.
+        """
+        pending = [a for a in articles if a.get("github_link") and a.get("github_status") == STATUS_PENDING]
+        links = list(dict.fromkeys(a["github_link"] for a in pending))
+        if not links:
+            return
+        with ThreadPoolExecutor(max_workers=min(GITHUB_VERIFY_CONCURRENCY, len(links))) as executor:
+            statuses = dict(zip(links, executor.map(check_github_link, links)))
+        get_link_cache().flush()
+        for article in pending:
+            article["github_status"] = statuses[article["github_link"]]
+
+    def parse_response(self, xml_data) -> List[Dict]:
+        """
+        Parse a complete Atom document (str or bytes) into article dicts.
+        """
+        if isinstance(xml_data, str):
+            xml_data = xml_data.encode("utf-8")
+        stream = AtomEntryStream()
+        entries = stream.feed(xml_data) + stream.close()
         articles = []
-        
-        for entry in root.findall("atom:entry", ns):
-            try:
-                # Título
-                title = entry.find("atom:title", ns).text.strip() if entry.find("atom:title", ns) is not None else "Sin título"
-                
-                # Autores
-                authors = []
-                for author in entry.findall("atom:author", ns):
-                    name = author.find("atom:name", ns)
-                    if name is not None and name.text:
-                        authors.append(name.text.strip())
-                authors = ", ".join(authors) if authors else "Autor desconocido"
-                
-                # Resumen
-                summary = entry.find("atom:summary", ns).text.strip() if entry.find("atom:summary", ns) is not None else ""
-                
-                # Enlaces (PDF, DOI, etc.)
-                pdf_url = ""
-                doi = ""
-                link_article = ""
-                for link in entry.findall("atom:link", ns):
-                    href = link.attrib.get("href", "")
-                    if link.attrib.get("title") == "pdf" and link.attrib.get("type") == "application/pdf":
-                        pdf_url = href
-                    elif link.attrib.get("title") == "doi" or "doi.org" in href:
-                        doi = href
-                    if link.attrib.get("rel") == "alternate" and link.attrib.get("type") == "text/html":
-                        link_article = href
-                # Extraer enlaces de GitHub directamente de los links atom
-                github_links = []
-                github_link = ""
-                if not github_links and summary:
-                    from .agent_link_extractor import extract_github_links
-                    github_links = extract_github_links(summary)
-                github_link = github_links[0] if github_links else ""
-                # Verificar estado del enlace de GitHub
-                github_status = "No link"
-                if github_link:
-                    try:
-                        github_link = github_link.rstrip(".,;:!?\"')")
-                        import requests
-                        r = requests.head(github_link, timeout=5, allow_redirects=True)
-                        github_status = "OK" if r.status_code == 200 else "Broken"
-                    except Exception as e:
-                        logging.warning(f"Error verificando enlace GitHub {github_link}: {e}")
-                        github_status = "Error"
-                
-                # Fecha de publicación
-                published = entry.find("atom:published", ns).text.strip() if entry.find("atom:published", ns) is not None else ""
-                
-                # Crear diccionario del artículo
-                article = {
-                    "title": title,
-                    "authors": authors,
-                    "summary": summary,
-                    "pdf_url": pdf_url,
-                    "doi": doi,
-                    "github_links": github_links,
-                    "github_link": github_link,
-                    "github_status": github_status,
-                    "url": link_article,  # <-- asegúrate de incluir el link al portal
-                    "published": published,  # <-- añade la fecha de publicación
-                }
+        for entry in entries:
+            article = self._entry_to_article(entry)
+            if article is not None:
                 articles.append(article)
-            except Exception as e:
-                logging.error(f"Error procesando entrada de arXiv: {e}", exc_info=True)
-                continue
         return articles
+
+    def _entry_to_article(self, entry: ET.Element) -> Optional[Dict]:
+        """
+        Convierte un elemento <entry> en el diccionario del artículo (una sola búsqueda por campo).
+        """
+        try:
+            # Título
+            title = _child_text(entry, "title") or "Sin título"
+
+            # Autores
+            authors = []
+            for author in entry.iterfind(_ATOM + "author"):
+                name = _child_text(author, "name")
+                if name:
+                    authors.append(name)
+            authors = ", ".join(authors) if authors else "Autor desconocido"
+
+            # Resumen
+            summary = _child_text(entry, "summary")
+
+            # Enlaces (PDF, DOI, etc.)
+            pdf_url = ""
+            doi = ""
+            link_article = ""
+            for link in entry.iterfind(_ATOM + "link"):
+                attrib = link.attrib
+                href = attrib.get("href", "")
+                if attrib.get("title") == "pdf" and attrib.get("type") == "application/pdf":
+                    pdf_url = href
+                elif attrib.get("title") == "doi" or "doi.org" in href:
+                    doi = href
+                if attrib.get("rel") == "alternate" and attrib.get("type") == "text/html":
+                    link_article = href
+            # Extraer enlaces de GitHub del resumen
+            github_links = extract_github_links(summary) if summary else []
+            github_link = clean_github_link(github_links[0]) if github_links else ""
+            # Si el estado está en la caché en memoria se usa (esto corre en el event loop: sin leer
+            # el disco); si no, se verifica después, en lote (ver GitHubLinkVerifier)
+            github_status = STATUS_NO_LINK
+            if github_link:
+                github_status = get_link_cache().get_memory(github_link) or STATUS_PENDING
+
+            # Fecha de publicación
+            published = _child_text(entry, "published")
+
+            # Crear diccionario del artículo
+            return {
+                "title": title,
+                "authors": authors,
+                "summary": summary,
+                "pdf_url": pdf_url,
+                "doi": doi,
+                "github_links": github_links,
+                "github_link": github_link,
+                "github_status": github_status,
+                "url": link_article,  # <-- asegúrate de incluir el link al portal
+                "published": published,  # <-- añade la fecha de publicación
+            }
+        except Exception as e:
+            logging.error(f"Error procesando entrada de arXiv: {e}", exc_info=True)
+            return None
+
+
+def _child_text(element: ET.Element, tag: str) -> str:
+    """Texto (sin espacios extremos) del primer hijo Atom `tag`, o cadena vacía."""
+    child = element.find(_ATOM + tag)
+    if child is None or child.text is None:
+        return ""
+    return child.text.strip()
+
+
+class AtomEntryStream:
+    """
+    Incremental Atom parser: se alimenta con bloques de bytes y devuelve los
+    elementos <entry> completos, liberando lo ya procesado para mantener la memoria constante.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self.total_results: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[ET.Element]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[ET.Element]:
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[ET.Element]:
+        entries = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+            elif element.tag == _ATOM_ENTRY:
+                entries.append(element)
+                # Desenganchar la entrada del árbol: quien la consume conserva la referencia
+                if self._root is not None:
+                    self._root.remove(element)
+            elif element.tag == _OPENSEARCH_TOTAL and element.text:
+                try:
+                    self.total_results = int(element.text.strip())
+                except ValueError:
+                    pass
+        return entries
+
+
+class _Throttle:
+    """Garantiza un intervalo mínimo entre peticiones consecutivas."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next_allowed = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if now < self._next_allowed:
+                await asyncio.sleep(self._next_allowed - now)
+            self._next_allowed = max(now, self._next_allowed) + self.delay
+
+
+class HarvestCheckpoint:
+    """
+    Guarda en disco el siguiente offset de una cosecha para poder reanudarla.
+    El fichero se identifica por un hash de los parámetros de la consulta.
+    """
+
+    def __init__(self, path: str, params: Dict):
+        self.path = path
+        self.params = params
+        self.total_results: Optional[int] = None
+
+    @classmethod
+    def for_query(cls, directory: str = ARXIV_HARVEST_CHECKPOINT_DIR, **params) -> "HarvestCheckpoint":
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        return cls(os.path.join(directory, f"arxiv_{digest}.json"), params)
+
+    def load(self, default: int) -> int:
+        """Devuelve el offset guardado para estos parámetros, o `default`."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return default
+        if data.get("params") != self.params:
+            return default
+        self.total_results = data.get("total_results")
+        print(f"[ArxivAgent] Reanudando cosecha desde start={data.get('next_start', default)}")
+        return int(data.get("next_start", default))
+
+    def save(self, next_start: int, total_results: Optional[int] = None) -> None:
+        """Escritura atómica (fichero temporal + rename)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "params": self.params,
+                "next_start": next_start,
+                "total_results": total_results,
+                "updated": time.time(),
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+# Cosecha masiva desde la línea de comandos:
+#   python -m src.scraping.agent_arxiv "retrieval augmented generation" --max-total 20000 --output rag.jsonl
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cosecha paginada de resultados de arXiv (reanudable).")
+    parser.add_argument("query", type=str, help="Consulta para arXiv")
+    parser.add_argument("--type_query", type=str, default="all")
+    parser.add_argument("--sortby", type=str, default="submittedDate")
+    parser.add_argument("--sortorder", type=str, default="descending")
+    parser.add_argument("--max-total", type=int, default=None, help="Número máximo de registros (por defecto, todos)")
+    parser.add_argument("--page-size", type=int, default=ARXIV_PAGE_SIZE)
+    parser.add_argument("--no-resume", action="store_true", help="Ignorar el checkpoint guardado")
+    parser.add_argument("--output", type=str, required=True, help="Fichero JSONL de salida (se añade al final)")
+    args = parser.parse_args()
+
+    async def _main():
+        agent = ArxivAgent()
+        count = 0
+        try:
+            with open(args.output, "a", encoding="utf-8") as out:
+                async for article in agent.harvest(
+                    args.query,
+                    max_total=args.max_total,
+                    type_query=args.type_query,
+                    sortby=args.sortby,
+                    sortorder=args.sortorder,
+                    page_size=args.page_size,
+                    resume=not args.no_resume,
+                ):
+                    out.write(json.dumps(article, ensure_ascii=False) + "\n")
+                    # Al fichero antes de pedir el siguiente registro: tras el último de cada página se guarda el checkpoint
+                    out.flush()
+                    count += 1
+        finally:
+            await close_session()
+        print(f"[ArxivAgent] {count} registros escritos en {args.output}")
+
+    asyncio.run(_main())
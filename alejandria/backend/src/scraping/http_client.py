@@ -0,0 +1,75 @@
+"""
+Shared asyncio HTTP client with a keep-alive connection pool
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import logging
+
+import aiohttp
+
+from ..config import (
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_HOST_LIMITS,
+    TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Una sesión por event loop: aiohttp no permite compartir conectores entre loops
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_semaphores: Dict[Tuple[int, str], asyncio.Semaphore] = {}
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Devuelve la sesión compartida del event loop actual, creándola si es necesario.
+    Debe llamarse desde una corrutina.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+        )
+        _session_loop = loop
+        logger.info("[http_client] Nueva sesión HTTP compartida creada")
+    return _session
+
+
+@asynccontextmanager
+async def host_limit(url: str):
+    """
+    Limita el número de peticiones simultáneas hacia el host de `url`.
+    Los límites por host se configuran en HTTP_HOST_LIMITS.
+    """
+    host = urlsplit(url).hostname or ""
+    key = (id(asyncio.get_running_loop()), host)
+    semaphore = _host_semaphores.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(HTTP_HOST_LIMITS.get(host, HTTP_POOL_LIMIT_PER_HOST))
+        _host_semaphores[key] = semaphore
+    async with semaphore:
+        yield
+
+
+async def close_session() -> None:
+    """Cierra la sesión compartida (llamar al apagar la aplicación)."""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("[http_client] Sesión HTTP compartida cerrada")
+    _session = None
+    _session_loop = None
+    _host_semaphores.clear()
@@ -0,0 +1,240 @@
+"""
+Identidad canónica de un paper (ID de arXiv con versión, DOI o URL normalizada).
+
+El mismo paper llega con formas muy distintas: http://arxiv.org/abs/2401.01234v2,
+https://arxiv.org/pdf/2401.01234v2.pdf, arXiv:2401.01234, 10.48550/arXiv.2401.01234 o
+esquemas antiguos como hep-th/9901001v1. `paper_identity` los reduce todos a una misma
+clave (`arxiv:2401.01234`), de modo que deduplicar o cruzar resultados es una consulta a
+un diccionario en lugar de comparar URLs.
+
+`PaperIndex` es un índice en memoria clave -> registro; cada registro se indexa también
+por sus claves alternativas (DOI, URLs), así que se encuentra por cualquiera de ellas.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+import re
+import threading
+
+from ..config import PAPER_INDEX_MAX_ENTRIES
+
+# Esquema nuevo (desde 2007): YYMM.NNNN, y YYMM.NNNNN desde 2015
+_ARXIV_NEW = r"\d{4}\.\d{4,5}"
+# Esquema antiguo: archivo(.SUBCLASE)/YYMMNNN, p. ej. hep-th/9901001 o math.GT/0309136
+_ARXIV_OLD = r"[a-z\-]+(?:\.[A-Z]{2})?/\d{7}"
+_ARXIV_ID_RE = re.compile(rf"^(?:arxiv:)?({_ARXIV_NEW}|{_ARXIV_OLD})(?:v(\d+))?$", re.IGNORECASE)
+_ARXIV_PATH_RE = re.compile(rf"/(?:abs|pdf)/({_ARXIV_NEW}|{_ARXIV_OLD})(?:v(\d+))?(?:\.pdf)?/?$")
+# Los DOI que asigna arXiv (10.48550/arXiv.<id>) son el mismo paper que su ID
+_ARXIV_DOI_RE = re.compile(rf"^10\.48550/arxiv\.({_ARXIV_NEW}|{_ARXIV_OLD})(?:v(\d+))?$", re.IGNORECASE)
+_DOI_RE = re.compile(r"\b(10\.\d{4,9}/\S+)", re.IGNORECASE)
+
+ARXIV = "arxiv"
+DOI = "doi"
+URL = "url"
+
+
+@dataclass(frozen=True)
+class PaperIdentity:
+    scheme: str  # "arxiv", "doi" o "url"
+    value: str
+    version: Optional[int] = None  # solo arXiv
+
+    @property
+    def key(self) -> str:
+        """Clave sin versión: todas las versiones de un paper comparten clave."""
+        return f"{self.scheme}:{self.value}"
+
+    @property
+    def versioned_key(self) -> str:
+        return f"{self.key}v{self.version}" if self.version else self.key
+
+
+def parse_arxiv_id(text: str) -> Optional[PaperIdentity]:
+    """ID de arXiv de un identificador suelto, una URL de arxiv.org o un DOI de arXiv."""
+    if not text:
+        return None
+    text = str(text).strip()
+    match = _ARXIV_ID_RE.match(text) or _ARXIV_DOI_RE.match(_strip_doi_prefix(text))
+    if match is None and "://" in text:
+        parts = urlsplit(text)
+        if (parts.hostname or "").lower().endswith("arxiv.org"):
+            match = _ARXIV_PATH_RE.search(parts.path)
+    if match is None:
+        return None
+    arxiv_id, version = match.group(1), match.group(2)
+    # En el esquema antiguo el archivo va en minúsculas y la subclase en mayúsculas
+    if "/" not in arxiv_id:
+        arxiv_id = arxiv_id.lower()
+    return PaperIdentity(ARXIV, arxiv_id, int(version) if version else None)
+
+
+def parse_doi(text: str) -> Optional[PaperIdentity]:
+    """DOI (en minúsculas, sin el prefijo doi.org) de un texto o URL."""
+    if not text:
+        return None
+    match = _DOI_RE.search(_strip_doi_prefix(str(text).strip()))
+    if match is None:
+        return None
+    return parse_arxiv_id(match.group(1)) or PaperIdentity(DOI, match.group(1).rstrip(".,;").lower())
+
+
+def normalize_url(url: str) -> Optional[PaperIdentity]:
+    """URL sin esquema, `www.`, fragmento ni barra final; host en minúsculas."""
+    if not url or "://" not in str(url):
+        return None
+    parts = urlsplit(str(url).strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if not host:
+        return None
+    path = parts.path.rstrip("/")
+    return PaperIdentity(URL, f"{host}{path}" + (f"?{parts.query}" if parts.query else ""))
+
+
+def _strip_doi_prefix(text: str) -> str:
+    lowered = text.lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:"):
+        if lowered.startswith(prefix):
+            return text[len(prefix):]
+    return text
+
+
+_URL_FIELDS = ("url", "link_article", "pdf_url", "link")
+
+
+def identities(record: Mapping[str, Any]) -> List[PaperIdentity]:
+    """
+    Todas las identidades de un registro, de la más a la menos fiable: ID de arXiv,
+    DOI y URLs. La primera es la canónica (ver `paper_identity`).
+    """
+    found: List[PaperIdentity] = []
+    arxiv = None
+    for field in ("id", "arxiv_id", "doi") + _URL_FIELDS:
+        arxiv = parse_arxiv_id(record.get(field) or "")
+        if arxiv is not None:
+            found.append(arxiv)
+            break
+    doi = parse_doi(record.get("doi") or "")
+    if doi is not None and doi.scheme == DOI:
+        found.append(doi)
+    for field in _URL_FIELDS:
+        url = normalize_url(record.get(field) or "")
+        # Las URLs de arxiv.org ya están cubiertas por el ID
+        if url is not None and not (arxiv is not None and url.value.startswith("arxiv.org/")):
+            found.append(url)
+    return list(dict.fromkeys(found))
+
+
+def paper_identity(record: Mapping[str, Any]) -> Optional[PaperIdentity]:
+    """Identidad canónica del registro, o None si no tiene ningún identificador."""
+    found = identities(record)
+    return found[0] if found else None
+
+
+def paper_key(record: Mapping[str, Any]) -> str:
+    """Clave canónica sin versión (`arxiv:2401.01234`, `doi:10.1000/x`, `url:host/path`) o ""."""
+    identity = paper_identity(record)
+    return identity.key if identity is not None else ""
+
+
+class PaperIndex:
+    """
+    Índice en memoria de registros por identidad. Un registro se localiza por cualquiera
+    de sus claves (sin versión); si llega otra versión del mismo paper, se conserva la
+    más reciente. Con `max_entries`, se expulsa el registro usado hace más tiempo.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # clave canónica -> registro
+        self._aliases: Dict[str, str] = {}  # cualquier clave -> clave canónica
+        self._alias_keys: Dict[str, List[str]] = {}  # clave canónica -> sus claves (para expulsar)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, record_or_key: Any) -> bool:
+        return self.get(record_or_key) is not None
+
+    def _canonical(self, keys: Iterable[str]) -> Optional[str]:
+        for key in keys:
+            canonical = self._aliases.get(key)
+            if canonical is not None:
+                return canonical
+        return None
+
+    @staticmethod
+    def _keys(record_or_key: Any) -> List[str]:
+        if isinstance(record_or_key, Mapping):
+            return [identity.key for identity in identities(record_or_key)]
+        identity = parse_arxiv_id(record_or_key) or parse_doi(record_or_key) or normalize_url(record_or_key)
+        # También se aceptan claves ya canónicas (p. ej. "url:host/path")
+        return [identity.key] if identity is not None else [str(record_or_key)]
+
+    def get(self, record_or_key: Any) -> Optional[Dict[str, Any]]:
+        """Registro indexado con la misma identidad que un registro, clave, ID o URL."""
+        with self._lock:
+            canonical = self._canonical(self._keys(record_or_key))
+            if canonical is None:
+                return None
+            self._records.move_to_end(canonical)
+            return self._records[canonical]
+
+    def add(self, record: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Indexa el registro. Devuelve (registro indexado, nuevo): si ya había uno con la
+        misma identidad, devuelve ese (o el nuevo, si es una versión más reciente) y False.
+        """
+        found = identities(record)
+        if not found:
+            return record, True
+        keys = [identity.key for identity in found]
+        with self._lock:
+            canonical = self._canonical(keys)
+            is_new = canonical is None
+            if is_new:
+                canonical = keys[0]
+                self._records[canonical] = record
+            else:
+                if (record_version(record) or 0) > (record_version(self._records[canonical]) or 0):
+                    self._records[canonical] = record
+            for key in keys:
+                if key not in self._aliases:
+                    self._aliases[key] = canonical
+                    self._alias_keys.setdefault(canonical, []).append(key)
+            self._records.move_to_end(canonical)
+            if self.max_entries is not None:
+                while len(self._records) > self.max_entries:
+                    evicted, _ = self._records.popitem(last=False)
+                    for key in self._alias_keys.pop(evicted, []):
+                        self._aliases.pop(key, None)
+            return self._records[canonical], is_new
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Indexa los registros y devuelve solo los que eran nuevos, en su orden."""
+        return [record for record in records if self.add(record)[1]]
+
+
+def record_version(record: Mapping[str, Any]) -> Optional[int]:
+    """Versión de arXiv del registro: la de su identificador o la del campo `version` ("v2" o 2)."""
+    identity = paper_identity(record)
+    if identity is not None and identity.version:
+        return identity.version
+    version = str(record.get("version") or "").lower().lstrip("v")
+    return int(version) if version.isdigit() else None
+
+
+_index: Optional[PaperIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_paper_index() -> PaperIndex:
+    """Índice compartido por todo el proceso (se crea en el primer uso)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PaperIndex(max_entries=PAPER_INDEX_MAX_ENTRIES)
+        return _index
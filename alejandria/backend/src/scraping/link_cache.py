@@ -0,0 +1,243 @@
+"""
+Persistent TTL cache for GitHub link status checks
+
+El pipeline de Streamlit tiene su propia versión (src/scraping/link_cache.py) y comparte
+con esta la base de datos en disco.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from ..config import (
+    LINK_CACHE_PATH,
+    LINK_CACHE_MAX_ENTRIES,
+    LINK_CACHE_TTL_OK,
+    LINK_CACHE_TTL_BROKEN,
+    LINK_CACHE_TTL_ERROR,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_repo_url(link: str) -> str:
+    """
+    Normaliza un enlace de GitHub a https://github.com/<owner>/<repo> en minúsculas,
+    descartando subrutas (/tree/..., /blob/...), sufijo .git, query y fragmento.
+    Es la clave de la caché y también la URL que se comprueba: el estado es el del
+    repositorio, no el de una subruta concreta.
+    """
+    parts = urlsplit(link.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    segments = [seg for seg in parts.path.split("/") if seg]
+    if host != "github.com" or len(segments) < 2:
+        return link.strip().rstrip("/").lower()
+    owner, repo = segments[0], segments[1]
+    if repo.endswith(".git"):
+        repo = repo[:-4]
+    return f"https://github.com/{owner}/{repo}".lower()
+
+
+class LinkStatusCache:
+    """
+    Caché de dos niveles para el estado de enlaces de GitHub: una LRU en memoria
+    delante de una tabla SQLite en disco. Cada estado tiene su propio TTL, de modo
+    que los resultados negativos ("Broken", "Error") también se cachean pero expiran antes.
+
+    Desde el event loop solo se usa la memoria (`get_memory`, `set`); el disco se lee y se
+    escribe por lotes en un thread (`get_many_async`, `flush_async`). `set` deja la entrada
+    pendiente de guardar hasta el siguiente `flush`.
+    """
+
+    def __init__(
+        self,
+        path: str = LINK_CACHE_PATH,
+        max_entries: int = LINK_CACHE_MAX_ENTRIES,
+        ttls: Optional[Dict[str, float]] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = ttls or {
+            "OK": LINK_CACHE_TTL_OK,
+            "Broken": LINK_CACHE_TTL_BROKEN,
+            "Error": LINK_CACHE_TTL_ERROR,
+        }
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._dirty: Dict[str, Tuple[str, float]] = {}  # entradas pendientes de guardar en disco
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Abre (o crea) la base de datos; si falla, la caché funciona solo en memoria."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS link_status ("
+                "url TEXT PRIMARY KEY, status TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.commit()
+            return conn
+        except Exception as e:
+            logger.warning(f"No se pudo abrir la caché de enlaces en {self.path}: {e}")
+            return None
+
+    def get(self, link: str) -> Optional[str]:
+        """Devuelve el estado cacheado y vigente del enlace, o None (lee el disco: no usar en el event loop)."""
+        return self.get_many([link]).get(link)
+
+    def get_memory(self, link: str) -> Optional[str]:
+        """Como `get`, pero solo con la LRU en memoria: no bloquea el event loop."""
+        with self._lock:
+            return self._lookup_memory(normalize_repo_url(link), time.time())
+
+    def get_many(self, links: Iterable[str]) -> Dict[str, str]:
+        """{enlace: estado} de los enlaces con estado vigente; los que no están en memoria, en una sola consulta."""
+        keys = {link: normalize_repo_url(link) for link in links}
+        now = time.time()
+        found: Dict[str, str] = {}
+        with self._lock:
+            missing = {}
+            for link, key in keys.items():
+                status = self._lookup_memory(key, now)
+                if status is not None:
+                    found[link] = status
+                else:
+                    missing.setdefault(key, []).append(link)
+            if not missing or self._conn is None:
+                return found
+            try:
+                batch = list(missing)
+                rows = []
+                for i in range(0, len(batch), 500):
+                    part = batch[i:i + 500]
+                    rows += self._conn.execute(
+                        f"SELECT url, status, expires_at FROM link_status WHERE url IN ({','.join('?' * len(part))})", part
+                    ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Error leyendo la caché de enlaces: {e}")
+                return found
+            for key, status, expires_at in rows:
+                if expires_at <= now:
+                    continue
+                self._remember(key, status, expires_at)
+                for link in missing[key]:
+                    found[link] = status
+        return found
+
+    async def get_many_async(self, links: Iterable[str]) -> Dict[str, str]:
+        """`get_many` sin bloquear el event loop: si todo está en memoria no sale del loop; si no, lee el disco en un thread."""
+        links = list(links)
+        with self._lock:
+            now = time.time()
+            found = {}
+            for link in links:
+                status = self._lookup_memory(normalize_repo_url(link), now)
+                if status is not None:
+                    found[link] = status
+        if len(found) == len(links):
+            return found
+        return await asyncio.to_thread(self.get_many, links)
+
+    def set(self, link: str, status: str) -> None:
+        """Guarda en memoria el estado del enlace con el TTL de ese estado; llega al disco en el siguiente `flush`."""
+        ttl = self.ttls.get(status)
+        if not ttl:
+            return
+        key = normalize_repo_url(link)
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, status, expires_at)
+            if self._conn is not None:
+                self._dirty[key] = (status, expires_at)
+
+    def flush(self) -> None:
+        """Escribe en disco, en una sola transacción, las entradas pendientes."""
+        with self._lock:
+            if not self._dirty or self._conn is None:
+                return
+            rows = [(key, status, expires_at) for key, (status, expires_at) in self._dirty.items()]
+            self._dirty.clear()
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO link_status (url, status, expires_at) VALUES (?, ?, ?)", rows
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Error escribiendo en la caché de enlaces: {e}")
+
+    async def flush_async(self) -> None:
+        """`flush` en un thread."""
+        if self._dirty:
+            await asyncio.to_thread(self.flush)
+
+    def purge_expired(self) -> int:
+        """Elimina del disco las entradas expiradas. Devuelve cuántas se borraron."""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM link_status WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def _lookup_memory(self, key: str, now: float) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        status, expires_at = entry
+        if expires_at > now:
+            self._memory.move_to_end(key)
+            return status
+        del self._memory[key]
+        return None
+
+    def _remember(self, key: str, status: str, expires_at: float) -> None:
+        self._memory[key] = (status, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+_cache: Optional[LinkStatusCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_link_cache() -> LinkStatusCache:
+    """Devuelve la instancia compartida de la caché de enlaces."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LinkStatusCache()
+        return _cache
+
+
+def check_github_link(link: str, timeout: int = 5) -> str:
+    """
+    Versión síncrona (requests) de la verificación: devuelve el estado ("OK", "Broken"
+    o "Error") del repositorio del enlace, consultando primero la caché compartida y
+    haciendo la petición HEAD solo si no hay un estado vigente. El estado nuevo queda
+    pendiente de guardar: quien verifica un lote llama después a `flush`.
+    """
+    cache = get_link_cache()
+    status = cache.get(link)
+    if status is not None:
+        return status
+    try:
+        r = requests.head(normalize_repo_url(link), timeout=timeout, allow_redirects=True)
+        status = "OK" if r.status_code == 200 else "Broken"
+    except Exception as e:
+        logger.warning(f"Error verificando enlace GitHub {link}: {e}")
+        status = "Error"
+    cache.set(link, status)
+    return status
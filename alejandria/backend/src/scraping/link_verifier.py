@@ -0,0 +1,117 @@
+"""
+Concurrent verification of GitHub links found in search results
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+import logging
+
+import aiohttp
+
+from .http_client import get_session, host_limit
+from .link_cache import LinkStatusCache, get_link_cache, normalize_repo_url
+from ..config import GITHUB_VERIFY_CONCURRENCY, GITHUB_VERIFY_DEADLINE
+
+logger = logging.getLogger(__name__)
+
+# Estados posibles de un enlace de GitHub
+STATUS_NO_LINK = "No link"
+STATUS_PENDING = "pending"
+STATUS_OK = "OK"
+STATUS_BROKEN = "Broken"
+STATUS_ERROR = "Error"
+
+ResultCallback = Callable[[str, str], Awaitable[None]]
+
+
+def clean_github_link(link: str) -> str:
+    """Elimina la puntuación final que suele arrastrar la extracción por regex."""
+    return link.rstrip(".,;:!?\"')")
+
+
+class GitHubLinkVerifier:
+    """
+    Verifica lotes de enlaces de GitHub en paralelo con un límite de concurrencia
+    y un plazo máximo por enlace, reutilizando la sesión HTTP compartida.
+    """
+
+    def __init__(self, max_concurrency: int = GITHUB_VERIFY_CONCURRENCY, deadline: float = GITHUB_VERIFY_DEADLINE, cache: Optional[LinkStatusCache] = None):
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.cache = cache or get_link_cache()
+
+    async def verify(self, link: str) -> str:
+        """Devuelve el estado ("OK", "Broken" o "Error") de un único enlace, usando la caché."""
+        statuses = await self.verify_many([link])
+        return statuses.get(link, STATUS_ERROR)
+
+    async def _check(self, link: str) -> str:
+        """
+        Hace la petición HEAD al repositorio del enlace (la misma URL que usa de clave la
+        caché): una subruta rota no debe marcar como roto todo el repositorio.
+        """
+        repo_url = normalize_repo_url(link)
+        try:
+            session = get_session()
+            async with host_limit(repo_url):
+                async with session.head(
+                    repo_url,
+                    allow_redirects=True,
+                    timeout=aiohttp.ClientTimeout(total=self.deadline)
+                ) as response:
+                    return STATUS_OK if response.status == 200 else STATUS_BROKEN
+        except Exception as e:
+            logger.warning(f"Error verificando enlace GitHub {link}: {e}")
+            return STATUS_ERROR
+
+    async def verify_many(self, links: Iterable[str], on_result: Optional[ResultCallback] = None) -> Dict[str, str]:
+        """
+        Verifica todos los enlaces (sin duplicados) de forma concurrente.
+        Si se indica `on_result`, se invoca con (link, status) a medida que termina cada verificación.
+        La caché se lee de una vez antes de empezar y los estados nuevos se guardan de una vez al
+        terminar, ambas cosas en un thread.
+        """
+        unique_links = list(dict.fromkeys(link for link in links if link))
+        if not unique_links:
+            return {}
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def check(link: str):
+            async with semaphore:
+                try:
+                    status = await asyncio.wait_for(self._check(link), timeout=self.deadline)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Tiempo agotado verificando enlace GitHub {link}")
+                    status = STATUS_ERROR
+            self.cache.set(link, status)
+            return link, status
+
+        async def cached(link: str, status: str):
+            return link, status
+
+        statuses: Dict[str, str] = {}
+        known = await self.cache.get_many_async(unique_links)
+        checks = [cached(link, known[link]) if link in known else check(link) for link in unique_links]
+        try:
+            for finished in asyncio.as_completed(checks):
+                link, status = await finished
+                statuses[link] = status
+                if on_result is not None:
+                    try:
+                        await on_result(link, status)
+                    except Exception as e:
+                        logger.error(f"Error notificando estado del enlace {link}: {e}")
+        finally:
+            await self.cache.flush_async()
+        return statuses
+
+    async def verify_articles(self, articles: List[Dict], on_result: Optional[ResultCallback] = None) -> List[Dict]:
+        """
+        Actualiza en sitio `github_status` de los artículos con enlace pendiente.
+        """
+        pending = [a for a in articles if a.get("github_link") and a.get("github_status") == STATUS_PENDING]
+        statuses = await self.verify_many((a["github_link"] for a in pending), on_result=on_result)
+        for article in pending:
+            article["github_status"] = statuses.get(article["github_link"], STATUS_ERROR)
+        return articles
@@ -1,93 +1,169 @@
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Awaitable, Callable, Optional, Set, Tuple
 import time
 import asyncio
 from datetime import datetime
 import logging
 
-# Importar agentes
-from .agent_arxiv import ArxivAgent
-from .agent_tds import TdsAgent
-from .agent_link_extractor import extract_github_links  # <-- Agrega este import
+from .identity import get_paper_index
+from .link_verifier import GitHubLinkVerifier, STATUS_PENDING
+from .ranking import rerank
+from .sources import PaperRecord, create_adapters, registered_sources
+from ..config import SEARCH_SOURCE_TIMEOUT, SEARCH_SOURCE_TIMEOUTS
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Paso opcional sobre los resultados ya puntuados (p. ej. re-ranking semántico y colapso de
+# duplicados); recibe {fuente: resultados}, los modifica en sitio y los devuelve
+ResultsHook = Callable[[Dict[str, List[Dict[str, Any]]]], Awaitable[Dict[str, List[Dict[str, Any]]]]]
+
 class SourceProcessor:
     def __init__(self):
-        """Inicializa el procesador de fuentes solo con Arxiv."""
+        """Inicializa el procesador con los adaptadores de fuente registrados (ver sources.py)."""
         logger.info("="*80)
-        logger.info("INICIALIZANDO PROCESADOR DE FUENTES (SOLO ARXIV)")
+        logger.info("INICIALIZANDO PROCESADOR DE FUENTES")
         logger.info("="*80)
         
-        # Inicializar solo el agente de Arxiv
-        logger.info("\nInicializando agente de Arxiv...")
-        self.arxiv_agent = ArxivAgent()
-        
-        # Configurar solo Arxiv como fuente disponible
-        self.sources = {'arxiv': self._process_arxiv}
+        # Una fuente cuyo agente no se puede crear queda deshabilitada
+        self.sources = create_adapters()
+
+        # Papers vistos en las búsquedas, por identidad (ver identity.py)
+        self.paper_index = get_paper_index()
+
+        # Verificación de enlaces de GitHub en segundo plano
+        self.link_verifier = GitHubLinkVerifier()
+        self._background_tasks = set()
         
-        logger.info("\nFuente configurada: ['arxiv']")
+        logger.info(f"\nFuentes configuradas: {list(self.sources)}")
         logger.info("="*80 + "\n")
 
-    def _format_date(self, date_str: str) -> Optional[str]:
-        """Formatea una fecha a un formato legible."""
-        if not date_str:
-            return None
-            
-        try:
-            # Para fechas de arXiv
-            if 'T' in date_str and 'Z' in date_str:
-                dt = datetime.strptime(date_str, '%Y-%m-%dT%H:%M:%SZ')
-                return dt.strftime('%Y-%m-%d')
-            # Para fechas de TDS
-            elif 'T' in date_str and '+' in date_str:
-                dt = datetime.strptime(date_str.split('+')[0], '%Y-%m-%dT%H:%M:%S')
-                return dt.strftime('%Y-%m-%d')
-            return date_str
-        except Exception as e:
-            print(f"[SourceProcessor] Error formateando fecha {date_str}: {e}")
-            return date_str
-            
-    def _format_authors(self, authors: List[Dict[str, str]]) -> str:
-        """Formatea la lista de autores a un string."""
-        if not authors:
-            return ""
-        return ", ".join([a.get("name", "") for a in authors if a.get("name")])
 
     async def process_sources(
         self, 
         query: str, 
         sources: List[str],
         websocket = None,
-        timeout: int = 30,
+        timeout: Optional[float] = None,
         max_results: int = 10,
         sortby: str = "relevance",
         type_query: str = "all",
         start: int = 0,
-        sortorder: str = "descending"
+        sortorder: str = "descending",
+        postprocess: Optional[ResultsHook] = None,
+        incomplete: Optional[Set[str]] = None
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
-        Procesa la consulta en Arxiv y envía los resultados a través del websocket.
+        Procesa la consulta en todas las fuentes pedidas a la vez y envía los resultados
+        de cada una por el websocket en cuanto esa fuente termina.
         
         Args:
             query: Término de búsqueda
-            sources: No utilizado, se mantiene por compatibilidad
+            sources: Fuentes a consultar (p. ej. ['arxiv', 'tds'])
             websocket: Objeto WebSocket para enviar actualizaciones
-            timeout: Tiempo máximo para la búsqueda en segundos
-            max_results: Número máximo de resultados a retornar
+            timeout: Plazo en segundos para cada fuente; por defecto SEARCH_SOURCE_TIMEOUTS
+            max_results: Número máximo de resultados a retornar por fuente
             sortby: Criterio de ordenamiento de los resultados
             type_query: Tipo de consulta (todas, solo arxiv, solo tds)
+            postprocess: Paso aplicado tras el re-ranking BM25, por fuente antes de enviar
+                sus resultados y sobre el lote completo antes de reenviarlos (p. ej. sin los
+                duplicados entre fuentes) y del resumen final
+            incomplete: Si se indica, se le añaden las fuentes que agotaron su plazo o
+                fallaron (sus resultados pueden ser parciales)
             
         Returns:
-            Diccionario con los resultados de Arxiv
+            Diccionario fuente -> resultados, en el orden de `sources`
         """
         start_time = time.time()
-        results = {}
-        source = 'arxiv'  # Siempre usamos Arxiv
+        # Quitar duplicados conservando el orden pedido
+        sources = list(dict.fromkeys(s.strip().lower() for s in (sources or ['arxiv']) if s and s.strip()))
+        results: Dict[str, List[Dict[str, Any]]] = {}
         
-        logger.info(f"Iniciando búsqueda en Arxiv")
+        logger.info(f"Iniciando búsqueda en {sources}")
+
+        # Cada fuente es una tarea con su propio plazo: una fuente lenta no retrasa a las demás
+        tasks = [
+            asyncio.create_task(
+                self._run_source(
+                    source,
+                    query,
+                    websocket,
+                    postprocess=postprocess,
+                    timeout=timeout if timeout is not None else SEARCH_SOURCE_TIMEOUTS.get(source, SEARCH_SOURCE_TIMEOUT),
+                    max_results=max_results,
+                    sortby=sortby,
+                    type_query=type_query,
+                    start=start,
+                    sortorder=sortorder
+                ),
+                name=f"{source}_task"
+            )
+            for source in sources
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                source, source_results, complete = await next_done
+                results[source] = source_results
+                if not complete and incomplete is not None:
+                    incomplete.add(source)
+        finally:
+            # Si se cancela la búsqueda, cancelar también las fuentes que sigan en curso
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        for source_results in results.values():
+            self.paper_index.add_many(source_results)
+
+        # Con varias fuentes, puntuar todo el lote junto para que `relevance` sea comparable entre ellas
+        # (y repetir el postprocesado sobre el lote: duplicados entre fuentes distintas). Cada fuente ya
+        # envió sus resultados con su propia puntuación: se reenvían con la del lote, que sustituye a la anterior
+        if len(results) > 1:
+            rerank(query, results, reorder=sortby == "relevance")
+            if postprocess is not None:
+                await self._postprocess(postprocess, results)
+            if websocket:
+                await self._send_rescored(results, websocket)
         
+        # Enviar resumen final
+        total_results = sum(len(r) for r in results.values())
+        elapsed_total = time.time() - start_time
+        
+        if websocket:
+            try:
+                await websocket.send_json({
+                    "type": "summary",
+                    "sources_searched": len(sources),
+                    "total_results": total_results,
+                    "time_elapsed": f"{elapsed_total:.2f}s"
+                })
+            except Exception as e:
+                logger.error(f"Error enviando resumen: {str(e)}")
+        
+        logger.info(
+            f"Procesamiento completado en {elapsed_total:.2f}s. "
+            f"Total de resultados: {total_results}"
+        )
+        
+        return {source: results.get(source, []) for source in sources}
+
+    async def _run_source(
+        self,
+        source: str,
+        query: str,
+        websocket = None,
+        timeout: float = SEARCH_SOURCE_TIMEOUT,
+        postprocess: Optional[ResultsHook] = None,
+        **options
+    ) -> Tuple[str, List[Dict[str, Any]], bool]:
+        """
+        Consulta una fuente con su plazo y le envía al websocket sus mensajes `update`
+        (started, partial, results, completed, timeout o error). Nunca lanza excepciones:
+        ante un fallo devuelve los resultados recibidos hasta entonces.
+
+        Returns:
+            (fuente, resultados, completos): completos es False si la fuente agotó su plazo o falló
+        """
         # Función para enviar actualizaciones al websocket
         async def send_update(status: str, data: Any = None, error: str = None, results: List[Dict] = None):
             if not websocket:
@@ -109,588 +185,219 @@ class SourceProcessor:
                 
             try:
                 await websocket.send_json(message)
-                # Asegurarse de que el mensaje se envíe inmediatamente
-                await asyncio.sleep(0.1)
             except Exception as e:
                 logger.error(f"Error enviando actualización al websocket: {str(e)}", exc_info=True)
         
-        # Procesar solo Arxiv
+        # Resultados parciales que se reenvían al websocket a medida que llegan
+        streamed_results: List[Dict[str, Any]] = []
+
+        async def send_partial(record: PaperRecord):
+            # to_dict() se memoriza: el resultado parcial y el final son el mismo diccionario
+            result = record.to_dict()
+            streamed_results.append(result)
+            if not websocket:
+                return
+            try:
+                await websocket.send_json({
+                    "type": "update",
+                    "source": source,
+                    "status": "partial",
+                    "data": {"count": len(streamed_results)},
+                    "results": [result],
+                    "timestamp": datetime.utcnow().isoformat()
+                })
+            except Exception as e:
+                logger.error(f"Error enviando resultado parcial al websocket: {str(e)}")
+
+        adapter = self.sources.get(source)
+        if adapter is None:
+            error_msg = f"Fuente no disponible: {source}"
+            logger.warning(error_msg)
+            await send_update("error", error=error_msg)
+            return source, [], True
+
+        if options.get("start") and not adapter.capabilities.pagination:
+            # La fuente solo tiene primera página: las siguientes repetirían los mismos resultados
+            await send_update("completed", data={"count": 0})
+            return source, [], True
+
         source_start = time.time()
-        source_results = []
-        
+        source_task = None
+        # Con otro criterio de orden (p. ej. fecha) se conserva el orden de la fuente
+        reorder = options.get("sortby", "relevance") == "relevance"
         try:
             # Notificar inicio de procesamiento de la fuente
             await send_update("started")
-            logger.info("Procesando Arxiv...")
-            # LOG: Mostrar lo que se pasa a la función interna
-            logger.info(f"[process_sources] Llamando a _process_arxiv con: query={query}, max_results={max_results}, sortby={sortby}, type_query={type_query}, start={start}, sortorder={sortorder}")
+            logger.info(f"[_run_source] Llamando a {source} con: query={query}, timeout={timeout}, {options}")
             source_task = asyncio.create_task(
-                self._process_arxiv(
-                    query,
-                    max_results=max_results,
-                    sortby=sortby,
-                    type_query=type_query,
-                    start=start,
-                    sortorder=sortorder
-                ),
-                name="arxiv_task"
+                adapter.search(query, on_result=send_partial, **options),
+                name=f"{source}_fetch"
             )
             
             try:
-                # Esperar con timeout
-                source_results = await asyncio.wait_for(
-                    source_task,
-                    timeout=timeout
-                )
-                
-                # Notificar resultados exitosos
-                results['arxiv'] = source_results
-                
-                # Enviar resultados a medida que se obtienen
-                if source_results:
-                    await send_update(
-                        status="results",
-                        data={"count": len(source_results)},
-                        results=source_results  # Enviar todos los resultados
-                    )
-                
-                # Notificar finalización
+                records = await asyncio.wait_for(source_task, timeout=timeout)
+                source_results = [record.to_dict() for record in records]
+            except asyncio.TimeoutError:
+                error_msg = f"Tiempo de espera agotado para {source}"
+                logger.warning(f"{error_msg} ({len(streamed_results)} resultados parciales)")
+                await send_update("timeout", error=error_msg, data={"count": len(streamed_results)})
+                # Conservar lo que ya se recibió antes del timeout
+                rerank(query, {source: streamed_results}, reorder=reorder)
+                if postprocess is not None:
+                    await self._postprocess(postprocess, {source: streamed_results})
+                if websocket:
+                    self._schedule_link_verification(source, streamed_results, websocket)
+                return source, streamed_results, False
+
+            # Puntuación BM25 del lote de la fuente; process_sources la recalcula si hay varias fuentes
+            rerank(query, {source: source_results}, reorder=reorder)
+            if postprocess is not None:
+                await self._postprocess(postprocess, {source: source_results})
+
+            # Sin websocket no hay a quién notificar después: verificar antes de devolver
+            if not websocket:
+                await self.link_verifier.verify_articles(source_results)
+
+            if source_results:
                 await send_update(
-                    status="completed",
-                    data={"count": len(source_results)}
+                    status="results",
+                    data={"count": len(source_results)},
+                    results=source_results
                 )
-                
-                logger.info(f"Arxiv completado: {len(source_results)} resultados")
-                
-            except asyncio.TimeoutError:
-                if not source_task.done():
-                    source_task.cancel()
-                error_msg = "Tiempo de espera agotado para Arxiv"
-                logger.warning(error_msg)
-                await send_update("timeout", error=error_msg)
-                results['arxiv'] = []
+            
+            # Notificar finalización
+            await send_update(
+                status="completed",
+                data={"count": len(source_results)}
+            )
+
+            # Verificar enlaces de GitHub sin retrasar la entrega de resultados
+            if websocket:
+                self._schedule_link_verification(source, source_results, websocket)
+            
+            logger.info(f"{source} completado: {len(source_results)} resultados")
+            return source, source_results, True
                 
         except Exception as e:
-            error_msg = f"Error procesando Arxiv: {str(e)}"
+            error_msg = f"Error procesando {source}: {str(e)}"
             logger.error(error_msg, exc_info=True)
             await send_update("error", error=error_msg)
-            results['arxiv'] = []
+            return source, streamed_results, False
             
         finally:
             # Asegurarse de que la tarea se cancele si aún está en ejecución
-            if 'source_task' in locals() and not source_task.done():
+            if source_task is not None and not source_task.done():
                 source_task.cancel()
             
             elapsed = time.time() - source_start
-            logger.info(f"Tiempo en Arxiv: {elapsed:.2f}s")
-        
-        # Enviar resumen final
-        total_results = sum(len(r) for r in results.values())
-        elapsed_total = time.time() - start_time
-        
-        if websocket:
+            logger.info(f"Tiempo en {source}: {elapsed:.2f}s")
+
+    async def _send_rescored(self, results: Dict[str, List[Dict[str, Any]]], websocket) -> None:
+        """Reenvía el mensaje `results` de cada fuente tras puntuar el lote completo."""
+        for source, source_results in results.items():
             try:
                 await websocket.send_json({
-                    "type": "summary",
-                    "sources_searched": 1,  # Solo Arxiv
-                    "total_results": total_results,
-                    "time_elapsed": f"{elapsed_total:.2f}s"
+                    "type": "update",
+                    "source": source,
+                    "status": "results",
+                    "data": {"count": len(source_results), "rescored": True},
+                    "results": source_results,
+                    "timestamp": datetime.utcnow().isoformat()
                 })
             except Exception as e:
-                logger.error(f"Error enviando resumen: {str(e)}")
-        
-        logger.info(
-            f"Procesamiento completado en {elapsed_total:.2f}s. "
-            f"Total de resultados: {total_results}"
-        )
-        
-        return results
-
-    async def _process_source(self, source: str, query: str) -> List[Dict[str, Any]]:
-        """Procesa la consulta en una fuente específica."""
-        if source not in self.sources:
-            logger.warning(f"No se puede procesar la fuente {source}: no está disponible")
-            return []
-        
-        try:
-            return await self.sources[source](query)
-        except Exception as e:
-            logger.error(f"Error procesando fuente {source}: {str(e)}")
-            return []
+                logger.error(f"Error reenviando resultados de {source} al websocket: {str(e)}")
 
-    async def _process_arxiv(self, query: str, max_results: int = 10, sortby: str = "relevance", type_query: str = "all", start: int = 0, sortorder: str = "descending") -> List[Dict[str, Any]]:
-        # LOG: Mostrar lo que entra a la función
-        logger.info(f"[_process_arxiv] Parámetros: query={query}, max_results={max_results}, sortby={sortby}, type_query={type_query}, start={start}, sortorder={sortorder}")
+    async def _postprocess(self, postprocess: ResultsHook, results: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Aplica el paso opcional; si falla, se conservan los resultados con la puntuación BM25."""
         try:
-            logger.info(f"Buscando en ArXiv: {query}")
-            try:
-                # LOG: Mostrar lo que se pasa al agente
-                logger.info(f"[_process_arxiv] Llamando a fetch_articles con: query={query}, max_results={max_results}, sortby={sortby}, type_query={type_query}, start={start}, sortorder={sortorder}")
-                arxiv_results = self.arxiv_agent.fetch_articles(
-                    query=query,
-                    max_results=max_results,
-                    sortby=sortby,
-                    type_query=type_query,
-                    start=start,
-                    sortorder=sortorder
-                )
-                import json
-                logger.info(f"[_process_arxiv] Resultados crudos de arxiv_results: {json.dumps(arxiv_results, ensure_ascii=False, indent=2)[:2000]}")
-                if not isinstance(arxiv_results, list):
-                    logger.warning("La respuesta de ArXiv no es una lista")
-                    return []
-            except Exception as e:
-                logger.error(f"Error al obtener resultados de ArXiv: {str(e)}", exc_info=True)
-                return []
-            
-            processed_results = []
-            for result in arxiv_results:
-                try:
-                    # Extraer información básica con valores por defecto seguros
-                    title = result.get("title", "Sin título").strip()
-                    abstract = result.get("summary", result.get("abstract", "")).strip()
-                    authors = []
-                    if "authors" in result:
-                        # Si es string, conviértelo a lista de dicts
-                        if isinstance(result["authors"], str):
-                            authors = [{"name": n.strip()} for n in result["authors"].split(",") if n.strip()]
-                        elif isinstance(result["authors"], list):
-                            authors = result["authors"]
-                    categories = result.get("categories", [])
-                    arxiv_url = result.get("url", "") or result.get("link_article", "")
-                    pdf_url = result.get("pdf_url", "")
-                    # Si pdf_url está vacío pero arxiv_url existe, construye el pdf_url
-                    if not pdf_url and arxiv_url and "/abs/" in arxiv_url:
-                        pdf_url = arxiv_url.replace("/abs/", "/pdf/") + ".pdf"
-                    # Si arxiv_url está vacío pero pdf_url existe, construye el arxiv_url
-                    if not arxiv_url and pdf_url and "/pdf/" in pdf_url:
-                        arxiv_url = pdf_url.replace("/pdf/", "/abs/").replace(".pdf", "")
-                    # Construir el resultado procesado
-                    processed = {
-                        "id": result.get("id") or f"arxiv-{hash(title)}",
-                        "title": title,
-                        "abstract": abstract,
-                        "authors": authors,
-                        "published": result.get("published", ""),
-                        "categories": categories,
-                        "primary_category": result.get("primary_category", categories[0] if categories else ""),
-                        "pdf_url": pdf_url,
-                        "url": arxiv_url,
-                        "source": "arXiv",
-                        "relevance": self._calculate_relevance({
-                            "title": title,
-                            "abstract": abstract
-                        }, query),
-                        "github_links": result.get("github_links", []),
-                        "github_link": result.get("github_link", ""),
-                        "github_status": result.get("github_status", ""),
-                        "version": result.get("version", None),
-                        "doi": result.get("doi", ""),
-                    }
-                    # Añadir campos opcionales
-                    optional_fields = [
-                        "github_link", "github_status", "comment",
-                        "doi", "journal_ref", "comment"
-                    ]
-                    for field in optional_fields:
-                        if field in result and result[field] is not None:
-                            processed[field] = result[field]
-                    processed_results.append(processed)
-                except Exception as e:
-                    logger.error(f"Error procesando resultado de ArXiv: {str(e)}", exc_info=True)
-                    continue
-
-            # LOG: Mostrar los resultados procesados antes de devolverlos
-            import json
-            logger.info(f"[_process_arxiv] Resultados procesados: {json.dumps(processed_results, ensure_ascii=False, indent=2)[:2000]}")
-            logger.info(f"ArXiv devolvió {len(processed_results)} resultados válidos de {len(arxiv_results)} obtenidos")
-            return processed_results
+            await postprocess(results)
         except Exception as e:
-            error_msg = f"Error en la búsqueda de ArXiv: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            return []
+            logger.error(f"Error en el postprocesado de resultados: {str(e)}", exc_info=True)
 
-    async def _process_tds(self, query: str) -> List[Dict[str, Any]]:
+    async def send_cached_results(self, results: Dict[str, List[Dict[str, Any]]], websocket = None) -> None:
         """
-        Procesa la consulta usando Towards Data Science.
-        
-        Args:
-            query: Término de búsqueda
-            
-        Returns:
-            Lista de artículos de Towards Data Science
+        Reproduce por el websocket la misma secuencia de mensajes que process_sources
+        para resultados que no vienen del origen (caché o búsqueda compartida).
         """
-        if not hasattr(self, 'tds_agent') or not self.tds_agent:
-            logger.warning("El agente de TDS no está disponible")
-            return []
-            
-        try:
-            logger.info(f"Buscando en Towards Data Science: {query}")
-            
-            # Obtener resultados de TDS
-            tds_results = self.tds_agent.search_articles(query=query)
-            if not isinstance(tds_results, list):
-                logger.warning("La respuesta de TDS no es una lista")
-                return []
-            
-            processed_results = []
-            for result in tds_results:
-                try:
-                    # Asegurar que el resultado sea un diccionario
-                    if not isinstance(result, dict):
-                        logger.warning(f"Resultado de TDS no es un diccionario: {result}")
-                        continue
-                        
-                    # Extraer información básica
-                    title = result.get("title", "Sin título")
-                    abstract = result.get("summary", "")
-                    
-                    # Procesar autores
-                    authors = []
-                    if "authors" in result:
-                        if isinstance(result["authors"], list):
-                            authors = [{"name": str(author)} for author in result["authors"]]
-                        elif isinstance(result["authors"], str):
-                            authors = [{"name": result["authors"]}]
-                    
-                    # Procesar categorías
-                    categories = []
-                    if "categories" in result:
-                        if isinstance(result["categories"], list):
-                            categories = [str(cat) for cat in result["categories"]]
-                        elif isinstance(result["categories"], str):
-                            categories = result["categories"].split()
-                    
-                    # Construir el resultado procesado
-                    processed = {
-                        "id": f"tds-{result.get('id', '')}",
-                        "title": title,
-                        "abstract": abstract,
-                        "authors": authors,
-                        "published": result.get("published", ""),
-                        "categories": categories,
-                        "primary_category": result.get("primary_category", categories[0] if categories else ""),
-                        "pdf_url": result.get("pdf_url", ""),
-                        "url": result.get("url", ""),
-                        "source": "Towards Data Science",
-                        "relevance": self._calculate_relevance({
-                            "title": title,
-                            "abstract": abstract
-                        }, query)
-                    }
-                    
-                    # Añadir campos opcionales
-                    optional_fields = ["github_link", "github_status", "comment"]
-                    for field in optional_fields:
-                        if field in result:
-                            processed[field] = result[field]
-                    
-                    processed_results.append(processed)
-                    
-                except Exception as e:
-                    logger.error(f"Error procesando resultado de TDS: {str(e)}")
-                    continue
-            
-            logger.info(f"TDS devolvió {len(processed_results)} resultados")
-            return processed_results
-            
-        except Exception as e:
-            error_msg = f"Error en la búsqueda de TDS: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            return []
+        if not websocket:
+            for source_results in results.values():
+                await self.link_verifier.verify_articles(source_results)
+            return
 
-    def _calculate_relevance(self, article: Dict[str, Any], query: str) -> float:
-        """
-        Calcula la relevancia de un artículo basado en la consulta.
-        
-        Args:
-            article: Diccionario con la información del artículo
-            query: Término de búsqueda
-            
-        Returns:
-            Puntuación de relevancia entre 0 y 1
-        """
         try:
-            # Convertir todo a minúsculas para hacer la búsqueda insensible a mayúsculas
-            query_terms = query.lower().split()
-            title = article.get('title', '').lower()
-            abstract = article.get('abstract', '').lower()
-            
-            # Contar ocurrencias de términos de búsqueda
-            title_matches = sum(term in title for term in query_terms)
-            abstract_matches = sum(term in abstract for term in query_terms)
-            
-            # Ponderar más los términos en el título
-            score = (title_matches * 0.7) + (abstract_matches * 0.3)
-            
-            # Normalizar el puntaje entre 0 y 1
-            max_possible = len(query_terms) * 0.7  # Máximo puntaje posible
-            normalized_score = min(score / max_possible if max_possible > 0 else 0, 1.0)
-            
-            return round(normalized_score, 2)
-            
+            for source, source_results in results.items():
+                base = {"type": "update", "source": source}
+                await websocket.send_json({**base, "status": "started", "timestamp": datetime.utcnow().isoformat()})
+                if source_results:
+                    await websocket.send_json({
+                        **base,
+                        "status": "results",
+                        "data": {"count": len(source_results), "cached": True},
+                        "results": source_results,
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
+                await websocket.send_json({
+                    **base,
+                    "status": "completed",
+                    "data": {"count": len(source_results), "cached": True},
+                    "timestamp": datetime.utcnow().isoformat()
+                })
+                self._schedule_link_verification(source, source_results, websocket)
+
+            await websocket.send_json({
+                "type": "summary",
+                "sources_searched": len(results),
+                "total_results": sum(len(r) for r in results.values()),
+                "time_elapsed": "0.00s",
+                "cached": True
+            })
         except Exception as e:
-            logger.error(f"Error calculando relevancia: {str(e)}")
-            return 0.0
-            
-    async def _process_tds(self, query: str) -> List[Dict[str, Any]]:
+            logger.error(f"Error enviando resultados cacheados al websocket: {str(e)}", exc_info=True)
+
+    def _schedule_link_verification(self, source: str, articles: List[Dict[str, Any]], websocket) -> None:
         """
-        Procesa la consulta usando Towards Data Science.
-        
-        Args:
-            query: Término de búsqueda
-            
-        Returns:
-            Lista de artículos encontrados, puede estar vacía si hay errores
+        Lanza la verificación de enlaces de GitHub en segundo plano y envía por el
+        websocket un mensaje `github_status` por cada enlace a medida que se verifica.
         """
-        if not hasattr(self, 'tds_agent') or not self.tds_agent:
-            logger.warning("El agente de TDS no está disponible")
-            return []
-            
-        try:
-            logger.info(f"Buscando en Towards Data Science: {query}")
-            
-            # Obtener resultados de TDS con manejo de errores
-            try:
-                # Verificar si el agente TDS tiene el método search_articles
-                if not hasattr(self.tds_agent, 'search_articles'):
-                    logger.error("El agente TDS no tiene el método 'search_articles'")
-                    return []
-                    
-                results = self.tds_agent.search_articles(query=query, max_results=10)
-                if not isinstance(results, list):
-                    logger.warning("La respuesta de TDS no es una lista")
-                    return []
-            except Exception as e:
-                logger.error(f"Error al obtener resultados de TDS: {str(e)}", exc_info=True)
-                return []
-            
-            processed_results = []
-            for result in results:
+        pending = [a for a in articles if a.get("github_link") and a.get("github_status") == STATUS_PENDING]
+        if not pending:
+            return
+
+        async def notify(link: str, status: str):
+            for article in pending:
+                if article.get("github_link") != link:
+                    continue
+                article["github_status"] = status
                 try:
-                    if not isinstance(result, dict):
-                        logger.warning(f"Resultado de TDS no es un diccionario: {result}")
-                        continue
-                        
-                    # Extraer información básica con valores por defecto seguros
-                    title = result.get("title", "Sin título").strip()
-                    summary = result.get("summary", result.get("abstract", "")).strip()
-                    
-                    # Procesar autores
-                    authors = []
-                    if "authors" in result:
-                        authors_data = result["authors"]
-                        if isinstance(authors_data, list):
-                            authors = [{"name": str(author).strip()} for author in authors_data if str(author).strip()]
-                        elif isinstance(authors_data, str):
-                            authors = [{"name": author.strip()} for author in authors_data.split(",") if author.strip()]
-                    elif "author" in result and result["author"]:
-                        author_str = result["author"]
-                        if isinstance(author_str, str):
-                            authors = [{"name": author_str.strip()}]
-                    
-                    # Procesar categorías/etiquetas
-                    categories = []
-                    for field in ["categories", "tags", "topics"]:
-                        if field in result and result[field]:
-                            if isinstance(result[field], list):
-                                categories.extend([str(tag).strip() for tag in result[field] if str(tag).strip()])
-                            elif isinstance(result[field], str):
-                                categories.extend([tag.strip() for tag in result[field].split(",") if tag.strip()])
-                    
-                    # Eliminar duplicados
-                    categories = list(dict.fromkeys(categories))
-                    
-                    # Obtener URL y generar ID único si es necesario
-                    url = result.get("url", result.get("link", "")).strip()
-                    entry_id = result.get("id", "")
-                    if not entry_id and url:
-                        # Intentar extraer un ID de la URL
-                        import re
-                        match = re.search(r'/([a-f0-9]{32,})/?$', url)
-                        if match:
-                            entry_id = match.group(1)
-                    
-                    # Construir el resultado procesado
-                    processed_result = {
-                        "id": f"tds-{entry_id}" if entry_id else f"tds-{hash(title)}",
-                        "title": title,
-                        "abstract": summary,
-                        "authors": authors,
-                        "published": self._format_date(result.get("published", result.get("date", ""))),
-                        "categories": categories,
-                        "primary_category": categories[0] if categories else "",
-                        "url": url,
-                        "source": "Towards Data Science",
-                        "relevance": self._calculate_relevance({
-                            "title": title,
-                            "abstract": summary
-                        }, query)
-                    }
-                    
-                    # Añadir campos opcionales
-                    optional_fields = [
-                        "pdf_url", "github_link", "github_status",
-                        "read_time", "reading_time", "claps", "comment",
-                        "publication", "subtitle", "language"
-                    ]
-                    for field in optional_fields:
-                        if field in result and result[field] is not None:
-                            # Convertir campos de tiempo de lectura a segundos si es necesario
-                            if field in ["read_time", "reading_time"] and isinstance(result[field], str):
-                                try:
-                                    # Asumir formato como "5 min read"
-                                    if "min" in result[field]:
-                                        processed_result[field] = int(result[field].split()[0]) * 60
-                                    elif "hour" in result[field]:
-                                        processed_result[field] = int(result[field].split()[0]) * 3600
-                                    else:
-                                        processed_result[field] = int(result[field])
-                                except (ValueError, IndexError):
-                                    processed_result[field] = 0
-                            else:
-                                processed_result[field] = result[field]
-                    
-                    processed_results.append(processed_result)
-                    
+                    await websocket.send_json({
+                        "type": "github_status",
+                        "source": source,
+                        "article_id": article.get("id"),
+                        "url": article.get("url", ""),
+                        "github_link": link,
+                        "github_status": status,
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
                 except Exception as e:
-                    logger.error(f"Error procesando resultado de TDS: {str(e)}", exc_info=True)
-                    continue
-            
-            logger.info(f"TDS devolvió {len(processed_results)} resultados válidos de {len(results)} obtenidos")
-            return processed_results
-            
-        except Exception as e:
-            error_msg = f"Error en la búsqueda de TDS: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            return []
+                    logger.error(f"Error enviando estado de GitHub al websocket: {str(e)}")
+
+        task = asyncio.create_task(
+            self.link_verifier.verify_many((a["github_link"] for a in pending), on_result=notify),
+            name=f"{source}_github_verification"
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
 
     def get_source_info(self) -> Dict[str, Any]:
         """
-        Devuelve información sobre las fuentes disponibles
+        Devuelve información sobre las fuentes registradas
         
         Returns:
-            Dict con información de las fuentes disponibles
+            Dict con información y capacidades de cada fuente
         """
         sources = [
-            {
-                'id': 'arxiv', 
-                'name': 'ArXiv', 
-                'description': 'Artículos académicos',
-                'available': True
-            },
-            {
-                'id': 'tds', 
-                'name': 'Towards Data Science', 
-                'description': 'Artículos técnicos',
-                'available': 'tds' in self.sources
-            }
+            cls.info(available=name in self.sources)
+            for name, cls in registered_sources().items()
         ]
         
         return {'sources': sources}
-    
-    async def _process_medium(self, query: str) -> List[Dict[str, Any]]:
-        """
-        Procesa una consulta utilizando el agente de Medium.
-        
-        Args:
-            query: Término de búsqueda
-            
-        Returns:
-            Lista de artículos encontrados en formato estandarizado
-        """
-        if not hasattr(self, 'medium_agent') or not self.medium_agent:
-            logger.warning("El agente de Medium no está disponible")
-            return []
-            
-        try:
-            logger.info(f"Buscando en Medium: {query}")
-            
-            # Obtener resultados de Medium con manejo de errores
-            try:
-                results = self.medium_agent.search_articles(query=query, max_results=10)
-                if not isinstance(results, list):
-                    logger.warning("La respuesta de Medium no es una lista")
-                    return []
-            except Exception as e:
-                logger.error(f"Error al obtener resultados de Medium: {str(e)}")
-                return []
-            
-            processed_results = []
-            for result in results:
-                try:
-                    if not isinstance(result, dict):
-                        logger.warning(f"Resultado de Medium no es un diccionario: {result}")
-                        continue
-                        
-                    # Extraer información básica con valores por defecto seguros
-                    title = result.get('title', 'Sin título').strip()
-                    summary = result.get('summary', '').strip()
-                    
-                    # Extraer la primera oración del resumen como descripción corta
-                    abstract = summary.split('. ')[0] + '.' if summary else ""
-                    
-                    # Procesar autores
-                    authors = []
-                    if 'author' in result and result['author']:
-                        if isinstance(result['author'], list):
-                            authors = [{'name': str(author).strip()} for author in result['author'] if str(author).strip()]
-                        elif isinstance(result['author'], str):
-                            authors = [{'name': result['author'].strip()}]
-                    
-                    # Procesar categorías/etiquetas
-                    categories = []
-                    if 'tags' in result:
-                        if isinstance(result['tags'], list):
-                            categories = [str(tag).strip() for tag in result['tags'] if str(tag).strip()]
-                        elif isinstance(result['tags'], str):
-                            categories = [tag.strip() for tag in result['tags'].split(',') if tag.strip()]
-                    
-                    # Construir el resultado procesado
-                    processed = {
-                        'id': f"medium-{result.get('id', '').strip()}" if result.get('id') else f"medium-{hash(title)}",
-                        'title': title,
-                        'abstract': abstract,
-                        'summary': summary,
-                        'published': self._format_date(result.get('published')),
-                        'authors': authors,
-                        'categories': categories,
-                        'primary_category': categories[0] if categories else '',
-                        'url': result.get('url', '').strip(),
-                        'source': 'Medium',
-                        'relevance': self._calculate_relevance({
-                            'title': title,
-                            'abstract': summary
-                        }, query)
-                    }
-                    
-                    # Añadir campos opcionales
-                    optional_fields = [
-                        'read_time', 'claps', 'responses', 'publication',
-                        'subtitle', 'reading_time', 'topics', 'language'
-                    ]
-                    for field in optional_fields:
-                        if field in result and result[field] is not None:
-                            processed[field] = result[field]
-                    
-                    # Asegurar que los campos numéricos sean del tipo correcto
-                    for field in ['read_time', 'claps', 'responses']:
-                        if field in processed and processed[field] is not None:
-                            try:
-                                processed[field] = int(processed[field])
-                            except (ValueError, TypeError):
-                                processed[field] = 0
-                    
-                    processed_results.append(processed)
-                    
-                except Exception as e:
-                    logger.error(f"Error procesando resultado de Medium: {str(e)}", exc_info=True)
-                    continue
-            
-            logger.info(f"Medium devolvió {len(processed_results)} resultados válidos de {len(results)} obtenidos")
-            return processed_results
-            
-        except Exception as e:
-            error_msg = f"Error en la búsqueda de Medium: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            return []
@@ -0,0 +1,402 @@
+"""
+Registro de fuentes de búsqueda.
+
+Cada fuente es un adaptador (`SourceAdapter`) que declara sus capacidades y convierte los
+artículos crudos de su agente en `PaperRecord`, el esquema común de resultados. Para añadir
+una fuente basta con definir una subclase decorada con `@register_source`: SourceProcessor
+la instancia al arrancar y la consulta sin más cambios.
+"""
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+import asyncio
+import logging
+import re
+
+from .agent_arxiv import ArxivAgent
+from .agent_tds import TdsAgent
+from .identity import paper_key, parse_arxiv_id
+from .link_cache import get_link_cache
+from .link_verifier import STATUS_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SourceCapabilities:
+    """Qué parámetros de búsqueda entiende una fuente."""
+    pagination: bool = False  # admite `start` (páginas siguientes)
+    sorting: bool = False  # admite `sortby` / `sortorder`
+    date_filters: bool = False  # admite filtros por fecha de publicación
+    async_native: bool = False  # agente asíncrono e incremental; si no, se ejecuta en un thread
+
+    def to_dict(self) -> Dict[str, bool]:
+        return {
+            "pagination": self.pagination,
+            "sorting": self.sorting,
+            "date_filters": self.date_filters,
+            "async_native": self.async_native,
+        }
+
+
+@dataclass(slots=True)
+class PaperRecord:
+    """
+    Resultado normalizado de cualquier fuente.
+
+    `to_dict()` construye el diccionario que se envía por el websocket la primera vez que
+    se pide y lo reutiliza después; a partir de ahí ese diccionario es la representación
+    viva del resultado (la verificación de enlaces de GitHub lo actualiza en sitio).
+    """
+    id: str
+    title: str
+    source: str
+    abstract: str = ""
+    authors: List[str] = field(default_factory=list)
+    published: str = ""
+    categories: List[str] = field(default_factory=list)
+    primary_category: str = ""
+    url: str = ""
+    pdf_url: str = ""
+    doi: str = ""
+    version: Optional[str] = None
+    relevance: float = 0.0  # la asigna el re-ranking BM25 del lote completo (ver ranking.py)
+    github_links: List[str] = field(default_factory=list)
+    github_link: str = ""
+    github_status: str = ""
+    extra: Dict[str, Any] = field(default_factory=dict)  # campos propios de la fuente
+    _dict: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self._dict is None:
+            data = {
+                "id": self.id,
+                "title": self.title,
+                "abstract": self.abstract,
+                "authors": [{"name": name} for name in self.authors],
+                "published": self.published,
+                "categories": self.categories,
+                "primary_category": self.primary_category,
+                "pdf_url": self.pdf_url,
+                "url": self.url,
+                "source": self.source,
+                "relevance": self.relevance,
+                "github_links": self.github_links,
+                "github_link": self.github_link,
+                "github_status": self.github_status,
+                "version": self.version,
+                "doi": self.doi,
+            }
+            data.update(self.extra)
+            # Clave canónica (ID de arXiv sin versión, DOI o URL) para deduplicar y cruzar resultados
+            data["paper_key"] = paper_key(data)
+            self._dict = data
+        return self._dict
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PaperRecord":
+        """Reconstruye un registro a partir de su `to_dict()`; las claves desconocidas van a `extra`."""
+        data = dict(data)
+        authors = [a.get("name", "") if isinstance(a, dict) else str(a) for a in data.pop("authors", None) or []]
+        core = {name: data.pop(name) for name in _RECORD_FIELDS if name in data}
+        core.setdefault("id", "")
+        core.setdefault("title", "")
+        core.setdefault("source", "")
+        return cls(authors=authors, extra=data, **core)
+
+
+_RECORD_FIELDS = tuple(f.name for f in fields(PaperRecord) if f.name not in ("authors", "extra", "_dict"))
+
+
+RecordCallback = Callable[[PaperRecord], Awaitable[None]]
+
+
+def format_date(date_str: Optional[str]) -> str:
+    """Normaliza las fechas ISO de las fuentes a AAAA-MM-DD; el resto se deja tal cual."""
+    if not date_str:
+        return ""
+    try:
+        if 'T' in date_str and 'Z' in date_str:
+            return datetime.strptime(date_str, '%Y-%m-%dT%H:%M:%SZ').strftime('%Y-%m-%d')
+        if 'T' in date_str and '+' in date_str:
+            return datetime.strptime(date_str.split('+')[0], '%Y-%m-%dT%H:%M:%S').strftime('%Y-%m-%d')
+    except ValueError:
+        logger.debug(f"Fecha con formato desconocido: {date_str}")
+    return date_str
+
+
+def split_list(value: Any, separator: str = ",") -> List[str]:
+    """Lista de cadenas no vacías a partir de una lista o de una cadena separada por `separator`."""
+    if not value:
+        return []
+    items = value if isinstance(value, list) else str(value).split(separator)
+    return [text for text in (str(item).strip() for item in items) if text]
+
+
+class SourceAdapter:
+    """
+    Adaptador de una fuente. Las subclases definen `name`, `label`, `description` y
+    `capabilities`, e implementan `search`.
+    """
+    name: str = ""
+    label: str = ""
+    description: str = ""
+    capabilities = SourceCapabilities()
+
+    async def search(
+        self,
+        query: str,
+        max_results: int = 10,
+        sortby: str = "relevance",
+        type_query: str = "all",
+        start: int = 0,
+        sortorder: str = "descending",
+        on_result: Optional[RecordCallback] = None,
+    ) -> List[PaperRecord]:
+        """
+        Busca en la fuente y devuelve los registros normalizados. Si se indica `on_result`,
+        se invoca con cada registro en cuanto está listo.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def info(cls, available: bool = True) -> Dict[str, Any]:
+        return {
+            "id": cls.name,
+            "name": cls.label,
+            "description": cls.description,
+            "available": available,
+            "capabilities": cls.capabilities.to_dict(),
+        }
+
+
+_REGISTRY: Dict[str, Type[SourceAdapter]] = {}
+
+
+def register_source(cls: Type[SourceAdapter]) -> Type[SourceAdapter]:
+    """Decorador: registra un adaptador de fuente por su `name`."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} no define `name`")
+    _REGISTRY[cls.name] = cls
+    return cls
+
+
+def registered_sources() -> Dict[str, Type[SourceAdapter]]:
+    return dict(_REGISTRY)
+
+
+def create_adapters() -> Dict[str, SourceAdapter]:
+    """
+    Instancia todos los adaptadores registrados. Una fuente cuyo agente no se puede
+    crear queda fuera (y se registra el motivo), sin impedir que arranquen las demás.
+    """
+    adapters: Dict[str, SourceAdapter] = {}
+    for name, cls in _REGISTRY.items():
+        try:
+            adapters[name] = cls()
+        except Exception as e:
+            logger.warning(f"Fuente {name} no disponible: {str(e)}")
+    return adapters
+
+
+@register_source
+class ArxivSource(SourceAdapter):
+    name = "arxiv"
+    label = "ArXiv"
+    description = "Artículos académicos"
+    capabilities = SourceCapabilities(pagination=True, sorting=True, async_native=True)
+
+    def __init__(self):
+        self.agent = ArxivAgent()
+
+    async def search(self, query, max_results=10, sortby="relevance", type_query="all", start=0, sortorder="descending", on_result=None):
+        logger.info(f"[arxiv] Buscando: query={query}, max_results={max_results}, sortby={sortby}, type_query={type_query}, start={start}, sortorder={sortorder}")
+        records: List[PaperRecord] = []
+        received = 0
+        try:
+            async for article in self.agent.iter_articles(
+                query=query,
+                max_results=max_results,
+                sortby=sortby,
+                type_query=type_query,
+                start=start,
+                sortorder=sortorder
+            ):
+                received += 1
+                try:
+                    record = self.to_record(article)
+                except Exception as e:
+                    logger.error(f"Error procesando resultado de ArXiv: {str(e)}", exc_info=True)
+                    continue
+                records.append(record)
+                if on_result is not None:
+                    await on_result(record)
+        except Exception as e:
+            logger.error(f"Error en la búsqueda de ArXiv: {str(e)}", exc_info=True)
+        logger.info(f"ArXiv devolvió {len(records)} resultados válidos de {received} obtenidos")
+        return records
+
+    @staticmethod
+    def to_record(article: Dict[str, Any]) -> PaperRecord:
+        """Convierte un artículo crudo del agente de ArXiv en un registro."""
+        title = (article.get("title") or "Sin título").strip()
+        abstract = (article.get("summary") or article.get("abstract") or "").strip()
+        categories = article.get("categories") or []
+        url = article.get("url") or article.get("link_article") or ""
+        pdf_url = article.get("pdf_url") or ""
+        # Completar la URL del PDF a partir de la del resumen, o al revés
+        if not pdf_url and "/abs/" in url:
+            pdf_url = url.replace("/abs/", "/pdf/") + ".pdf"
+        if not url and "/pdf/" in pdf_url:
+            url = pdf_url.replace("/pdf/", "/abs/").replace(".pdf", "")
+        extra = {key: article[key] for key in ("comment", "journal_ref") if article.get(key) is not None}
+        # ID de arXiv (2401.01234, hep-th/9901001) y versión, de cualquiera de los identificadores
+        identity = parse_arxiv_id(article.get("id") or "") or parse_arxiv_id(url) or parse_arxiv_id(pdf_url)
+        version = article.get("version")
+        if identity is not None and identity.version and not version:
+            version = f"v{identity.version}"
+        return PaperRecord(
+            id=identity.value if identity is not None else (article.get("id") or f"arxiv-{hash(title)}"),
+            title=title,
+            source="arXiv",
+            abstract=abstract,
+            authors=split_list(article.get("authors")),
+            published=article.get("published", ""),
+            categories=categories,
+            primary_category=article.get("primary_category") or (categories[0] if categories else ""),
+            url=url,
+            pdf_url=pdf_url,
+            doi=article.get("doi", ""),
+            version=version,
+            github_links=article.get("github_links", []),
+            github_link=article.get("github_link", ""),
+            github_status=article.get("github_status", ""),
+            extra=extra,
+        )
+
+
+_TDS_ID = re.compile(r'/([a-f0-9]{32,})/?$')
+
+
+@register_source
+class TdsSource(SourceAdapter):
+    name = "tds"
+    label = "Towards Data Science"
+    description = "Artículos técnicos"
+    capabilities = SourceCapabilities()
+
+    def __init__(self):
+        self.agent = TdsAgent()
+
+    async def search(self, query, max_results=10, sortby="relevance", type_query="all", start=0, sortorder="descending", on_result=None):
+        logger.info(f"Buscando en Towards Data Science: {query}")
+        # El agente es síncrono (requests): ejecutarlo fuera del event loop
+        articles = await asyncio.to_thread(self.agent.search_articles, query=query, max_results=max_results)
+        if not isinstance(articles, list):
+            logger.warning("La respuesta de TDS no es una lista")
+            return []
+        records: List[PaperRecord] = []
+        for article in articles:
+            try:
+                record = self.to_record(article)
+            except Exception as e:
+                logger.error(f"Error procesando resultado de TDS: {str(e)}", exc_info=True)
+                continue
+            records.append(record)
+            if on_result is not None:
+                await on_result(record)
+        logger.info(f"TDS devolvió {len(records)} resultados válidos de {len(articles)} obtenidos")
+        return records
+
+    @staticmethod
+    def to_record(article: Dict[str, Any]) -> PaperRecord:
+        """Convierte un artículo crudo del agente de TDS en un registro."""
+        title = (article.get("title") or "Sin título").strip()
+        abstract = (article.get("summary") or article.get("abstract") or "").strip()
+        authors = split_list(article.get("authors")) or split_list(article.get("author"))
+        categories: List[str] = []
+        for key in ("categories", "tags", "topics"):
+            categories.extend(split_list(article.get(key)))
+        categories = list(dict.fromkeys(categories))
+        url = (article.get("url") or article.get("link") or "").strip()
+        entry_id = article.get("id", "")
+        if not entry_id and url:
+            match = _TDS_ID.search(url)
+            if match:
+                entry_id = match.group(1)
+        if entry_id and not str(entry_id).startswith("tds-"):
+            entry_id = f"tds-{entry_id}"
+        extra = {
+            key: article[key]
+            for key in ("read_time", "claps", "comment", "publication", "subtitle", "language")
+            if article.get(key) is not None
+        }
+        return PaperRecord(
+            id=entry_id or f"tds-{hash(title)}",
+            title=title,
+            source="Towards Data Science",
+            abstract=abstract,
+            authors=authors,
+            published=format_date(article.get("published") or article.get("date")),
+            categories=categories,
+            primary_category=categories[0] if categories else "",
+            url=url,
+            pdf_url=article.get("pdf_url", ""),
+            github_link=article.get("github_link", ""),
+            github_status=article.get("github_status", ""),
+            extra=extra,
+        )
+
+
+@register_source
+class LocalSource(SourceAdapter):
+    """Papers ya vistos, buscados en el índice local de texto completo (ver services/local_index.py)."""
+    name = "local"
+    label = "Biblioteca local"
+    description = "Papers ya consultados (texto completo, sin conexión)"
+    capabilities = SourceCapabilities(pagination=True)
+
+    def __init__(self):
+        # Importación diferida: services.local_index importa el paquete scraping (vía pdf_store)
+        from ..services.embeddings import get_embedding_service
+        from ..services.local_index import get_local_index, index_key
+        self.index = get_local_index()
+        self.index_key = index_key
+        if not self.index.enabled:
+            raise RuntimeError("el índice local no está disponible")
+        self.embeddings = get_embedding_service()
+
+    def _semantic_hits(self, query: str, limit: int, exclude: set) -> List[Tuple[Dict[str, Any], float]]:
+        """Papers cercanos por embeddings que la búsqueda léxica no encontró (p. ej. sinónimos)."""
+        neighbours = [(key, score) for key, score in self.embeddings.nearest_keys(query, limit + len(exclude)) if key not in exclude]
+        found = self.index.get_many([key for key, _ in neighbours])
+        return [(found[key], round(score, 4)) for key, score in neighbours if key in found][:limit]
+
+    def _search(self, query: str, max_results: int, start: int) -> List[Tuple[Dict[str, Any], Optional[float], Optional[float]]]:
+        hits = [(data, score, None) for data, score in self.index.search(query, max_results, start)]
+        # La búsqueda semántica no pagina: solo completa la primera página
+        if start == 0 and len(hits) < max_results and self.embeddings.available:
+            exclude = {self.index_key(data) for data, _, _ in hits}
+            hits += [(data, None, similarity) for data, similarity in self._semantic_hits(query, max_results - len(hits), exclude)]
+        return hits
+
+    async def search(self, query, max_results=10, sortby="relevance", type_query="all", start=0, sortorder="descending", on_result=None):
+        hits = await asyncio.to_thread(self._search, query, max_results, start)
+        # El estado guardado del enlace puede estar desfasado: tomar el de la caché o volver a verificar
+        link_statuses = await get_link_cache().get_many_async(
+            data.get("github_link") for data, _, _ in hits if data.get("github_link")
+        )
+        records: List[PaperRecord] = []
+        for data, score, similarity in hits:
+            record = PaperRecord.from_dict(data)
+            if score is not None:
+                record.extra["score"] = score
+            if similarity is not None:
+                record.extra["similarity"] = similarity
+            if record.github_link:
+                record.github_status = link_statuses.get(record.github_link) or STATUS_PENDING
+            records.append(record)
+            if on_result is not None:
+                await on_result(record)
+        logger.info(f"Índice local devolvió {len(records)} resultados")
+        return records
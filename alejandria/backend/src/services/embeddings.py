@@ -0,0 +1,498 @@
+"""
+Embeddings locales (CPU) de título + resumen: re-ranking semántico y colapso de duplicados.
+
+- El modelo (sentence-transformers) se carga en el primer uso y codifica por lotes.
+- Los vectores se guardan normalizados en una matriz float32 en disco abierta con
+  np.memmap (`vectors.f32`); un índice SQLite relaciona cada paper con su fila y con el
+  hash del texto del que salió el vector, así que cada paper se codifica una sola vez.
+- Un índice ANN (HNSW, con hnswlib) sobre esa matriz permite la búsqueda semántica de la
+  biblioteca local; sin hnswlib se recorre la matriz completa (producto escalar). El índice
+  se guarda cada EMBEDDING_ANN_SAVE_EVERY vectores nuevos y al cerrar; si al arrancar no
+  coincide con la matriz, se reconstruye desde ella.
+
+sentence-transformers y hnswlib son opcionales. En las búsquedas el modelo solo se usa si
+se pide (re-ranking semántico o duplicados por similitud) y con un plazo; sin él, el
+re-ranking semántico no se aplica y los duplicados se detectan solo por identidad (ID de
+arXiv, DOI, URL) o título.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+import numpy as np
+
+from ..config import (
+    EMBEDDINGS_ENABLED,
+    EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_STORE_DIR,
+    EMBEDDING_DUPLICATE_THRESHOLD,
+    EMBEDDING_ANN_SAVE_EVERY,
+    EMBEDDING_TIMEOUT,
+    SEMANTIC_RERANK_WEIGHT,
+)
+from ..scraping.identity import identities
+from .local_index import index_key
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # modelo de embeddings opcional
+    SentenceTransformer = None
+
+try:
+    import hnswlib
+except ImportError:  # índice ANN opcional (sin él, búsqueda exacta sobre la matriz)
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_CAPACITY = 1024  # filas reservadas al crear la matriz; se duplica al llenarse
+_HNSW_M = 16
+_HNSW_EF_CONSTRUCTION = 200
+_HNSW_EF_SEARCH = 64
+_NON_ALNUM = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    title = (article.get("title") or "").strip()
+    abstract = (article.get("abstract") or "").strip()
+    return f"{title}. {abstract}" if abstract else title
+
+
+def title_key(article: Dict[str, Any]) -> str:
+    """Título en minúsculas sin puntuación ni espacios: iguala versiones y copias del mismo paper."""
+    return _NON_ALNUM.sub("", (article.get("title") or "").lower())
+
+
+class VectorStore:
+    """Matriz de vectores en disco (memmap) + índice SQLite de claves + índice ANN opcional."""
+
+    def __init__(self, directory: str = EMBEDDING_STORE_DIR, model_name: str = EMBEDDING_MODEL):
+        self.directory = directory
+        self.model_name = model_name
+        self.matrix_path = os.path.join(directory, "vectors.f32")
+        self.ann_path = os.path.join(directory, "hnsw.bin")
+        self.dim: Optional[int] = None
+        self.count = 0
+        self._matrix: Optional[np.memmap] = None
+        self._ann = None
+        self._ann_unsaved = 0  # vectores añadidos al índice ANN desde la última vez que se guardó
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Abre (o crea) el índice de claves; si falla, los vectores no se persisten."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "vectors.sqlite"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors ("
+                "key TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, text_hash TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.commit()
+            return conn
+        except Exception as e:
+            logger.warning(f"No se pudo abrir el almacén de vectores en {self.directory}: {e}")
+            return None
+
+    def open(self, dim: int) -> None:
+        """Abre la matriz para vectores de dimensión `dim`; si cambió el modelo, la vacía."""
+        if self._conn is None or self.dim == dim:
+            return
+        with self._lock:
+            meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+            if meta.get("model") != self.model_name or meta.get("dim") != str(dim):
+                logger.info(f"[embeddings] Almacén de vectores reiniciado para {self.model_name} (dim {dim})")
+                self._conn.execute("DELETE FROM vectors")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                    [("model", self.model_name), ("dim", str(dim))],
+                )
+                self._conn.commit()
+                for path in (self.matrix_path, self.ann_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            self.dim = dim
+            self.count = self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+            self._map(max(_INITIAL_CAPACITY, self.count))
+            self._load_ann()
+
+    def _map(self, capacity: int) -> None:
+        size = capacity * self.dim * 4
+        with open(self.matrix_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        rows = os.path.getsize(self.matrix_path) // (self.dim * 4)
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def _load_ann(self) -> None:
+        if hnswlib is None:
+            return
+        capacity = self._matrix.shape[0]
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        if os.path.exists(self.ann_path):
+            try:
+                index.load_index(self.ann_path, max_elements=capacity)
+            except Exception as e:
+                logger.warning(f"[embeddings] Índice ANN ilegible, se reconstruye: {e}")
+                index = None
+        else:
+            index = None
+        if index is None or index.get_current_count() != self.count:
+            index = hnswlib.Index(space="ip", dim=self.dim)
+            index.init_index(max_elements=capacity, ef_construction=_HNSW_EF_CONSTRUCTION, M=_HNSW_M)
+            if self.count:
+                index.add_items(np.asarray(self._matrix[:self.count]), np.arange(self.count))
+            # El índice reconstruido se guarda junto con los siguientes vectores (o al cerrar)
+            self._ann_unsaved = self.count
+        index.set_ef(_HNSW_EF_SEARCH)
+        self._ann = index
+
+    def get_many(self, items: Sequence[Tuple[str, str]]) -> Dict[str, np.ndarray]:
+        """Vectores guardados de [(clave, hash del texto)] cuyo texto no ha cambiado."""
+        if self._conn is None or self._matrix is None or not items:
+            return {}
+        hashes = dict(items)
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            keys = list(hashes)
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, row, text_hash FROM vectors WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, row, text_hash in rows:
+                    if text_hash == hashes[key]:
+                        found[key] = np.array(self._matrix[row])
+        return found
+
+    def add(self, keys: Sequence[str], hashes: Sequence[str], vectors: np.ndarray) -> None:
+        """Guarda (o sustituye) los vectores de `keys`."""
+        if self._conn is None or self._matrix is None or not len(keys):
+            return
+        with self._lock:
+            new_rows = []
+            for key, text_hash, vector in zip(keys, hashes, vectors):
+                existing = self._conn.execute("SELECT row FROM vectors WHERE key = ?", (key,)).fetchone()
+                if existing is not None:
+                    row = existing[0]
+                else:
+                    row = self.count
+                    self.count += 1
+                    if row >= self._matrix.shape[0]:
+                        self._grow(row + 1)
+                    new_rows.append(row)
+                self._matrix[row] = vector
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO vectors (key, row, text_hash) VALUES (?, ?, ?)", (key, row, text_hash)
+                )
+            self._matrix.flush()
+            self._conn.commit()
+            if self._ann is not None:
+                rows = [self._conn.execute("SELECT row FROM vectors WHERE key = ?", (key,)).fetchone()[0] for key in keys]
+                # hnswlib sustituye el vector de una etiqueta ya existente
+                self._ann.add_items(np.asarray(vectors, dtype=np.float32), np.asarray(rows))
+                self._ann_unsaved += len(rows)
+                if self._ann_unsaved >= EMBEDDING_ANN_SAVE_EVERY:
+                    self._save_ann()
+
+    def _save_ann(self) -> None:
+        try:
+            self._ann.save_index(self.ann_path)
+            self._ann_unsaved = 0
+        except Exception as e:
+            logger.warning(f"[embeddings] No se pudo guardar el índice ANN: {e}")
+
+    def flush(self) -> None:
+        """Guarda el índice ANN si tiene vectores sin guardar."""
+        with self._lock:
+            if self._ann is not None and self._ann_unsaved:
+                self._save_ann()
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._matrix.shape[0]
+        while capacity < needed:
+            capacity *= 2
+        self._matrix.flush()
+        self._matrix = None
+        self._map(capacity)
+        if self._ann is not None:
+            self._ann.resize_index(capacity)
+
+    def nearest(self, vector: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """Las `k` claves más parecidas (producto escalar de vectores normalizados)."""
+        if self._conn is None or self._matrix is None or not self.count or k <= 0:
+            return []
+        k = min(k, self.count)
+        with self._lock:
+            if self._ann is not None:
+                labels, distances = self._ann.knn_query(vector.reshape(1, -1), k=k)
+                # Con space="ip", hnswlib devuelve 1 - producto escalar
+                hits = list(zip(labels[0].tolist(), (1.0 - distances[0]).tolist()))
+            else:
+                scores = np.asarray(self._matrix[:self.count]) @ vector
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                hits = list(zip(top.tolist(), scores[top].tolist()))
+            rows = dict(self._conn.execute(
+                f"SELECT row, key FROM vectors WHERE row IN ({','.join('?' * len(hits))})", [row for row, _ in hits]
+            ).fetchall())
+        return [(rows[row], float(score)) for row, score in hits if row in rows]
+
+
+class EmbeddingService:
+    """Modelo de embeddings (carga diferida) + almacén de vectores."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.store = VectorStore(model_name=model_name)
+        self._model = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return EMBEDDINGS_ENABLED and SentenceTransformer is not None and not self._failed
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None and not self._failed:
+                try:
+                    self._model = SentenceTransformer(self.model_name, device="cpu")
+                    logger.info(f"[embeddings] Modelo {self.model_name} cargado")
+                except Exception as e:
+                    logger.warning(f"[embeddings] No se pudo cargar {self.model_name}: {e}")
+                    self._failed = True
+            return self._model
+
+    def encode(self, texts: Sequence[str]) -> Optional[np.ndarray]:
+        """Vectores normalizados (float32) de los textos, por lotes; None si no hay modelo."""
+        model = self._get_model() if self.available else None
+        if model is None:
+            return None
+        vectors = model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+            convert_to_numpy=True, show_progress_bar=False,
+        )
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.store.open(vectors.shape[1])
+        return vectors
+
+    def embed_articles(self, articles: Sequence[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Matriz (artículos x dim) de vectores normalizados. Los que ya están en el almacén
+        con el mismo texto no se vuelven a codificar.
+        """
+        if not self.available or not articles:
+            return None
+        texts = [article_text(a) for a in articles]
+        hashes = [self._hash(t) for t in texts]
+        keys = [index_key(a) or f"text:{h}" for a, h in zip(articles, hashes)]
+        cached = self.store.get_many(list(zip(keys, hashes))) if self.store.dim else {}
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        encoded = self.encode([texts[i] for i in missing]) if missing else None
+        if missing and encoded is None:
+            return None
+        if encoded is not None:
+            self.store.add([keys[i] for i in missing], [hashes[i] for i in missing], encoded)
+            cached.update({keys[i]: encoded[n] for n, i in enumerate(missing)})
+        return np.stack([cached[key] for key in keys])
+
+    def nearest_keys(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Claves de la biblioteca local semánticamente más cercanas a la consulta."""
+        vectors = self.encode([query])
+        if vectors is None:
+            return []
+        return self.store.nearest(vectors[0], k)
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _semantic_rerank(articles: List[Dict[str, Any]], vectors: np.ndarray, query_vector: np.ndarray, weight: float) -> None:
+    similarity = np.clip(vectors @ query_vector, 0.0, None)
+    best = similarity.max()
+    if best > 0:
+        similarity = similarity / best
+    lexical = np.array([a.get("relevance") or 0.0 for a in articles])
+    blended = np.round((1.0 - weight) * lexical + weight * similarity, 4)
+    for article, value in zip(articles, blended.tolist()):
+        article["relevance"] = value
+
+
+def _duplicate_of(articles: List[Dict[str, Any]], vectors: Optional[np.ndarray], threshold: float) -> Dict[int, int]:
+    """
+    {índice del duplicado: índice del artículo que se conserva}. Se conserva el de mayor
+    relevancia; son duplicados los que comparten identidad (ID de arXiv, DOI o URL) o
+    título normalizado, o tienen similitud >= threshold.
+    """
+    order = sorted(range(len(articles)), key=lambda i: articles[i].get("relevance") or 0.0, reverse=True)
+    kept_by_key: Dict[str, int] = {}
+    duplicate_of: Dict[int, int] = {}
+    similarity = vectors @ vectors.T if vectors is not None else None
+    kept: List[int] = []
+    for i in order:
+        keys = [identity.key for identity in identities(articles[i])]
+        title = title_key(articles[i])
+        if title:
+            keys.append(f"title:{title}")
+        match = next((kept_by_key[key] for key in keys if key in kept_by_key), None)
+        if match is not None:
+            duplicate_of[i] = match
+            continue
+        if similarity is not None and kept:
+            row = similarity[i, kept]
+            best = int(np.argmax(row))
+            if row[best] >= threshold:
+                duplicate_of[i] = kept[best]
+                continue
+        kept.append(i)
+        for key in keys:
+            kept_by_key.setdefault(key, i)
+    return duplicate_of
+
+
+def _embed_for_refine(service: EmbeddingService, query: str, articles: List[Dict[str, Any]]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """(vectores de los artículos, vector de la consulta), o (None, None) sin modelo."""
+    vectors = service.embed_articles(articles)
+    if vectors is None:
+        return None, None
+    query_vectors = service.encode([query])
+    return vectors, (query_vectors[0] if query_vectors is not None else None)
+
+
+def _apply_refinement(
+    results: Dict[str, List[Dict[str, Any]]],
+    located: List[Tuple[str, Dict[str, Any]]],
+    vectors: Optional[np.ndarray],
+    query_vector: Optional[np.ndarray],
+    semantic: bool,
+    dedup: bool,
+    reorder: bool,
+    semantic_dedup: bool,
+) -> None:
+    articles = [article for _, article in located]
+    reranked = semantic and vectors is not None and query_vector is not None
+    if reranked:
+        _semantic_rerank(articles, vectors, query_vector, SEMANTIC_RERANK_WEIGHT)
+
+    if dedup:
+        duplicate_of = _duplicate_of(articles, vectors if semantic_dedup else None, EMBEDDING_DUPLICATE_THRESHOLD)
+        for i, keep in duplicate_of.items():
+            source, article = located[i]
+            duplicates = articles[keep].setdefault("duplicates", [])
+            duplicates.append({
+                "id": article.get("id"),
+                "source": source,
+                "url": article.get("url", ""),
+                "pdf_url": article.get("pdf_url", ""),
+            })
+            # Duplicados colapsados en una pasada anterior (por fuente) en el que ahora se descarta
+            duplicates.extend(article.pop("duplicates", []))
+        if duplicate_of:
+            removed = {id(located[i][1]) for i in duplicate_of}
+            for source in results:
+                results[source][:] = [a for a in results[source] if id(a) not in removed]
+            logger.info(f"[embeddings] {len(duplicate_of)} duplicados colapsados")
+
+    if reorder and reranked:
+        for source_results in results.values():
+            source_results.sort(key=lambda a: a.get("relevance") or 0.0, reverse=True)
+
+
+def _needs_model(semantic: bool, dedup: bool, semantic_dedup: bool) -> bool:
+    return semantic or (dedup and semantic_dedup)
+
+
+def refine_results_sync(
+    query: str,
+    results: Dict[str, List[Dict[str, Any]]],
+    semantic: bool = False,
+    dedup: bool = True,
+    reorder: bool = True,
+    semantic_dedup: bool = False,
+    service: Optional["EmbeddingService"] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Aplica en sitio el re-ranking semántico (mezcla con la relevancia BM25 ya calculada)
+    y el colapso de duplicados: cada duplicado sale de su lista y queda descrito en
+    `duplicates` del artículo que se conserva. Con varias fuentes se aplica primero a cada
+    una y después al lote completo, cuyos resultados SourceProcessor reenvía al websocket.
+
+    Los duplicados se detectan por identidad o título; con `semantic_dedup`, también por
+    similitud de embeddings. El modelo solo se usa si se pide `semantic` o `semantic_dedup`.
+    """
+    located = [(source, article) for source, articles in results.items() for article in articles]
+    if not located or not (semantic or dedup):
+        return results
+    vectors = query_vector = None
+    if _needs_model(semantic, dedup, semantic_dedup):
+        service = service or get_embedding_service()
+        if service.available:
+            vectors, query_vector = _embed_for_refine(service, query, [article for _, article in located])
+    _apply_refinement(results, located, vectors, query_vector, semantic, dedup, reorder, semantic_dedup)
+    return results
+
+
+async def refine_results(
+    query: str,
+    results: Dict[str, List[Dict[str, Any]]],
+    semantic: bool = False,
+    dedup: bool = True,
+    reorder: bool = True,
+    semantic_dedup: bool = False,
+    service: Optional["EmbeddingService"] = None,
+    timeout: float = EMBEDDING_TIMEOUT,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Versión asíncrona de `refine_results_sync`: la inferencia va a un thread y tiene un plazo
+    de `timeout` segundos (incluida la carga del modelo en el primer uso). Si se agota, se
+    aplica lo mismo sin embeddings: relevancia BM25 y duplicados por identidad o título.
+    """
+    located = [(source, article) for source, articles in results.items() for article in articles]
+    if not located or not (semantic or dedup):
+        return results
+    vectors = query_vector = None
+    if _needs_model(semantic, dedup, semantic_dedup):
+        service = service or get_embedding_service()
+        if service.available:
+            try:
+                # El thread sigue hasta terminar (y deja el modelo cargado y los vectores guardados)
+                vectors, query_vector = await asyncio.wait_for(
+                    asyncio.to_thread(_embed_for_refine, service, query, [article for _, article in located]),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"[embeddings] Sin embeddings tras {timeout}s: se usa la relevancia BM25 y la deduplicación por identidad")
+    _apply_refinement(results, located, vectors, query_vector, semantic, dedup, reorder, semantic_dedup)
+    return results
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Servicio compartido por todo el proceso (se crea en el primer uso)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService()
+        return _service
+
+
+def flush_embedding_service() -> None:
+    """Guarda lo pendiente del servicio compartido, si llegó a crearse (al cerrar la aplicación)."""
+    with _service_lock:
+        service = _service
+    if service is not None:
+        service.store.flush()
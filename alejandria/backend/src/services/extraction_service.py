@@ -0,0 +1,153 @@
+"""
+Servicio de extracción de texto de PDFs sobre un pool de procesos.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Set
+import asyncio
+import logging
+import threading
+
+from ..config import PDF_WORKERS, PDF_WORKER_MAX_TASKS, PDF_JOB_TIMEOUT, PDF_MAX_PENDING, PDF_TOKEN_BUDGET
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionTimeout(Exception):
+    """El documento no se pudo parsear dentro del tiempo permitido."""
+
+
+class ExtractionQueueFull(Exception):
+    """Se alcanzó el número máximo de trabajos admitidos."""
+
+
+def _extract_in_worker(pdf_path: str, token_budget: int) -> str:
+    # Se ejecuta en el proceso hijo: importación diferida para no cargar PyPDF2 en el padre
+    from ..agent_summarizer import extract_full_text_from_pdf
+    return extract_full_text_from_pdf(pdf_path, token_budget=token_budget)
+
+
+class _Worker:
+    """
+    Un proceso de extracción (un ProcessPoolExecutor de un solo proceso). Se recicla a mano
+    tras `max_tasks` documentos: `max_tasks_per_child` solo existe desde Python 3.11.
+    """
+
+    def __init__(self, max_tasks: int):
+        self.executor = ProcessPoolExecutor(max_workers=1)
+        self.max_tasks = max_tasks
+        self.tasks = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.tasks >= self.max_tasks
+
+    def retire(self) -> None:
+        """Cierra el proceso cuando termine (no tiene nada en curso)."""
+        self.executor.shutdown(wait=False)
+
+    def kill(self) -> None:
+        """Termina el proceso aunque tenga un trabajo en curso (colgado o abandonado)."""
+        # ProcessPoolExecutor no ofrece cómo matar un trabajo en curso: terminar el proceso
+        for process in list((getattr(self.executor, "_processes", None) or {}).values()):
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PdfExtractionService:
+    """
+    Parsea PDFs (CPU intensivo, Python puro) en procesos separados para no competir
+    por el GIL con el event loop.
+
+    - Como mucho `max_workers` documentos a la vez; el resto espera turno, y esa espera
+      no cuenta para el timeout.
+    - Timeout por documento desde que empieza a parsearse: si se supera, se termina solo
+      el proceso colgado; los trabajos de otros procesos siguen su curso.
+    - Cada proceso se recicla tras `max_tasks_per_child` documentos (fugas de memoria de PyPDF2).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = PDF_WORKERS,
+        max_tasks_per_child: int = PDF_WORKER_MAX_TASKS,
+        job_timeout: float = PDF_JOB_TIMEOUT,
+        max_pending: int = PDF_MAX_PENDING,
+    ):
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.job_timeout = job_timeout
+        self.max_pending = max_pending
+        self._idle: List[_Worker] = []
+        self._busy: Set[_Worker] = set()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._running: Optional[asyncio.Semaphore] = None
+
+    def _take_worker(self) -> _Worker:
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None:
+            worker = _Worker(self.max_tasks_per_child)
+        with self._lock:
+            self._busy.add(worker)
+        return worker
+
+    def _release_worker(self, worker: _Worker, healthy: bool) -> None:
+        with self._lock:
+            self._busy.discard(worker)
+            reuse = healthy and not worker.exhausted
+            if reuse:
+                self._idle.append(worker)
+        if not healthy:
+            worker.kill()
+            logger.warning("[extraction_service] Proceso de extracción terminado")
+        elif not reuse:
+            worker.retire()
+
+    async def extract(self, pdf_path: str, token_budget: int = PDF_TOKEN_BUDGET, timeout: Optional[float] = None) -> str:
+        """Extrae el texto del PDF en un proceso del pool sin bloquear el event loop."""
+        if not self._slots.acquire(blocking=False):
+            raise ExtractionQueueFull("Demasiadas extracciones de PDF en curso")
+        try:
+            if self._running is None:
+                self._running = asyncio.Semaphore(self.max_workers)
+            async with self._running:
+                worker = self._take_worker()
+                healthy = False
+                try:
+                    worker.tasks += 1
+                    future = asyncio.get_running_loop().run_in_executor(
+                        worker.executor, _extract_in_worker, pdf_path, token_budget
+                    )
+                    # El plazo empieza aquí: el proceso está libre y el trabajo arranca ya
+                    text = await asyncio.wait_for(future, timeout=timeout or self.job_timeout)
+                    healthy = True
+                    return text
+                except asyncio.TimeoutError:
+                    raise ExtractionTimeout(f"Tiempo agotado extrayendo texto de {pdf_path}")
+                except BrokenProcessPool:
+                    raise
+                except Exception:
+                    # Excepción del propio parseo: el proceso sigue sano
+                    healthy = True
+                    raise
+                finally:
+                    # Si se cancela la espera o vence el plazo, el proceso sigue ocupado: se termina
+                    self._release_worker(worker, healthy)
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+            busy, self._busy = list(self._busy), set()
+        for worker in idle:
+            worker.retire()
+        for worker in busy:
+            worker.kill()
+
+
+extraction_service = PdfExtractionService()
@@ -0,0 +1,278 @@
+"""
+Cola de trabajos con un número acotado de workers para las tareas largas del backend
+(descarga + parseo + resumen de un PDF en /extract-ideas).
+
+- Cola con prioridad (número menor = más prioritario) y FIFO dentro de la misma prioridad.
+- Límite de trabajos en ejecución por propietario (ws_id), para que un cliente no acapare los workers.
+- Los trabajos en segundo plano (prioridad >= PRIORITY_BACKGROUND) nunca ocupan más de
+  `background_limit` workers, así que siempre queda sitio para los interactivos.
+- Cancelación por trabajo o por propietario (al desconectarse el WebSocket).
+- El estado de cada trabajo (posición en cola, profundidad, tiempo de espera) se notifica al propietario.
+"""
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+import uuid
+
+from ..config import JOB_WORKERS, JOB_MAX_QUEUED, JOB_PER_OWNER_LIMIT, JOB_HISTORY, JOB_BACKGROUND_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Estados de un trabajo
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Prioridades habituales
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+Notifier = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobQueueFull(Exception):
+    """Se alcanzó el número máximo de trabajos en cola."""
+
+
+class Job:
+    """Un trabajo de la cola: la corrutina a ejecutar y su estado."""
+
+    def __init__(self, run: Callable[[], Awaitable[Any]], owner: Optional[str], priority: int, description: str, notify: Optional[Notifier], metadata: Optional[Dict[str, Any]]):
+        self.id = uuid.uuid4().hex[:12]
+        self.run = run
+        self.owner = owner
+        self.priority = priority
+        self.description = description
+        self.notify = notify
+        self.metadata = metadata or {}
+        self.status = JOB_QUEUED
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_requested = False
+
+    @property
+    def wait_time(self) -> float:
+        return (self.started_at or time.time()) - self.created_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "owner": self.owner,
+            "status": self.status,
+            "priority": self.priority,
+            "description": self.description,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wait_time": round(self.wait_time, 3),
+            **self.metadata,
+        }
+
+
+class JobManager:
+    """Cola de trabajos con prioridad y un pool de workers sobre el event loop."""
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_MAX_QUEUED,
+        per_owner_limit: int = JOB_PER_OWNER_LIMIT,
+        history: int = JOB_HISTORY,
+        background_limit: int = JOB_BACKGROUND_LIMIT,
+    ):
+        self.workers = workers
+        self.background_limit = background_limit
+        self.max_queued = max_queued
+        self.per_owner_limit = per_owner_limit
+        self.history = history
+        self._queue: List[tuple] = []  # (prioridad, orden de llegada, trabajo)
+        self._order = count()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._running: Dict[str, Job] = {}
+        self._cond: Optional[asyncio.Condition] = None
+        self._workers: List[asyncio.Task] = []
+        self._total_wait = 0.0
+        self._started = 0
+
+    def _ensure_workers(self) -> None:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.workers:
+            self._workers.append(asyncio.create_task(self._worker(len(self._workers))))
+
+    async def submit(
+        self,
+        run: Callable[[], Awaitable[Any]],
+        owner: Optional[str] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        description: str = "",
+        notify: Optional[Notifier] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Job:
+        """Encola un trabajo. Lanza JobQueueFull si la cola está llena."""
+        if len(self._queue) >= self.max_queued:
+            raise JobQueueFull("Demasiados trabajos en cola, inténtalo más tarde")
+        self._ensure_workers()
+        job = Job(run, owner, priority, description, notify, metadata)
+        self._jobs[job.id] = job
+        async with self._cond:
+            self._queue.append((priority, next(self._order), job))
+            self._cond.notify_all()
+        await self._notify(job)
+        return job
+
+    def _queued_in_order(self) -> List[Job]:
+        return [job for _, _, job in sorted(self._queue, key=lambda entry: entry[:2])]
+
+    def _owner_running(self, owner: Optional[str]) -> int:
+        return sum(1 for job in self._running.values() if owner is not None and job.owner == owner)
+
+    def _background_running(self) -> int:
+        return sum(1 for job in self._running.values() if job.priority >= PRIORITY_BACKGROUND)
+
+    def _next_eligible(self) -> Optional[tuple]:
+        """Siguiente trabajo cuyo propietario (y, si es de segundo plano, su clase) no ha alcanzado su límite."""
+        background_full = self._background_running() >= self.background_limit
+        for entry in sorted(self._queue, key=lambda entry: entry[:2]):
+            job = entry[2]
+            if job.priority >= PRIORITY_BACKGROUND and background_full:
+                continue
+            if self._owner_running(job.owner) < self.per_owner_limit:
+                return entry
+        return None
+
+    def position(self, job: Job) -> Optional[int]:
+        """Posición (1 = siguiente) de un trabajo en cola."""
+        for index, queued in enumerate(self._queued_in_order(), start=1):
+            if queued is job:
+                return index
+        return None
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._next_eligible() is not None)
+                entry = self._next_eligible()
+                self._queue.remove(entry)
+                job = entry[2]
+                job.status = JOB_RUNNING
+                job.started_at = time.time()
+                self._running[job.id] = job
+            self._started += 1
+            self._total_wait += job.wait_time
+            await self._notify(job)
+            await self._notify_positions()
+
+            job.task = asyncio.create_task(job.run())
+            if job.cancel_requested:
+                job.task.cancel()
+            try:
+                await job.task
+                job.status = JOB_DONE
+            except asyncio.CancelledError:
+                job.status = JOB_CANCELLED
+                if not job.task.cancelled():
+                    # Se canceló el propio worker (apagado): propagar
+                    job.task.cancel()
+                    raise
+            except Exception as e:
+                job.status = JOB_FAILED
+                job.error = str(e)
+                logger.error(f"[job_queue] Trabajo {job.id} ({job.description}) falló: {e}")
+            finally:
+                job.finished_at = time.time()
+                async with self._cond:
+                    self._running.pop(job.id, None)
+                    self._cond.notify_all()
+                self._trim_history()
+            await self._notify(job)
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancela un trabajo en cola o en ejecución."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status not in (JOB_QUEUED, JOB_RUNNING):
+            return False
+        job.cancel_requested = True
+        async with self._cond:
+            queued = job.status == JOB_QUEUED
+            if queued:
+                self._queue = [entry for entry in self._queue if entry[2] is not job]
+                job.status = JOB_CANCELLED
+                job.finished_at = time.time()
+        if queued:
+            await self._notify(job)
+            await self._notify_positions()
+        elif job.task is not None:
+            # Si aún no tiene tarea, el worker la cancela al crearla (cancel_requested)
+            job.task.cancel()
+        return True
+
+    async def cancel_owner(self, owner: str) -> int:
+        """Cancela todos los trabajos de un propietario (p. ej. al cerrarse su WebSocket)."""
+        pending = [job.id for job in self._jobs.values() if job.owner == owner and job.status in (JOB_QUEUED, JOB_RUNNING)]
+        for job_id in pending:
+            await self.cancel(job_id)
+        return len(pending)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [self.describe(job) for job in self._jobs.values() if owner is None or job.owner == owner]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_depth": len(self._queue),
+            "running": len(self._running),
+            "max_queued": self.max_queued,
+            "per_owner_limit": self.per_owner_limit,
+            "started": self._started,
+            "avg_wait_time": round(self._total_wait / self._started, 3) if self._started else 0.0,
+        }
+
+    def describe(self, job: Job) -> Dict[str, Any]:
+        """Estado del trabajo con su posición en la cola."""
+        info = job.to_dict()
+        info["queue_position"] = self.position(job) if job.status == JOB_QUEUED else None
+        info["queue_depth"] = len(self._queue)
+        return info
+
+    async def _notify(self, job: Job) -> None:
+        if job.notify is None:
+            return
+        try:
+            await job.notify({"type": "job_status", **self.describe(job)})
+        except Exception as e:
+            logger.warning(f"[job_queue] Error notificando el estado del trabajo {job.id}: {e}")
+
+    async def _notify_positions(self) -> None:
+        """Avisa a los trabajos en cola de su nueva posición."""
+        for job in self._queued_in_order():
+            await self._notify(job)
+
+    def _trim_history(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in (JOB_QUEUED, JOB_RUNNING)]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    async def shutdown(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        for job in list(self._running.values()):
+            if job.task is not None:
+                job.task.cancel()
+        self._workers = []
+
+
+job_manager = JobManager()
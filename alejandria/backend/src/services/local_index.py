@@ -0,0 +1,254 @@
+"""
+Índice local de texto completo sobre los papers ya vistos (SQLite FTS5).
+
+Cada resultado que devuelve una fuente remota se indexa por título y resumen; cuando se
+descarga y parsea su PDF (resumen bajo demanda, prefetch) se añade también el texto
+completo. La fuente "local" de SourceProcessor busca aquí con ranking BM25: responde en
+milisegundos y funciona sin conexión.
+
+Los papers se identifican por la clave del almacén de PDFs (`store_key`), así que el
+texto extraído de un PDF se asocia a su registro aunque lleguen por caminos distintos.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from ..config import LOCAL_INDEX_ENABLED, LOCAL_INDEX_PATH, LOCAL_INDEX_MAX_BODY_CHARS
+from .pdf_store import store_key
+
+logger = logging.getLogger(__name__)
+
+# Pesos BM25 por columna: título, resumen, texto completo
+_BM25_WEIGHTS = (10.0, 4.0, 1.0)
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def index_key(record: Dict[str, Any]) -> Optional[str]:
+    """Clave del paper: la del almacén de PDFs si tiene PDF; si no, la de su URL o su id."""
+    for field in ("pdf_url", "url"):
+        if record.get(field):
+            return store_key(record[field])[0]
+    return f"id:{record['id']}" if record.get("id") else None
+
+
+def fts_query(query: str) -> str:
+    """
+    Traduce una consulta libre a la sintaxis de FTS5: cada término entre comillas (para
+    que los operadores y la puntuación del usuario no rompan la consulta), unidos con OR.
+    BM25 ya ordena primero los documentos que contienen más términos.
+    """
+    terms = list(dict.fromkeys(term.lower() for term in _TERM_RE.findall(query)))
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class LocalPaperIndex:
+    """
+    Tabla `papers` con el registro completo (JSON) de cada paper y tabla virtual FTS5
+    `papers_fts` con sus textos; la fila FTS de un paper tiene su mismo rowid. Si SQLite no tiene FTS5 o la base no se puede abrir, el
+    índice queda desactivado y las búsquedas locales devuelven vacío.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_PATH, max_body_chars: int = LOCAL_INDEX_MAX_BODY_CHARS):
+        self.path = path
+        self.max_body_chars = max_body_chars
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Abre (o crea) la base de datos del índice."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS papers ("
+                "id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, record TEXT NOT NULL, "
+                "has_fulltext INTEGER NOT NULL DEFAULT 0, indexed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5("
+                "title, abstract, body, tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+            conn.commit()
+            return conn
+        except Exception as e:
+            logger.warning(f"No se pudo abrir el índice local en {self.path}: {e}")
+            return None
+
+    # --- Inserción incremental ---
+
+    def add_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Indexa (o actualiza) los registros por título y resumen, conservando el texto
+        completo que ya tuvieran. Devuelve cuántos se indexaron.
+        """
+        if self._conn is None:
+            return 0
+        rows = []
+        for record in records:
+            key = index_key(record)
+            if key and record.get("title"):
+                rows.append((key, record))
+        if not rows:
+            return 0
+        now = time.time()
+        with self._lock:
+            try:
+                for key, record in rows:
+                    self._conn.execute(
+                        "INSERT INTO papers (key, record, indexed_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET record = excluded.record, indexed_at = excluded.indexed_at",
+                        (key, json.dumps(record, ensure_ascii=False), now),
+                    )
+                    rowid = self._conn.execute("SELECT id FROM papers WHERE key = ?", (key,)).fetchone()[0]
+                    self._replace_fts(rowid, record.get("title", ""), record.get("abstract", ""), self._body(rowid))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                logger.warning(f"Error indexando registros en el índice local: {e}")
+                return 0
+        return len(rows)
+
+    def add_fulltext(self, pdf_url: str, text: str) -> bool:
+        """Añade el texto extraído del PDF al paper de `pdf_url`, si está indexado."""
+        if self._conn is None or not text or "[ERROR]" in text:
+            return False
+        key, _ = store_key(pdf_url)
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT id, record FROM papers WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return False
+                rowid, record = row[0], json.loads(row[1])
+                self._replace_fts(rowid, record.get("title", ""), record.get("abstract", ""), text[:self.max_body_chars])
+                self._conn.execute("UPDATE papers SET has_fulltext = 1 WHERE id = ?", (rowid,))
+                self._conn.commit()
+                return True
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                logger.warning(f"Error indexando el texto completo de {pdf_url}: {e}")
+                return False
+
+    def _body(self, rowid: int) -> str:
+        row = self._conn.execute("SELECT body FROM papers_fts WHERE rowid = ?", (rowid,)).fetchone()
+        return row[0] if row and row[0] else ""
+
+    def _replace_fts(self, rowid: int, title: str, abstract: str, body: str) -> None:
+        self._conn.execute("DELETE FROM papers_fts WHERE rowid = ?", (rowid,))
+        self._conn.execute(
+            "INSERT INTO papers_fts (rowid, title, abstract, body) VALUES (?, ?, ?, ?)",
+            (rowid, title, abstract, body),
+        )
+
+    # --- Búsqueda ---
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Devuelve [(registro, puntuación)] ordenados por BM25 (mayor puntuación = más relevante).
+        """
+        match = fts_query(query)
+        if self._conn is None or not match:
+            return []
+        weights = ", ".join(str(w) for w in _BM25_WEIGHTS)
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    f"SELECT p.record, bm25(papers_fts, {weights}) AS rank "
+                    "FROM papers_fts JOIN papers p ON p.id = papers_fts.rowid "
+                    "WHERE papers_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+                    (match, limit, offset),
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Error buscando en el índice local: {e}")
+                return []
+        # bm25() de SQLite devuelve valores negativos: cuanto menor, mejor
+        return [(json.loads(record), round(-rank, 4)) for record, rank in rows]
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Registros indexados de `keys` (las que no están se omiten)."""
+        if self._conn is None or not keys:
+            return {}
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, record FROM papers WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((key, json.loads(record)) for key, record in rows)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        if self._conn is None:
+            return {"enabled": False}
+        with self._lock:
+            total, fulltext = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(has_fulltext), 0) FROM papers"
+            ).fetchone()
+        return {"enabled": True, "papers": total, "with_fulltext": fulltext}
+
+
+_index: Optional[LocalPaperIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_local_index() -> LocalPaperIndex:
+    """Índice compartido por todo el proceso (se crea en el primer uso)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = LocalPaperIndex()
+        return _index
+
+
+async def index_records(records: List[Dict[str, Any]]) -> int:
+    """Indexa resultados de búsqueda sin bloquear el event loop."""
+    if not LOCAL_INDEX_ENABLED or not records:
+        return 0
+    return await asyncio.to_thread(get_local_index().add_records, records)
+
+
+async def index_fulltext(pdf_url: str, text: str) -> bool:
+    """Añade al índice el texto extraído de un PDF sin bloquear el event loop."""
+    if not LOCAL_INDEX_ENABLED or not pdf_url or not text:
+        return False
+    return await asyncio.to_thread(get_local_index().add_fulltext, pdf_url, text)
+
+
+# Indexar cosechas y PDFs ya descargados desde la línea de comandos:
+#   python -m src.services.local_index --jsonl rag.jsonl --pdf-store
+if __name__ == "__main__":
+    import argparse
+
+    from ..agent_summarizer import extract_full_text_from_pdf
+    from ..scraping.sources import ArxivSource
+    from .pdf_store import pdf_store
+
+    parser = argparse.ArgumentParser(description="Indexa papers en el índice local de texto completo.")
+    parser.add_argument("--jsonl", nargs="*", default=[], help="Ficheros JSONL de agent_arxiv (cosechas)")
+    parser.add_argument("--pdf-store", action="store_true", help="Añadir el texto de los PDFs del almacén")
+    args = parser.parse_args()
+
+    index = get_local_index()
+    for path in args.jsonl:
+        with open(path, encoding="utf-8") as f:
+            records = [ArxivSource.to_record(json.loads(line)).to_dict() for line in f if line.strip()]
+        print(f"[local_index] {index.add_records(records)} registros indexados desde {path}")
+    if args.pdf_store and pdf_store._conn is not None:
+        rows = pdf_store._conn.execute("SELECT url, sha256 FROM pdf_index").fetchall()
+        added = 0
+        for url, sha256 in rows:
+            text = extract_full_text_from_pdf(pdf_store.object_path(sha256))
+            added += index.add_fulltext(url, text)
+        print(f"[local_index] Texto completo añadido a {added} de {len(rows)} PDFs del almacén")
+    print(f"[local_index] {index.stats()}")
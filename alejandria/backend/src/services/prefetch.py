@@ -0,0 +1,101 @@
+"""
+Prefetch especulativo de los mejores resultados de una búsqueda.
+
+Tras `search_completed`, y si el cliente lo pide, los `top_k` primeros PDFs se descargan
+al almacén y se parsean (lo que llena la caché de texto extraído) como trabajos en segundo
+plano. Opcionalmente también se genera su resumen, que queda en la caché de resúmenes.
+Cuando el usuario abre uno de esos papers, /extract-ideas solo paga el tiempo del LLM
+(o nada, si el resumen ya está en caché).
+
+Los trabajos van a nombre de `prefetch:<ws_id>`, no del ws_id: no consumen el límite de
+trabajos del usuario, y una búsqueda nueva (o la expiración de la sesión) los cancela.
+"""
+from typing import Any, Dict, List, Optional
+import logging
+
+from ..agent_summarizer import call_llm_for_summary
+from ..config import PREFETCH_TOP_K
+from ..llm_scheduler import PRIORITY_BATCH
+from .extraction_service import extraction_service
+from .job_queue import job_manager, JobQueueFull, PRIORITY_BACKGROUND
+from .local_index import index_fulltext
+from .pdf_store import pdf_store, store_key
+from .summary_broadcast import summary_broadcaster
+
+logger = logging.getLogger(__name__)
+
+
+def prefetch_owner(ws_id: str) -> str:
+    return f"prefetch:{ws_id}"
+
+
+def top_pdf_urls(results: Dict[str, List[Dict[str, Any]]], top_k: int) -> List[str]:
+    """
+    Primeras `top_k` URLs de PDF distintas por `relevance` (comparable entre fuentes tras el
+    re-ranking). A igual relevancia se alterna entre fuentes en su orden de ranking.
+    """
+    queues = [list(articles or []) for articles in results.values()]
+    interleaved = [
+        articles[rank]
+        for rank in range(max((len(articles) for articles in queues), default=0))
+        for articles in queues
+        if rank < len(articles)
+    ]
+    interleaved.sort(key=lambda article: article.get("relevance") or 0.0, reverse=True)
+    urls: List[str] = []
+    seen = set()
+    for article in interleaved:
+        pdf_url = article.get("pdf_url")
+        if not pdf_url:
+            continue
+        key, _ = store_key(pdf_url)
+        if key not in seen:
+            seen.add(key)
+            urls.append(pdf_url)
+            if len(urls) >= top_k:
+                break
+    return urls
+
+
+async def _prefetch(pdf_url: str, summaries: bool) -> None:
+    pdf_path = await pdf_store.fetch(pdf_url)
+    text = await extraction_service.extract(pdf_path)
+    await index_fulltext(pdf_url, text)
+    if not summaries or not text or "[ERROR]" in text:
+        return
+    key, _ = store_key(pdf_url)
+    # Por el broadcaster: si el usuario abre el paper mientras se genera, se une a esta generación
+    await summary_broadcaster.run(
+        key,
+        lambda generation: call_llm_for_summary(text, sender=generation, priority=PRIORITY_BATCH),
+    )
+
+
+async def schedule_prefetch(ws_id: str, results: Dict[str, List[Dict[str, Any]]], top_k: Optional[int] = None, summaries: bool = False) -> List[str]:
+    """
+    Cancela el prefetch anterior del cliente y encola el de los nuevos resultados.
+    Devuelve los ids de los trabajos encolados.
+    """
+    await cancel_prefetch(ws_id)
+    job_ids = []
+    for pdf_url in top_pdf_urls(results, PREFETCH_TOP_K if top_k is None else top_k):
+        try:
+            job = await job_manager.submit(
+                lambda pdf_url=pdf_url: _prefetch(pdf_url, summaries),
+                owner=prefetch_owner(ws_id),
+                priority=PRIORITY_BACKGROUND,
+                description=f"prefetch {pdf_url}",
+                metadata={"pdf_url": pdf_url, "prefetch": True},
+            )
+        except JobQueueFull:
+            logger.info(f"[prefetch] Cola llena: se omite el resto del prefetch de {ws_id}")
+            break
+        job_ids.append(job.id)
+    if job_ids:
+        logger.info(f"[prefetch] {len(job_ids)} PDFs en prefetch para {ws_id}")
+    return job_ids
+
+
+async def cancel_prefetch(ws_id: str) -> int:
+    """Cancela el prefetch (en cola o en curso) de un cliente."""
+    return await job_manager.cancel_owner(prefetch_owner(ws_id))
@@ -0,0 +1,153 @@
+"""
+Caché de resultados de búsqueda con TTL, expulsión LRU y deduplicación single-flight.
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import copy
+import logging
+import time
+
+from ..config import SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+class FetchAbandoned(Exception):
+    """La corrutina que hacía una operación compartida se canceló antes de terminarla."""
+
+
+def normalize_search_key(
+    query: str,
+    type_query: str = "all",
+    start: int = 0,
+    max_results: int = 10,
+    sortby: str = "relevance",
+    sortorder: str = "descending",
+    sources: Optional[list] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> Tuple:
+    """
+    Construye la clave canónica de una búsqueda: consulta con espacios colapsados, enteros
+    normalizados, fuentes ordenadas y las opciones de postprocesado (que cambian los
+    resultados) ordenadas por nombre. La consulta conserva mayúsculas y minúsculas: en arXiv
+    los operadores (AND, OR, ANDNOT) solo lo son en mayúsculas.
+    """
+    canonical_query = " ".join(str(query).split())
+    return (
+        canonical_query,
+        str(type_query).strip().lower(),
+        int(start),
+        int(max_results),
+        str(sortby).strip(),
+        str(sortorder).strip().lower(),
+        tuple(sorted(sources or [])),
+        tuple(sorted((options or {}).items())),
+    )
+
+
+class SearchResultCache:
+    """
+    Caché en memoria para los resultados de búsqueda.
+
+    - Cada entrada expira tras `ttl` segundos.
+    - Cuando se supera `max_entries` se expulsa la entrada usada hace más tiempo.
+    - Las búsquedas idénticas concurrentes comparten una única llamada al origen.
+    """
+
+    def __init__(self, ttl: float = SEARCH_CACHE_TTL, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Devuelve una copia del valor cacheado y vigente, o None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guarda una copia del valor y aplica la política LRU."""
+        self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = lambda value: True,
+    ) -> Tuple[Any, str]:
+        """
+        Devuelve (valor, origen) donde origen es "hit", "coalesced" o "miss".
+        En un fallo solo la primera corrutina ejecuta `fetch`; las demás esperan su resultado.
+        Si esa primera se cancela, una de las que esperaban repite la búsqueda en su lugar.
+        """
+        while True:
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached, "hit"
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                value = await asyncio.shield(inflight)
+            except FetchAbandoned:
+                # Se canceló quien hacía la búsqueda: volver a empezar (y hacerla, si nadie más la hace)
+                continue
+            self.coalesced += 1
+            return copy.deepcopy(value), "coalesced"
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            # No cancelar el futuro: la cancelación llegaría a clientes que no la pidieron
+            future.set_exception(FetchAbandoned())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evitar el aviso "exception was never retrieved" si nadie esperaba
+            future.exception()
+            raise
+        else:
+            if should_cache(value):
+                self.set(key, value)
+            future.set_result(value)
+            return value, "miss"
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de la caché."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
@@ -1,9 +1,15 @@
 """
 Servicio de búsqueda que coordina los diferentes agentes de búsqueda.
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+import asyncio
+import functools
 import logging
+from ..config import SEARCH_SEMANTIC_RERANK, SEARCH_DEDUP, SEARCH_SEMANTIC_DEDUP
 from ..scraping.source_processor import SourceProcessor
+from .embeddings import refine_results
+from .local_index import index_records
+from .search_cache import SearchResultCache, normalize_search_key
 
 logger = logging.getLogger(__name__)
 
@@ -15,8 +21,23 @@ class SearchService:
     def __init__(self):
         """Inicializa el servicio de búsqueda."""
         self.source_processor = SourceProcessor()
+        self.result_cache = SearchResultCache()
+        self._background_tasks = set()
         logger.info("SearchService inicializado")
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Devuelve los contadores de la caché de resultados."""
+        return self.result_cache.stats()
     
+    def _index_results(self, results: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Añade al índice local, en segundo plano, los resultados de las fuentes remotas."""
+        records = [record for source, records in results.items() if source != "local" for record in records]
+        if not records:
+            return
+        task = asyncio.create_task(index_records(records))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
     async def search(
         self,
         query: str,
@@ -26,51 +47,98 @@ class SearchService:
         sortby: str = "relevance",
         type_query: str = "all",
         start: int = 0,
-        sortorder: str = "descending"
+        sortorder: str = "descending",
+        semantic: Optional[bool] = None,
+        dedup: Optional[bool] = None,
+        semantic_dedup: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
-        Realiza una búsqueda en Arxiv.
+        Realiza una búsqueda en las fuentes indicadas (por defecto, solo Arxiv).
         
         Args:
             query: Término de búsqueda
-            sources: No utilizado, se mantiene por compatibilidad
+            sources: Fuentes a consultar en paralelo (p. ej. ['arxiv', 'tds'])
             websocket: Objeto WebSocket opcional para actualizaciones en tiempo real
             max_results: Número máximo de resultados a retornar
             sortby: Criterio de ordenamiento de los resultados
             type_query: Tipo de consulta a realizar
             start: Índice de inicio para los resultados
             sortorder: Orden de clasificación (ascendente/descendente)
+            semantic: Mezclar la similitud de embeddings en `relevance` (por defecto SEARCH_SEMANTIC_RERANK)
+            dedup: Colapsar resultados duplicados entre fuentes (por defecto SEARCH_DEDUP)
+            semantic_dedup: Detectar también duplicados por similitud de embeddings (por defecto SEARCH_SEMANTIC_DEDUP)
             
         Returns:
-            Dict con los resultados de la búsqueda en Arxiv
+            Dict con los resultados de la búsqueda por fuente
         """
         from datetime import datetime  # Mover al inicio del archivo
         
-        # Forzar solo búsqueda en Arxiv
-        sources = ['arxiv']
-        logger.info(f"Iniciando búsqueda para: '{query}' en Arxiv")
+        sources = sources or ['arxiv']
+        semantic = SEARCH_SEMANTIC_RERANK if semantic is None else bool(semantic)
+        dedup = SEARCH_DEDUP if dedup is None else bool(dedup)
+        semantic_dedup = dedup and (SEARCH_SEMANTIC_DEDUP if semantic_dedup is None else bool(semantic_dedup))
+        logger.info(f"Iniciando búsqueda para: '{query}' en {sources}")
         logger.info(f"[search_service] Recibido: query={query}, max_results={max_results}, sortby={sortby}, type_query={type_query}, start={start}, sortorder={sortorder}")
         
         try:
-            # Procesar solo Arxiv con soporte para websocket
-            results = await self.source_processor.process_sources(
+            cache_key = normalize_search_key(
                 query=query,
-                sources=sources,
-                websocket=websocket,
-                max_results=max_results,
-                sortby=sortby,
                 type_query=type_query,
                 start=start,
-                sortorder=sortorder
+                max_results=max_results,
+                sortby=sortby,
+                sortorder=sortorder,
+                sources=sources,
+                options={"semantic": semantic, "dedup": dedup, "semantic_dedup": semantic_dedup}
             )
-            
-            logger.info(f"Búsqueda completada exitosamente con {sum(len(r) for r in results.values())} resultados")
+            postprocess = None
+            if semantic or dedup:
+                postprocess = functools.partial(
+                    refine_results, query, semantic=semantic, dedup=dedup, semantic_dedup=semantic_dedup,
+                    reorder=sortby == "relevance"
+                )
+
+            # Fuentes que agotaron su plazo o fallaron en la búsqueda hecha por esta corrutina
+            incomplete = set()
+
+            # Procesar las fuentes con soporte para websocket (solo en un fallo de caché)
+            async def fetch():
+                results = await self.source_processor.process_sources(
+                    query=query,
+                    sources=sources,
+                    websocket=websocket,
+                    max_results=max_results,
+                    sortby=sortby,
+                    type_query=type_query,
+                    start=start,
+                    sortorder=sortorder,
+                    postprocess=postprocess,
+                    incomplete=incomplete
+                )
+                self._index_results(results)
+                return results
+
+            # No se cachean búsquedas vacías ni parciales (alguna fuente agotó su plazo o falló),
+            # ni las del índice local, que es rápido y cambia con cada paper indexado
+            results, origin = await self.result_cache.get_or_fetch(
+                cache_key,
+                fetch,
+                should_cache=lambda value: (
+                    "local" not in sources and not incomplete and sum(len(r) for r in value.values()) > 0
+                )
+            )
+            if origin != "miss":
+                # Resultados servidos desde caché o compartidos con una búsqueda idéntica en curso
+                await self.source_processor.send_cached_results(results, websocket)
+
+            logger.info(f"Búsqueda completada exitosamente con {sum(len(r) for r in results.values())} resultados (caché: {origin})")
             
             return {
                 "status": "success",
                 "query": query,
                 "results": results,
-                "sources": sources
+                "sources": sources,
+                "cache": origin
             }
             
         except Exception as e:
@@ -0,0 +1,130 @@
+"""
+Envío de streams del LLM por WebSocket a través de una cola.
+
+Los productores (la corrutina que lee el stream del LLM, o un thread mediante
+`push_threadsafe`) solo encolan fragmentos. Una única tarea en el event loop del
+servidor, dueña del socket, los agrupa por tiempo o tamaño y los envía como mensajes
+`llm_stream` que llevan solo el texto nuevo. Los eventos estructurados (ver json_stream)
+se envían como mensajes `llm_stream_event`, en orden respecto al texto.
+"""
+from typing import Any, Dict, Optional
+import asyncio
+import functools
+import logging
+
+from ..config import WS_STREAM_FLUSH_INTERVAL, WS_STREAM_MAX_BATCH_CHARS
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de stream en la cola
+_DONE = object()
+
+
+class _Event(dict):
+    """Evento estructurado en la cola (se envía tal cual, sin agrupar)."""
+
+
+class WebSocketStreamSender:
+    """
+    Puente productor/consumidor entre un stream del LLM y un WebSocket.
+
+    - `push` / `finish` desde el event loop; `push_threadsafe` / `finish_threadsafe` desde otros threads.
+    - Los fragmentos se agrupan hasta `flush_interval` segundos o `max_batch_chars` caracteres.
+    - Los bytes enviados crecen linealmente con la salida: cada mensaje lleva solo su lote.
+    """
+
+    def __init__(
+        self,
+        ws,
+        ws_id: Optional[str],
+        article_id: Optional[str] = None,
+        flush_interval: float = WS_STREAM_FLUSH_INTERVAL,
+        max_batch_chars: int = WS_STREAM_MAX_BATCH_CHARS,
+    ):
+        self.ws = ws
+        self.ws_id = ws_id
+        self.article_id = article_id
+        self.flush_interval = flush_interval
+        self.max_batch_chars = max_batch_chars
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._done_extra: Dict[str, Any] = {}
+        self._task = self._loop.create_task(self._run())
+        self.frames_sent = 0
+        self.chars_sent = 0
+
+    def push(self, content: str) -> None:
+        if content:
+            self._queue.put_nowait(content)
+
+    def push_threadsafe(self, content: str) -> None:
+        if content:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, content)
+
+    def event(self, data: Dict[str, Any]) -> None:
+        """Encola un evento estructurado (p. ej. un elemento de main_ideas ya completo)."""
+        self._queue.put_nowait(_Event(data))
+
+    def event_threadsafe(self, data: Dict[str, Any]) -> None:
+        self._loop.call_soon_threadsafe(self.event, data)
+
+    def finish(self, **extra) -> None:
+        """Marca el fin del stream; `extra` se añade al mensaje llm_stream_done."""
+        self._done_extra = extra
+        self._queue.put_nowait(_DONE)
+
+    def finish_threadsafe(self, **extra) -> None:
+        self._loop.call_soon_threadsafe(functools.partial(self.finish, **extra))
+
+    async def wait_closed(self) -> None:
+        """Espera a que se hayan enviado todos los lotes y el llm_stream_done."""
+        await self._task
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+    async def _run(self) -> None:
+        item = None
+        while True:
+            if item is None:
+                item = await self._queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Event):
+                await self._send({"type": "llm_stream_event", **item})
+                item = None
+                continue
+            batch = [item]
+            item = None
+            size = len(batch[0])
+            deadline = self._loop.time() + self.flush_interval
+            # Agrupar el texto que llegue hasta el plazo, hasta llenar el lote o hasta un evento/fin
+            while size < self.max_batch_chars:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    queued = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if queued is _DONE or isinstance(queued, _Event):
+                    item = queued
+                    break
+                batch.append(queued)
+                size += len(queued)
+            await self._send_batch("".join(batch))
+        await self._send({"type": "llm_stream_done", **self._done_extra})
+
+    async def _send_batch(self, content: str) -> None:
+        await self._send({"type": "llm_stream", "content": content})
+        self.frames_sent += 1
+        self.chars_sent += len(content)
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        message["ws_id"] = self.ws_id
+        if self.article_id is not None:
+            message["article_id"] = self.article_id
+        try:
+            await self.ws.send_json(message)
+        except Exception as e:
+            logger.warning(f"[stream_sender] Error enviando por WebSocket ({self.ws_id}): {e}")
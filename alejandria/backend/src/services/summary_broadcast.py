@@ -0,0 +1,171 @@
+"""
+Coalescencia de resúmenes concurrentes del mismo paper.
+
+Cuando varios clientes piden a la vez el resumen del mismo PDF, solo la primera petición
+descarga, parsea y llama al LLM. Las demás se suscriben a esa generación: reciben de golpe
+el texto ya generado (el prefijo) y a partir de ahí los mismos fragmentos que el resto.
+Cada suscriptor tiene su propio `WebSocketStreamSender`, así que los mensajes llevan su
+ws_id/article_id y se agrupan igual que un stream normal.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+from .stream_sender import WebSocketStreamSender
+
+logger = logging.getLogger(__name__)
+
+
+class SharedGeneration:
+    """
+    Una generación del LLM repartida entre varios WebSockets.
+
+    Expone la misma interfaz que `WebSocketStreamSender` (push / event / finish /
+    cancel / wait_closed), así que se pasa como `sender` al agente de resumen.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.chunks: List[str] = []
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers: List[Tuple[Optional[str], WebSocketStreamSender]] = []
+        self.done_extra: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def subscribe(self, ws, ws_id: Optional[str], article_id: Optional[str] = None) -> WebSocketStreamSender:
+        """Añade un suscriptor y le reenvía el prefijo ya generado y los eventos emitidos."""
+        sender = WebSocketStreamSender(ws, ws_id, article_id=article_id)
+        if self.chunks:
+            sender.push("".join(self.chunks))
+        for event in self.events:
+            sender.event(event)
+        if self.done_extra is not None:
+            sender.finish(**self.done_extra)
+        self.subscribers.append((ws_id, sender))
+        return sender
+
+    def unsubscribe(self, ws_id: Optional[str], sender: Optional[WebSocketStreamSender] = None) -> None:
+        """
+        Quita los suscriptores de un ws_id (o solo `sender`). Si no queda nadie
+        escuchando, la generación se cancela.
+        """
+        remaining = []
+        for owner, subscriber in self.subscribers:
+            if owner == ws_id and (sender is None or subscriber is sender):
+                subscriber.cancel()
+            else:
+                remaining.append((owner, subscriber))
+        self.subscribers = remaining
+        if not self.subscribers and self.task is not None and not self.task.done():
+            logger.info(f"[summary_broadcast] Sin suscriptores para {self.key}: generación cancelada")
+            self.task.cancel()
+
+    # --- Interfaz de WebSocketStreamSender ---
+
+    def push(self, content: str) -> None:
+        if not content:
+            return
+        self.chunks.append(content)
+        for _, sender in self.subscribers:
+            sender.push(content)
+
+    def event(self, data: Dict[str, Any]) -> None:
+        self.events.append(data)
+        for _, sender in self.subscribers:
+            sender.event(data)
+
+    def finish(self, **extra) -> None:
+        self.done_extra = extra
+        for _, sender in self.subscribers:
+            sender.finish(**extra)
+
+    def cancel(self) -> None:
+        for _, sender in self.subscribers:
+            sender.cancel()
+
+    async def wait_closed(self) -> None:
+        await asyncio.gather(*(sender.wait_closed() for _, sender in self.subscribers), return_exceptions=True)
+
+
+Producer = Callable[[SharedGeneration], Awaitable[Any]]
+
+
+class SummaryBroadcaster:
+    """Una generación en curso por clave de paper; las peticiones repetidas se suscriben a ella."""
+
+    def __init__(self):
+        self._inflight: Dict[str, SharedGeneration] = {}
+        self.started = 0
+        self.joined = 0
+
+    def join(self, key: str, ws, ws_id: Optional[str], article_id: Optional[str] = None) -> Optional[SharedGeneration]:
+        """Suscribe al cliente a la generación en curso de `key`, si la hay."""
+        generation = self._inflight.get(key)
+        if generation is None:
+            return None
+        generation.subscribe(ws, ws_id, article_id=article_id)
+        self.joined += 1
+        logger.info(f"[summary_broadcast] {ws_id} se une a la generación de {key} ({len(generation.subscribers)} suscriptores)")
+        return generation
+
+    async def run(self, key: str, produce: Producer, ws=None, ws_id: Optional[str] = None, article_id: Optional[str] = None) -> Any:
+        """
+        Ejecuta `produce(generation)` una sola vez por clave y devuelve su resultado.
+        Si ya hay una generación en curso, el cliente se suscribe y espera a que termine.
+        Cancelar esta corrutina solo da de baja al cliente; la generación sigue mientras
+        queden suscriptores. Sin `ws` (p. ej. el prefetch) no hay suscripción: la
+        generación solo llena la caché, y los clientes que lleguen se unen a ella.
+        """
+        generation = self._inflight.get(key)
+        if generation is None:
+            generation = SharedGeneration(key)
+            sender = generation.subscribe(ws, ws_id, article_id=article_id) if ws is not None else None
+            self._inflight[key] = generation
+            generation.task = asyncio.create_task(self._produce(generation, produce))
+            # Nadie más que los suscriptores en `run` recoge el resultado: evitar avisos de excepción no recuperada
+            generation.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self.started += 1
+        elif ws is not None:
+            sender = generation.subscribe(ws, ws_id, article_id=article_id)
+            self.joined += 1
+        else:
+            sender = None
+        try:
+            return await asyncio.shield(generation.task)
+        except asyncio.CancelledError:
+            if sender is not None:
+                generation.unsubscribe(ws_id, sender)
+            elif not generation.subscribers and not generation.task.done():
+                generation.task.cancel()
+            raise
+
+    async def _produce(self, generation: SharedGeneration, produce: Producer) -> Any:
+        try:
+            return await produce(generation)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Fallos antes del stream (descarga, parseo): cerrar el stream de todos los suscriptores
+            if generation.done_extra is None:
+                generation.finish(error=str(e))
+                await generation.wait_closed()
+            raise
+        finally:
+            if self._inflight.get(generation.key) is generation:
+                del self._inflight[generation.key]
+
+    def unsubscribe_owner(self, ws_id: str) -> None:
+        """Da de baja a un ws_id de todas las generaciones (p. ej. al expirar su sesión)."""
+        for generation in list(self._inflight.values()):
+            generation.unsubscribe(ws_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "subscribers": sum(len(g.subscribers) for g in self._inflight.values()),
+            "started": self.started,
+            "joined": self.joined,
+        }
+
+
+summary_broadcaster = SummaryBroadcaster()
@@ -0,0 +1,121 @@
+"""
+Sesiones del protocolo WebSocket v2 de /ws/search.
+
+Cada conexión tiene una sesión (identificada por su ws_id) que sobrevive al socket:
+
+- Los mensajes llevan un número de secuencia (`seq`) y se guardan en un buffer acotado.
+- Si el cliente se reconecta y envía `{"type": "resync", "ws_id", "last_seq"}`, la sesión
+  se asocia al nuevo socket y se reenvían los mensajes posteriores a `last_seq`.
+- Mientras está desconectada, los mensajes se siguen numerando y guardando.
+- Codificación negociada con `?encoding=msgpack` (si el paquete está instalado) o JSON.
+
+Los mensajes de control (`protocol`, `ws_id`, `resync_failed` y el `acknowledge` de un
+`resync`) no llevan `seq`.
+"""
+from collections import deque
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+
+from fastapi import WebSocket
+
+from ..config import WS_PROTOCOL_VERSION, WS_RESYNC_BUFFER_FRAMES
+
+try:
+    import msgpack
+except ImportError:  # codificación binaria opcional
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Codificación a usar para la conexión según la pedida por el cliente."""
+    if requested == ENCODING_MSGPACK and msgpack is not None:
+        return ENCODING_MSGPACK
+    return ENCODING_JSON
+
+
+class WsSession:
+    """
+    Sesión de un cliente de /ws/search. Expone `send_json` como un WebSocket, así que
+    se pasa en lugar del socket al resto del backend (búsqueda, resúmenes en streaming).
+    """
+
+    def __init__(self, ws_id: str, websocket: WebSocket, encoding: str = ENCODING_JSON, buffer_frames: int = WS_RESYNC_BUFFER_FRAMES):
+        self.ws_id = ws_id
+        self.websocket: Optional[WebSocket] = websocket
+        self.encoding = encoding
+        self.seq = 0
+        self._log: deque = deque(maxlen=buffer_frames)
+        self._lock = asyncio.Lock()
+        self.expiry: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.websocket is not None
+
+    async def send_json(self, data: Dict[str, Any]) -> None:
+        """Numera, guarda y envía un mensaje (si hay socket asociado)."""
+        async with self._lock:
+            self.seq += 1
+            frame = {**data, "seq": self.seq}
+            self._log.append(frame)
+            if self.websocket is not None:
+                await self._write(frame)
+
+    async def send_control(self, data: Dict[str, Any]) -> None:
+        """Envía un mensaje de control sin numerar ni guardar."""
+        async with self._lock:
+            if self.websocket is not None:
+                await self._write(data)
+
+    async def hello(self) -> None:
+        await self.send_control({
+            "type": "protocol",
+            "version": WS_PROTOCOL_VERSION,
+            "encoding": self.encoding,
+        })
+
+    async def _write(self, frame: Dict[str, Any]) -> None:
+        websocket = self.websocket
+        try:
+            if self.encoding == ENCODING_MSGPACK:
+                await websocket.send_bytes(msgpack.packb(frame, default=str))
+            else:
+                await websocket.send_json(frame)
+        except Exception as e:
+            # El socket ya no sirve: los mensajes siguientes quedan en el buffer para el resync
+            logger.warning(f"[WS:{self.ws_id}] Error enviando mensaje {frame.get('seq')}: {e}")
+            if self.websocket is websocket:
+                self.websocket = None
+
+    def detach(self) -> None:
+        self.websocket = None
+
+    async def resume(self, websocket: WebSocket, last_seq: int, encoding: Optional[str] = None) -> bool:
+        """
+        Asocia la sesión a un nuevo socket y reenvía los mensajes posteriores a `last_seq`.
+        Devuelve False si parte de esos mensajes ya no estaba en el buffer.
+        """
+        async with self._lock:
+            self.websocket = websocket
+            if encoding:
+                self.encoding = encoding
+            oldest = self._log[0]["seq"] if self._log else self.seq + 1
+            complete = oldest <= last_seq + 1
+            await self._write({
+                "type": "ws_id",
+                "ws_id": self.ws_id,
+                "resumed": True,
+                "complete": complete,
+                "last_seq": self.seq,
+            })
+            for frame in self._log:
+                if frame["seq"] > last_seq:
+                    await self._write(frame)
+            logger.info(f"[WS:{self.ws_id}] Sesión reanudada desde seq {last_seq} (actual {self.seq})")
+            return complete
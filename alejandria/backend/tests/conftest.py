@@ -0,0 +1,5 @@
+"""Configuración de pytest: los tests importan el paquete `src` del backend."""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
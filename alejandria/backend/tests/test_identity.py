@@ -0,0 +1,72 @@
+"""Tests de la identidad canónica de papers (src/scraping/identity.py)."""
+import pytest
+
+from src.scraping.identity import (
+    PaperIndex,
+    normalize_url,
+    paper_identity,
+    paper_key,
+    parse_arxiv_id,
+    parse_doi,
+)
+
+
+@pytest.mark.parametrize("text, value, version", [
+    ("2401.01234", "2401.01234", None),
+    ("2401.01234v2", "2401.01234", 2),
+    ("arXiv:2401.01234v3", "2401.01234", 3),
+    ("1501.0001", "1501.0001", None),
+    ("http://arxiv.org/abs/2401.01234v2", "2401.01234", 2),
+    ("https://arxiv.org/pdf/2401.01234v2.pdf", "2401.01234", 2),
+    ("https://export.arxiv.org/abs/2401.01234/", "2401.01234", None),
+    ("10.48550/arXiv.2401.01234", "2401.01234", None),
+    ("https://doi.org/10.48550/arXiv.2401.01234v1", "2401.01234", 1),
+    ("hep-th/9901001v1", "hep-th/9901001", 1),
+    ("math.GT/0309136", "math.GT/0309136", None),
+    ("https://arxiv.org/abs/hep-th/9901001", "hep-th/9901001", None),
+])
+def test_arxiv_id_forms(text, value, version):
+    identity = parse_arxiv_id(text)
+    assert (identity.scheme, identity.value, identity.version) == ("arxiv", value, version)
+
+
+@pytest.mark.parametrize("text", ["", "no es un id", "https://example.org/abs/2401.01234", "2401.123"])
+def test_not_arxiv(text):
+    assert parse_arxiv_id(text) is None
+
+
+def test_doi_and_url_normalization():
+    assert parse_doi("https://doi.org/10.1145/3292500.3330701.").key == "doi:10.1145/3292500.3330701"
+    assert normalize_url("https://www.Example.org/paper/#sec").key == "url:example.org/paper"
+
+
+def test_all_forms_share_one_key():
+    records = [
+        {"id": "http://arxiv.org/abs/2401.01234v2"},
+        {"pdf_url": "https://arxiv.org/pdf/2401.01234v1.pdf"},
+        {"doi": "10.48550/arXiv.2401.01234"},
+    ]
+    assert {paper_key(r) for r in records} == {"arxiv:2401.01234"}
+    assert paper_identity({"title": "sin identificadores"}) is None
+
+
+def test_index_keeps_newest_version_and_finds_it_by_any_key():
+    index = PaperIndex()
+    v1 = {"id": "http://arxiv.org/abs/2401.01234v1", "doi": "10.1000/xyz"}
+    v2 = {"id": "http://arxiv.org/abs/2401.01234v2"}
+    assert index.add(v1) == (v1, True)
+    assert index.add(v2) == (v2, False)
+    assert index.add(v1) == (v2, False)
+    assert index.get("2401.01234") is v2
+    assert index.get("https://doi.org/10.1000/XYZ") is v2
+    assert len(index) == 1
+
+
+def test_index_evicts_least_recently_used():
+    index = PaperIndex(max_entries=2)
+    a, b, c = ({"id": f"2401.0000{i}"} for i in range(3))
+    index.add(a)
+    index.add(b)
+    index.get(a)
+    index.add(c)
+    assert a in index and c in index and b not in index
@@ -0,0 +1,60 @@
+"""Tests de la extracción incremental de JSON (src/json_stream.py)."""
+import json
+
+import pytest
+
+from src.json_stream import JSONStreamExtractor, extract_json
+
+SUMMARY = {
+    "title": "Attention Is All You Need",
+    "main_ideas": ["Self-attention", "Sin recurrencia, {ni} \"convoluciones\""],
+    "year": 2017,
+}
+
+
+def feed_in_chunks(text, size):
+    extractor = JSONStreamExtractor()
+    events = []
+    for i in range(0, len(text), size):
+        events += extractor.feed(text[i:i + size])
+    return extractor, events
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_same_events_for_any_chunk_split(size):
+    text = "<think>razonando {no es JSON}</think>\nRespuesta: " + json.dumps(SUMMARY, ensure_ascii=False)
+    extractor, events = feed_in_chunks(text, size)
+    assert extractor.result == SUMMARY
+    assert events == [
+        {"event": "field", "key": "title", "value": SUMMARY["title"]},
+        {"event": "item", "key": "main_ideas", "index": 0, "value": "Self-attention"},
+        {"event": "item", "key": "main_ideas", "index": 1, "value": SUMMARY["main_ideas"][1]},
+        {"event": "field", "key": "year", "value": 2017},
+        {"event": "object", "value": SUMMARY},
+    ]
+
+
+@pytest.mark.parametrize("split", range(1, len("<think>")))
+def test_think_tag_split_between_chunks(split):
+    text = '<think>{"a": 1}</think>{"b": 2}'
+    extractor = JSONStreamExtractor()
+    extractor.feed(text[:split])
+    extractor.feed(text[split:])
+    assert extractor.result == {"b": 2}
+
+
+def test_invalid_object_is_skipped():
+    assert extract_json('{no json} y luego {"ok": true}') == {"ok": True}
+
+
+def test_default_is_copied_when_there_is_no_object():
+    default = {"main_ideas": []}
+    result = extract_json("sin JSON", default=default)
+    assert result == default and result is not default
+
+
+def test_feed_after_done_is_ignored():
+    extractor = JSONStreamExtractor()
+    extractor.feed('{"a": 1}')
+    assert extractor.feed('{"b": 2}') == []
+    assert extractor.result == {"a": 1}
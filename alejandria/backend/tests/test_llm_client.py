@@ -0,0 +1,43 @@
+"""Tests del decodificador SSE del cliente LLM (src/llm_client.py)."""
+import pytest
+
+from src.llm_client import SSEDecoder
+
+STREAM = (
+    ": keep-alive\n\n"
+    'data: {"choices": [{"delta": {"content": "Hola"}}]}\r\n\r\n'
+    "data: línea 1\n"
+    "data: línea 2\n\n"
+    "event: ignored\r"
+    "data:sin espacio\r\r"
+    "data: [DONE]\n\n"
+).encode("utf-8")
+
+EXPECTED = [
+    '{"choices": [{"delta": {"content": "Hola"}}]}',
+    "línea 1\nlínea 2",
+    "sin espacio",
+    "[DONE]",
+]
+
+
+def decode(chunks):
+    decoder = SSEDecoder()
+    events = []
+    for chunk in chunks:
+        events += decoder.feed(chunk)
+    return events + decoder.flush()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 64, len(STREAM)])
+def test_same_events_for_any_chunk_split(size):
+    # Los cortes caen también dentro de caracteres UTF-8 multibyte y entre \r y \n
+    assert decode(STREAM[i:i + size] for i in range(0, len(STREAM), size)) == EXPECTED
+
+
+def test_split_crlf_does_not_end_the_event_early():
+    assert decode([b"data: a\r", b"\ndata: b\r\n\r\n"]) == ["a\nb"]
+
+
+def test_flush_delivers_event_without_trailing_blank_line():
+    assert decode([b"data: final"]) == ["final"]
@@ -0,0 +1,52 @@
+"""Tests del re-ranking BM25 (src/scraping/ranking.py)."""
+import numpy as np
+
+from src.scraping.ranking import bm25_scores, rerank
+
+
+def test_bm25_orders_by_term_matches_and_title_weight():
+    scores = bm25_scores("retrieval augmented", [
+        ("Diffusion models", "image generation"),
+        ("A survey", "retrieval augmented generation"),
+        ("Retrieval augmented generation", "a survey"),
+        ("Retrieval", "nothing else"),
+    ])
+    assert list(np.argsort(-scores)) == [2, 1, 3, 0]
+    assert scores[0] == 0
+
+
+def test_bm25_rarer_terms_weigh_more():
+    docs = [("graph", "common"), ("common", "common"), ("common", "text")]
+    scores = bm25_scores("graph common", docs)
+    assert scores[0] > scores[1]
+
+
+def test_bm25_empty_inputs():
+    assert bm25_scores("", [("a", "b")]).tolist() == [0.0]
+    assert bm25_scores("query", []).size == 0
+
+
+def test_rerank_scores_sources_together():
+    results = {
+        "arxiv": [
+            {"id": "a1", "title": "Diffusion models", "abstract": "images"},
+            {"id": "a2", "title": "Retrieval augmented generation", "abstract": "retrieval for QA"},
+        ],
+        "tds": [
+            {"id": "t1", "title": "Untitled", "abstract": ""},
+            {"id": "t2", "title": "A guide to retrieval", "abstract": "vector search"},
+        ],
+    }
+    merged = rerank("retrieval augmented generation", results)
+    assert [a["id"] for a in merged] == ["a2", "t2", "a1", "t1"]
+    assert [a["id"] for a in results["arxiv"]] == ["a2", "a1"]
+    assert [a["id"] for a in results["tds"]] == ["t2", "t1"]
+    # Normalizada respecto al mejor del lote: solo un 1.0 entre todas las fuentes
+    assert merged[0]["relevance"] == 1.0
+    assert 0 < results["tds"][0]["relevance"] < 1.0
+
+
+def test_rerank_without_reorder_keeps_source_order():
+    results = {"s": [{"title": "other"}, {"title": "match"}]}
+    rerank("match", results, reorder=False)
+    assert [a["title"] for a in results["s"]] == ["other", "match"]
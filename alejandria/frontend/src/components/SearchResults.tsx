@@ -132,6 +132,12 @@ export const SearchResults: React.FC<SearchResultsProps> = ({
           case 'update':
             if (data.status === 'started') {
               setStatus(`Buscando en ${data.source}...`);
+            } else if (data.status === 'partial' && data.results) {
+              // Resultados incrementales: se añaden a medida que llegan
+              setResults(prev => ({
+                ...prev,
+                [data.source]: [...(prev[data.source] || []), ...data.results]
+              }));
             } else if (data.status === 'results' && data.results) {
               setResults(prev => ({
                 ...prev,
@@ -151,6 +157,21 @@ export const SearchResults: React.FC<SearchResultsProps> = ({
               }));
             }
             break;
+          case 'github_status':
+            // Actualización asíncrona del estado de un enlace de GitHub
+            setResults(prev => {
+              const sourceResults = prev[data.source];
+              if (!sourceResults) return prev;
+              return {
+                ...prev,
+                [data.source]: sourceResults.map(article =>
+                  article.id === data.article_id || (data.url && article.url === data.url)
+                    ? { ...article, github_status: data.github_status }
+                    : article
+                )
+              };
+            });
+            break;
           case 'search_started':
             setIsSearching(true);
             setStatus(`Buscando: ${data.query}`);
@@ -70,6 +70,8 @@ const SelectedArticlesPanel = ({
   const [stopRequested, setStopRequested] = useState(false);
   const [open, setOpen] = useState(true);
   const [wsId, setWsId] = useState<string | null>(null);
+  // Estado del trabajo de extracción de cada artículo (cola del backend)
+  const [jobStatus, setJobStatus] = useState<Record<string, any>>({});
   const { ws, send, addMessageHandler, isConnected } = useWebSocket('ws://localhost:8100/ws/search');
 
   // Obtener y guardar el ws_id cuando el WebSocket lo envía
@@ -92,14 +94,25 @@ const SelectedArticlesPanel = ({
             artId = 'default';
           }
           //console.log('[FRONTEND WS] LLM_STREAM Chunk recibido:', data.content, 'para artId:', artId);
+          // Los mensajes llm_stream solo traen el fragmento nuevo: acumularlo
           setStreaming(prev => ({
             ...prev,
-            [String(artId)]: data.full_output
+            [String(artId)]: (prev[String(artId)] || '') + (data.content || '')
           }));
         }
         if (data.type === 'llm_stream_done' && data.ws_id && wsId && data.ws_id === wsId) {
           //console.log('[FRONTEND WS] LLM_STREAM DONE recibido para ws_id:', data.ws_id);
         }
+        if (data.type === 'job_status' && typeof data.article_id === 'string') {
+          const artId: string = data.article_id;
+          setJobStatus(prev => ({ ...prev, [artId]: data }));
+          if (data.status === 'failed') {
+            setResults(prev => ({
+              ...prev,
+              [artId]: { error: data.error || 'Error al extraer ideas.' }
+            }));
+          }
+        }
       } catch (err) {
         //console.error('[FRONTEND WS] Error procesando mensaje:', err, event.data);
       }
@@ -124,59 +137,47 @@ const SelectedArticlesPanel = ({
   // Nuevo: guardar el JSON parseado del streaming final para cada artículo
   const [parsedJson, setParsedJson] = useState<Record<string, any>>({});
 
-  // Cuando termina el streaming (llm_stream_done), intenta parsear el JSON del streaming y lo guarda
+  // El backend extrae el JSON mientras se genera: cada elemento completo llega como llm_stream_event
+  // y el resultado final en el llm_stream_done, así que las ideas se muestran sin esperar al final
   useEffect(() => {
     if (!addMessageHandler) return;
     const handler = (event: MessageEvent) => {
       try {
         const data = typeof event.data === 'string' ? JSON.parse(event.data) : event.data;
-        if (data.type === 'llm_stream_done' && data.ws_id && wsId && data.ws_id === wsId) {
-          // Buscar el artId igual que en el streaming
-          let artId: string = '';
-          if (typeof data.article_id === 'string') {
-            artId = data.article_id;
-          } else if (selectedArticles.length === 1) {
-            artId = selectedArticles[0].id;
-          } else {
-            artId = 'default';
-          }
-          const streamText = streaming[artId];
-          if (streamText) {
-            // Intenta extraer el JSON del texto del streaming
-            let jsonStr = '';
-            let parsed: Record<string, any> | null = null;
-            try {
-              const match = streamText.match(/```(?:json)?\s*([\s\S]*?)\s*```/);
-              if (match) {
-                jsonStr = match[1];
-              } else {
-                const start = streamText.indexOf('{');
-                const end = streamText.lastIndexOf('}');
-                if (start !== -1 && end !== -1 && end > start) {
-                  jsonStr = streamText.slice(start, end + 1);
-                }
-              }
-              if (jsonStr) {
-                parsed = JSON.parse(jsonStr);
-              }
-            } catch (e) {
-              parsed = null;
-            }
-            if (parsed) {
-              setParsedJson(prev => ({
-                ...prev,
-                [artId]: parsed
-              }));
-            }
+        if (!data.ws_id || !wsId || data.ws_id !== wsId) return;
+        if (data.type !== 'llm_stream_event' && data.type !== 'llm_stream_done') return;
+        let artId: string = '';
+        if (typeof data.article_id === 'string') {
+          artId = data.article_id;
+        } else if (selectedArticles.length === 1) {
+          artId = selectedArticles[0].id;
+        } else {
+          artId = 'default';
+        }
+        if (data.type === 'llm_stream_done') {
+          if (data.result) {
+            setParsedJson(prev => ({ ...prev, [artId]: data.result }));
           }
+          return;
         }
+        setParsedJson(prev => {
+          const current = { ...(prev[artId] || {}) };
+          if (data.event === 'item') {
+            const items = Array.isArray(current[data.key]) ? [...current[data.key]] : [];
+            items[data.index] = data.value;
+            current[data.key] = items;
+          } else if (data.event === 'field') {
+            current[data.key] = data.value;
+          }
+          return { ...prev, [artId]: current };
+        });
       } catch (err) {
         // Silenciar errores de parseo
       }
     };
     const remove = addMessageHandler(handler);
     return () => remove();
-  }, [addMessageHandler, wsId, streaming, selectedArticles]);
+  }, [addMessageHandler, wsId, selectedArticles]);
 
   // Eliminar artículo de la selección (sin colapsar el panel)
   const handleRemoveArticle = (id: string) => {
@@ -222,13 +223,16 @@ const SelectedArticlesPanel = ({
                 setStopRequested(false);
                 setOpen(true);
                 setStreaming({});
+                setParsedJson({});
                 setResults({});
+                setJobStatus({});
                 setShowExtraction(true);
                 for (const art of selectedArticles) {
                   if (stopRequested) break;
                   try {
                     const formData = new FormData();
                     formData.append('pdf_url', art.pdf_url || '');
+                    formData.append('article_id', art.id);
                     if (wsId) formData.append('ws_id', wsId);
                     await fetch('http://localhost:8100/extract-ideas', {
                       method: 'POST',
@@ -261,6 +265,11 @@ const SelectedArticlesPanel = ({
               </Typography>
             </AccordionSummary>
             <AccordionDetails>
+              {jobStatus[art.id]?.status === 'queued' && (
+                <Typography variant="caption" color="text.secondary" sx={{ display: 'block', mb: 1 }}>
+                  En cola (posición {jobStatus[art.id].queue_position ?? '?'} de {jobStatus[art.id].queue_depth ?? '?'})
+                </Typography>
+              )}
               {/* Streaming completo: SIEMPRE visible si hay streaming o si showExtraction está activo */}
               {(streaming[art.id] || showExtraction) && (
                 <Box sx={{ mb: 2 }}>
@@ -358,13 +367,16 @@ const SelectedArticlesPanel = ({
                 setStopRequested(false);
                 setOpen(true);
                 setStreaming({});
+                setParsedJson({});
                 setResults({});
+                setJobStatus({});
                 setShowExtraction(true);
                 for (const art of selectedArticles) {
                   if (stopRequested) break;
                   try {
                     const formData = new FormData();
                     formData.append('pdf_url', art.pdf_url || '');
+                    formData.append('article_id', art.id);
                     if (wsId) formData.append('ws_id', wsId);
                     await fetch('http://localhost:8100/extract-ideas', {
                       method: 'POST',
@@ -404,6 +416,11 @@ const SelectedArticlesPanel = ({
             </Typography>
           </AccordionSummary>
           <AccordionDetails>
+            {jobStatus[art.id]?.status === 'queued' && (
+              <Typography variant="caption" color="text.secondary" sx={{ display: 'block', mb: 1 }}>
+                En cola (posición {jobStatus[art.id].queue_position ?? '?'} de {jobStatus[art.id].queue_depth ?? '?'})
+              </Typography>
+            )}
             {/* Streaming completo: SIEMPRE visible si hay streaming o si showExtraction está activo */}
             {(streaming[art.id] || showExtraction) && (
               <Box sx={{ mb: 2 }}>
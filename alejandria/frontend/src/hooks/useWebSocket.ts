@@ -25,12 +25,38 @@ export const useWebSocket = (url: string = 'ws://localhost:8100/ws/search', isTe
   const maxRetries = 10;
   const retryDelay = 2000; // 2 segundos
   const reconnectAttempts = useRef(0);
+  // Protocolo v2: sesión actual y último número de secuencia recibido, para pedir resync al reconectar
+  const sessionId = useRef<string | null>(null);
+  const lastSeq = useRef(0);
+  const resyncPending = useRef(false);
 
   const handleMessage = (event: MessageEvent) => {
     //console.log('Raw WebSocket message:', event.data);
     try {
       const data = typeof event.data === 'string' ? JSON.parse(event.data) : event.data;
       //console.log('Parsed WebSocket message:', data);
+
+      // Mensajes de control del protocolo v2 (sin número de secuencia)
+      if (data.type === 'ws_id') {
+        if (data.resumed) {
+          resyncPending.current = false;
+        } else if (!resyncPending.current) {
+          sessionId.current = data.ws_id;
+          lastSeq.current = 0;
+        }
+      } else if (data.type === 'resync_failed') {
+        resyncPending.current = false;
+        sessionId.current = data.ws_id;
+        lastSeq.current = 0;
+        return;
+      }
+      // Mensajes numerados: descartar duplicados (p. ej. reenviados tras un resync)
+      if (typeof data.seq === 'number') {
+        if (data.seq <= lastSeq.current) {
+          return;
+        }
+        lastSeq.current = data.seq;
+      }
       
       // Notificar a todos los manejadores registrados
       messageHandlers.current.forEach(handler => {
@@ -73,6 +99,11 @@ export const useWebSocket = (url: string = 'ws://localhost:8100/ws/search', isTe
         setReadyState(WebSocket.OPEN);
         setError(null);
         reconnectAttempts.current = 0;
+        // Si había una sesión anterior, pedir los mensajes perdidos durante la desconexión
+        if (sessionId.current) {
+          resyncPending.current = true;
+          ws.send(JSON.stringify({ type: 'resync', ws_id: sessionId.current, last_seq: lastSeq.current }));
+        }
       };
 
       ws.onclose = (event) => {
@@ -13,6 +13,7 @@ from agent_summarizer import summarize_pdf
 from agent_congruence import check_congruence
 from agent_filter import join_ideas
 from agent_manager import AgentManager, download_pdf
+from paper_identity import PaperIndex, paper_key
 
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
 
@@ -77,9 +78,19 @@ def main():
                         art['link_article'] = art['url']
                     
                     art["summary_highlight"] = highlight_text(art.get("summary", ""), query_topic)
-                    
-                    if isinstance(art.get("link_article"), str):
-                        art["link_article"] = art["link_article"].rstrip("/")
+                    # Clave canónica (ID de arXiv sin versión, DOI o URL normalizada) para
+                    # seleccionar y cruzar resultados sin comparar URLs
+                    art["paper_key"] = paper_key(art) or art.get("link_article", "")
+                # Una entrada por paper (p. ej. dos versiones del mismo ID de arXiv): la que
+                # conserva el índice (la versión más reciente), en la posición de la primera
+                paper_index = PaperIndex()
+                for art in articles:
+                    paper_index.add(art)
+                unique = {}
+                for art in articles:
+                    indexed = paper_index.get(art) or art
+                    unique.setdefault(id(indexed), indexed)
+                articles = list(unique.values())
                 st.session_state["articles"] = articles
                 st.success(f"Se encontraron {len(articles)} artículos.")
             except Exception as e:
@@ -89,7 +100,7 @@ def main():
     if st.session_state.get("articles"):
         st.header("2. Seleccionar Artículos")
         df = pd.DataFrame(st.session_state["articles"])
-        df["ID"] = df["link_article"]
+        df["ID"] = df["paper_key"]
         df["Título"] = df["title"]
         df["Publicado"] = df["published"]
         df["GitHub Link"] = df["github_link"].fillna("No link")
@@ -119,12 +130,8 @@ def main():
             st.dataframe(df_selected[["ID", "Título", "Publicado", "GitHub Link", "GitHub Estado", "Resumen"]])
             # Reconstruir la lista de artículos respetando el orden de selección:
             selected_ids = df_selected["ID"].tolist()
-            selected_articles = []
-            for sel_id in selected_ids:
-                for art in st.session_state["articles"]:
-                    if art.get("link_article") == sel_id:
-                        selected_articles.append(art)
-                        break
+            articles_by_key = {art["paper_key"]: art for art in st.session_state["articles"]}
+            selected_articles = [articles_by_key[sel_id] for sel_id in selected_ids if sel_id in articles_by_key]
             st.session_state["selected_articles"] = selected_articles
         else:
             st.session_state["selected_articles"] = []
@@ -146,23 +153,21 @@ def main():
         if st.button("Extraer Ideas y conceptos"):
             # Recuperamos o inicializamos el diccionario de resultados
             pdf_results = st.session_state.get("pdf_results", {})
-            # Obtenemos los IDs (link_article) de la selección actual
-            current_ids = set(art["link_article"] for art in st.session_state["selected_articles"])
+            # Obtenemos los IDs (paper_key) de la selección actual
+            current_ids = set(art["paper_key"] for art in st.session_state["selected_articles"])
             # Si hay resultados previos, eliminamos aquellos que ya no estén en la selección
             for key in list(pdf_results.keys()):
                 if key not in current_ids:
                     del pdf_results[key]
             # Procesamos únicamente los artículos que aún no se han procesado
             for art in st.session_state["selected_articles"]:
-                link = art["link_article"]
+                link = art["paper_key"]
                 if link not in pdf_results:
                     # Usamos 'pdf_url' en lugar de 'pdf_link' para coincidir con el campo del agente de Arxiv
                     pdf_url = art.get("pdf_url")
                     if pdf_url:
                         try:
-                            filename = link.split("/")[-1] + ".pdf"
-                            pdf_folder = "../input/papers"
-                            pdf_path = download_pdf(pdf_url, pdf_folder, filename)
+                            pdf_path = download_pdf(pdf_url)
                             st.info(f"PDF descargado para **{art['title']}** en {pdf_path}")
                             with st.spinner("Pensando..."):
                                 # Mostramos el resultado en un expander para este artículo
@@ -181,7 +186,7 @@ def main():
             # Si ya se han extraído resultados, se muestran en sus expanders correspondientes.
             if "pdf_results" in st.session_state:
                 for art in st.session_state["selected_articles"]:
-                    link = art["link_article"]
+                    link = art["paper_key"]
                     if link in st.session_state["pdf_results"]:
                         with st.expander(f"**{art['title']}**"):
                             st.markdown(st.session_state["pdf_results"][link][0])
@@ -191,7 +196,7 @@ def main():
         st.header("4. Evaluar Congruencia entre Artículos")
         
         # Comparamos la selección actual con la que se usó la última vez para la congruencia.
-        current_ids = set(art["link_article"] for art in st.session_state["selected_articles"])
+        current_ids = set(art["paper_key"] for art in st.session_state["selected_articles"])
         # Si se cambia la selección, reiniciamos el resultado de congruencia para forzar el reprocesamiento.
         if st.session_state.get("congruence_selected_ids", set()) != current_ids:
             st.session_state["congruence_selected_ids"] = current_ids
@@ -229,7 +234,7 @@ def main():
             unified_text += f"**Detalles:** {cong.get('details', '')}\n\n"
             
             for art in st.session_state["selected_articles"]:
-                art_id = art["link_article"]
+                art_id = art["paper_key"]
                 summary = st.session_state["pdf_results"].get(art_id, {})[1]
                 unified_text += f"## {art['title']}\n\n"
                 # Recorrer cada clave del resumen extraído (omitimos 'chain_of_thought' si existe)
@@ -278,7 +283,7 @@ def main():
             # Mapeo de repositorios (opcional)
             github_mapping = {}
             for art in st.session_state["selected_articles"]:
-                key = art["link_article"]
+                key = art["paper_key"]
                 if art.get("github_link") and art.get("github_status") == "OK":
                     github_mapping[key] = art["github_link"]
                 else:
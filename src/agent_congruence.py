@@ -1,8 +1,8 @@
 # agent_congruence.py
 import json
-import requests
-from config import LLM_BASE_URL, LLM_API_KEY, LLM_MODEL, LLM_BASE_URL_OPENAI, LLM_API_KEY_OPENAI, LLM_MODEL_OPENAI
-import re
+from llm_client import llm_client
+from llm_scheduler import PRIORITY_BATCH
+from json_stream import JSONStreamExtractor
 
 def call_llm_for_congruence(summaries, stream_placeholder=None):
     """
@@ -34,60 +34,22 @@ def call_llm_for_congruence(summaries, stream_placeholder=None):
         print(prompt_text)
     prompt_text += "\n---\nGenera únicamente el JSON solicitado."
 
-    payload = {
-        "model": LLM_MODEL_OPENAI,
-        "messages": [
-            {"role": "system", "content": "Eres un experto en análisis de papers para material educativo."},
-            {"role": "user", "content": prompt_text}
-        ],
-        "max_tokens": None,
-        "n": 1,
-        "temperature": 0,
-        "stream": True
-    }
-    headers = {
-        "Authorization": f"Bearer {LLM_API_KEY_OPENAI}",
-        "Content-Type": "application/json"
-    }
     if stream_placeholder:
         stream_placeholder.text("Procesando Prompt de Congruencia. Espere por favor...")
-    response = requests.post(LLM_BASE_URL_OPENAI + "/v1/chat/completions", json=payload, headers=headers, stream=True)
-    if response.status_code != 200:
-        raise Exception(f"Error en la llamada al LLM para congruencia: {response.status_code} {response.text}")
-
+    messages = [
+        {"role": "system", "content": "Eres un experto en análisis de papers para material educativo."},
+        {"role": "user", "content": prompt_text}
+    ]
+    # El JSON se extrae a medida que llega el stream
+    extractor = JSONStreamExtractor()
     full_output = ""
-    for line in response.iter_lines():
-        if line:
-            decoded_line = line.decode("utf-8").strip()
-            if decoded_line.startswith("data:"):
-                data_line = decoded_line[5:].strip()
-                if data_line == "[DONE]":
-                    break
-                try:
-                    data_json = json.loads(data_line)
-                    if "choices" in data_json:
-                        for choice in data_json["choices"]:
-                            if "delta" in choice and "content" in choice["delta"]:
-                                content = choice["delta"]["content"]
-                                full_output += content
-                                if stream_placeholder:
-                                    stream_placeholder.text(full_output)
-                except:
-                    continue
-    # Extraer bloque JSON delimitado por backticks o desde la primera { hasta la última }
-    match = re.search(r"```(?:json)?\s*(\{.*\})\s*```", full_output, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-    else:
-        start_index = full_output.find("{")
-        end_index = full_output.rfind("}")
-        if start_index != -1 and end_index != -1 and end_index > start_index:
-            json_str = full_output[start_index:end_index+1]
-        else:
-            json_str = "{}"
-    try:
-        result = json.loads(json_str)
-    except:
+    for content in llm_client.stream_chat(messages, max_tokens=None, temperature=0, priority=PRIORITY_BATCH):
+        full_output += content
+        extractor.feed(content)
+        if stream_placeholder:
+            stream_placeholder.text(full_output)
+    result = extractor.result
+    if result is None:
         result = {"related": False, "conclusion": "", "details": ""}
     return full_output, result
 
@@ -5,23 +5,15 @@ import nbformat
 import json
 from scraping.agent_github import GitHubAgent
 from notebook_generator import create_notebook_json  # (opcional, si lo usas)
+from pdf_store import pdf_store
+from paper_identity import paper_key
 
-def download_pdf(pdf_url, output_folder, filename):
+def download_pdf(pdf_url):
     """
-    Descarga el PDF desde pdf_url y lo guarda en output_folder con el nombre filename.
+    Devuelve la ruta local del PDF de pdf_url desde el almacén compartido de PDFs,
+    descargándolo solo si no está ya en disco (o si ha cambiado en el servidor).
     """
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    output_path = os.path.join(output_folder, filename)
-    import requests
-    response = requests.get(pdf_url, stream=True)
-    if response.status_code == 200:
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        return output_path
-    else:
-        raise Exception(f"Error descargando PDF: {response.status_code}")
+    return pdf_store.fetch(pdf_url)
 
 class AgentManager:
     def __init__(self):
@@ -79,7 +71,8 @@ class AgentManager:
                 self.log_event(f"No se proporcionó JSON unificado para {article['title']}; usando resumen.")
                 combined_cells.append(nbformat.v4.new_markdown_cell("Resumen: " + article.get("summary", "")))
                 # Integrar GitHub (opcional)
-                chosen_github = github_mapping.get(article["link_article"].rstrip("/"))
+                # github_mapping va indexado por la clave canónica del paper (ver paper_identity.py)
+                chosen_github = github_mapping.get(article.get("paper_key") or paper_key(article))
                 if chosen_github:
                     try:
                         self.log_event(f"Recuperando contenido de GitHub para {article['title']} desde {chosen_github}...")
@@ -135,7 +128,7 @@ if __name__ == "__main__":
         "github_link": "https://github.com/octocat/Hello-World",
         "github_status": "OK",
     }]
-    github_mapping = {"http://arxiv.org/abs/0000.0000v1": "https://github.com/octocat/Hello-World"}
+    github_mapping = {paper_key(sample_articles[0]): "https://github.com/octocat/Hello-World"}
     # Simulación: notebook_json es un JSON unificado ya generado, con la clave "cells"
     notebook_json = {
         "cells": [
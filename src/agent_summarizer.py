@@ -1,10 +1,11 @@
 # agent_summarizer.py
 
-import re
-import requests
 import json
 import PyPDF2
-from config import LLM_BASE_URL, LLM_API_KEY, LLM_MODEL, LLM_BASE_URL_OPENAI, LLM_API_KEY_OPENAI, LLM_MODEL_OPENAI
+from config import LLM_MODEL_OPENAI
+from llm_client import llm_client
+from summary_cache import get_summary_cache, summary_key
+from json_stream import JSONStreamExtractor, extract_json
 
 def extract_full_text_from_pdf(pdf_path):
     """
@@ -18,7 +19,28 @@ def extract_full_text_from_pdf(pdf_path):
             text += page_text + "\n"
     return text  # <-- Devuelve todo el texto, no solo los primeros 200 caracteres
 
-def call_llm_for_summary(text, stream_placeholder=None):
+# Prompt y parámetros del resumen: forman parte de la clave de la caché de resúmenes
+SUMMARY_SYSTEM_PROMPT = (
+    "Actúa como un experto en análisis pedagógico de papers. "
+    "Dado el texto de un artículo científico, extrae las secciones clave EN ESPAÑOL: "
+    "ideas principales, metodologías, comparaciones, algoritmos, etc. "
+    "Retorna tu respuesta en formato JSON con las claves: "
+    "{ 'main_ideas': [...], 'methods': [...], 'comparisons': [...], 'algorithms': [...], 'other': [...] } "
+    "Sin nada adicional. RECUERDA, DEBES RESPONDER EN ESPAÑOL."
+)
+SUMMARY_MAX_TOKENS = None
+
+def empty_summary():
+    """Resumen vacío (resultado por defecto si la salida no contiene un JSON válido)."""
+    return {"main_ideas": [], "methods": [], "comparisons": [], "algorithms": [], "other": []}
+
+def parse_summary_output(full_output):
+    """
+    Extrae el JSON del resumen de la salida completa del LLM (ver json_stream).
+    """
+    return extract_json(full_output, default=empty_summary())
+
+def call_llm_for_summary(text, stream_placeholder=None, use_cache=True):
     """
     Llama al LLM para extraer un resumen pedagógico del artículo:
       - ideas principales
@@ -29,81 +51,37 @@ def call_llm_for_summary(text, stream_placeholder=None):
     Retorna un dict con las claves: 'main_ideas', 'methods', 'comparisons', 'algorithms', 'other'.
     
     Se utiliza el parámetro stream_placeholder para actualizar el progreso en streaming.
+    Las respuestas completas se cachean por (paper, modelo, prompt, max_tokens).
     """
-    system_prompt = (
-        "Actúa como un experto en análisis pedagógico de papers. "
-        "Dado el texto de un artículo científico, extrae las secciones clave EN ESPAÑOL: "
-        "ideas principales, metodologías, comparaciones, algoritmos, etc. "
-        "Retorna tu respuesta en formato JSON con las claves: "
-        "{ 'main_ideas': [...], 'methods': [...], 'comparisons': [...], 'algorithms': [...], 'other': [...] } "
-        "Sin nada adicional. RECUERDA, DEBES RESPONDER EN ESPAÑOL."
-    )
-    user_prompt = text
+    cache = get_summary_cache() if use_cache else None
+    cache_key = summary_key(text, LLM_MODEL_OPENAI, SUMMARY_SYSTEM_PROMPT, SUMMARY_MAX_TOKENS)
+    if cache:
+        cached_output = cache.get(cache_key)
+        if cached_output is not None:
+            if stream_placeholder:
+                stream_placeholder.text(cached_output)
+            return cached_output, parse_summary_output(cached_output)
 
-    payload = {
-        "model": LLM_MODEL_OPENAI,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        "max_tokens": None,
-        "n": 1,
-        "temperature": 0,
-        "stream": True
-    }
-    headers = {
-        "Authorization": f"Bearer {LLM_API_KEY_OPENAI}",
-        "Content-Type": "application/json"
-    }
+    user_prompt = text
 
     if stream_placeholder:
         stream_placeholder.text("Procesando Prompt de Extracción. Espere por favor...")
-
-    response = requests.post(LLM_BASE_URL_OPENAI + "/v1/chat/completions", json=payload, headers=headers, stream=True)
-    if response.status_code != 200:
-        raise Exception(f"Error en la llamada al LLM: {response.status_code} {response.text}")
-
+    messages = [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+    # El JSON se extrae a medida que llega el stream
+    extractor = JSONStreamExtractor()
     full_output = ""
-    for line in response.iter_lines():
-        if line:
-            decoded_line = line.decode("utf-8").strip()
-            if decoded_line.startswith("data:"):
-                data_line = decoded_line[5:].strip()
-                if data_line == "[DONE]":
-                    break
-                try:
-                    data_json = json.loads(data_line)
-                    if "choices" in data_json:
-                        for choice in data_json["choices"]:
-                            if "delta" in choice and "content" in choice["delta"]:
-                                content = choice["delta"]["content"]
-                                full_output += content
-                                if stream_placeholder:
-                                    stream_placeholder.text(full_output)
-                except:
-                    pass
-    match = re.search(r"```(?:json)?\s*(\{.*\})\s*```", full_output, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-    else:
-        # Fallback: extraer desde la primera "{" hasta la última "}"
-        start_index = full_output.find("{")
-        end_index = full_output.rfind("}")
-        if start_index != -1 and end_index != -1 and end_index > start_index:
-            json_str = full_output[start_index:end_index+1]
-        else:
-            json_str = "{}"
-    try:
-        result = json.loads(json_str)
-    except Exception as e:
-        result = {
-            "main_ideas": [],
-            "methods": [],
-            "comparisons": [],
-            "algorithms": [],
-            "other": []
-        }
-    return full_output, result
+    for content in llm_client.stream_chat(messages, max_tokens=SUMMARY_MAX_TOKENS, temperature=0):
+        full_output += content
+        extractor.feed(content)
+        if stream_placeholder:
+            stream_placeholder.text(full_output)
+    # stream_chat solo termina sin error si el stream llegó a [DONE]: la respuesta está completa
+    if cache:
+        cache.set(cache_key, full_output, LLM_MODEL_OPENAI, SUMMARY_MAX_TOKENS)
+    return full_output, extractor.result if extractor.result is not None else empty_summary()
 
 def summarize_pdf(pdf_path, stream_placeholder=None):
     """
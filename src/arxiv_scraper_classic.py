@@ -7,6 +7,8 @@ from typing import Annotated
 import PyPDF2
 import io
 
+from paper_identity import parse_arxiv_id
+
 class ArxivScraper:
 
     def __init__(self):
@@ -69,9 +71,10 @@ class ArxivScraper:
         data_df = pd.DataFrame.from_dict(data_json)
         columns_to_convert = ['published', 'updated']
         data_df[columns_to_convert] = data_df[columns_to_convert].apply(pd.to_datetime)
-        data_df.insert(0, "id", data_df["link_article"].str.split(".").str[-1].str.replace("v*","", regex=True))
-        data_df["id"] = data_df["id"].astype("int")
-        data_df.insert(1, "version", data_df["link_article"].str.split(".").str[-1].str.split("v").str[-1])
+        # ID de arXiv completo (2401.01234, hep-th/9901001) y versión; no es un entero
+        identities = data_df["link_article"].map(parse_arxiv_id)
+        data_df.insert(0, "id", identities.map(lambda identity: identity.value if identity else None))
+        data_df.insert(1, "version", identities.map(lambda identity: identity.version if identity else None).astype("Int64"))
         data_df.info()
         data_df.sort_values(by="published", ascending=False)
 
@@ -10,4 +10,27 @@ LLM_MODEL = "deepseek-r1-distill-qwen-14b"
 
 LLM_BASE_URL_OPENAI = "https://api.openai.com"
 LLM_API_KEY_OPENAI = os.getenv("OPENAI_API_KEY")
-LLM_MODEL_OPENAI = "gpt-4o"
\ No newline at end of file
+LLM_MODEL_OPENAI = "gpt-4o"
+
+# Almacén de PDFs direccionado por contenido (compartido con el backend)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PDF_STORE_DIR = os.path.join(PROJECT_ROOT, "input", "papers", "store")
+PDF_STORE_MAX_BYTES = 2 * 1024 ** 3  # tamaño máximo del almacén antes de expulsar (LRU)
+PDF_STORE_MAX_FILE_BYTES = 100 * 1024 ** 2  # tamaño máximo de un PDF descargado
+PDF_STORE_REVALIDATE_AFTER = 24 * 3600  # segundos; las versiones de arXiv (vN) no se revalidan
+PDF_STORE_EVICT_GRACE = 15 * 60  # segundos; un PDF servido hace menos no se expulsa (puede estar parseándose)
+PDF_DOWNLOAD_TIMEOUT = 60  # segundos
+
+# Caché persistente de resúmenes del LLM (compartida con el backend)
+SUMMARY_CACHE_PATH = os.path.join(PROJECT_ROOT, "input", "database", "summary_cache.sqlite")
+SUMMARY_CACHE_MAX_ENTRIES = 2000
+
+# Índice en memoria de papers por identidad (ID de arXiv, DOI o URL)
+PAPER_INDEX_MAX_ENTRIES = 50_000
+
+# Cliente LLM (pool de conexiones compartido por los agentes)
+LLM_POOL_LIMIT = 8  # conexiones keep-alive al servidor del LLM
+LLM_CONNECT_TIMEOUT = 10  # segundos
+LLM_READ_TIMEOUT = 300  # segundos sin recibir datos antes de abortar el stream
+LLM_MAX_INFLIGHT = 2  # peticiones simultáneas al LLM (el resto espera en el planificador)
+LLM_QUEUE_TIMEOUT = 300  # segundos máximos de espera por un hueco del LLM
@@ -0,0 +1,188 @@
+# llm_client.py
+"""
+Cliente en streaming para el endpoint de chat compatible con OpenAI, compartido por
+los agentes de resumen, congruencia y generación de notebooks.
+
+Versión síncrona para el pipeline de Streamlit (el backend usa la asíncrona en
+alejandria/backend/src/llm_client.py, con el mismo decodificador SSE):
+- Sesión HTTP con pool de conexiones keep-alive, reutilizada entre llamadas.
+- Decodificador SSE incremental sobre los bloques del cuerpo de la respuesta.
+- `stream_chat` es un generador: el siguiente bloque solo se lee cuando se pide el
+  siguiente delta, y cerrar el generador cierra la conexión con el servidor del LLM.
+- Cada petición ocupa un hueco del planificador (llm_scheduler) mientras dura su stream.
+"""
+
+import codecs
+import json
+import logging
+import re
+import threading
+from typing import Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    LLM_BASE_URL_OPENAI,
+    LLM_API_KEY_OPENAI,
+    LLM_MODEL_OPENAI,
+    LLM_POOL_LIMIT,
+    LLM_CONNECT_TIMEOUT,
+    LLM_READ_TIMEOUT,
+)
+from llm_scheduler import llm_scheduler, PRIORITY_INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+_LINE_END = re.compile(r"\r\n|\r|\n")
+
+
+class LLMError(Exception):
+    """Error devuelto por el servidor del LLM."""
+
+
+class SSEDecoder:
+    """
+    Decodificador incremental de Server-Sent Events.
+    `feed` recibe bytes arbitrarios y devuelve los campos `data` de los eventos completos.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._data: List[str] = []
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk: bytes) -> List[str]:
+        self._buffer += self._decoder.decode(chunk)
+        events = []
+        while True:
+            # Los eventos se separan por líneas; se admiten \n, \r\n y \r
+            match = _LINE_END.search(self._buffer)
+            if match is None or (match.group() == "\r" and match.end() == len(self._buffer)):
+                # Sin fin de línea, o un \r\n que puede venir partido entre dos bloques
+                break
+            line = self._buffer[:match.start()]
+            self._buffer = self._buffer[match.end():]
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self) -> List[str]:
+        """Entrega el evento pendiente al terminar el cuerpo de la respuesta."""
+        events = []
+        if self._buffer:
+            self._process_line(self._buffer)
+            self._buffer = ""
+        if self._data:
+            events.append("\n".join(self._data))
+            self._data = []
+        return events
+
+    def _process_line(self, line: str) -> Optional[str]:
+        if not line:
+            # Línea vacía: fin del evento
+            if self._data:
+                data, self._data = "\n".join(self._data), []
+                return data
+            return None
+        if line.startswith(":"):
+            # Comentario (keep-alive)
+            return None
+        field, _, value = line.partition(":")
+        if field == "data":
+            self._data.append(value[1:] if value.startswith(" ") else value)
+        return None
+
+
+def _deltas(data: str) -> List[str]:
+    """Extrae el texto de los deltas de un evento `chat.completion.chunk`."""
+    try:
+        payload = json.loads(data)
+    except json.JSONDecodeError:
+        logger.warning(f"[llm_client] Evento SSE no válido: {data[:120]}")
+        return []
+    if "error" in payload:
+        raise LLMError(str(payload["error"]))
+    contents = []
+    for choice in payload.get("choices", []):
+        content = (choice.get("delta") or {}).get("content")
+        if content:
+            contents.append(content)
+    return contents
+
+
+class LLMClient:
+    """Cliente del LLM compartido por los agentes del pipeline."""
+
+    def __init__(self, base_url: str = LLM_BASE_URL_OPENAI + "/v1", api_key: str = LLM_API_KEY_OPENAI, model: str = LLM_MODEL_OPENAI, pool_limit: int = LLM_POOL_LIMIT):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.pool_limit = pool_limit
+        self._local = threading.local()
+
+    def _get_session(self) -> requests.Session:
+        # requests.Session no es seguro entre threads: una sesión (con su pool) por thread
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_limit)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Authorization"] = f"Bearer {self.api_key}"
+            self._local.session = session
+        return session
+
+    def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: float = 0,
+        model: Optional[str] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+        owner: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Genera los fragmentos de texto de la respuesta a medida que llegan.
+        Termina al recibir `[DONE]`; si el stream se corta antes, lanza LLMError.
+        La petición espera su turno en el planificador según `priority` y `owner`;
+        si no obtiene hueco a tiempo, lanza LLMQueueTimeout.
+        """
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "n": 1,
+            "temperature": temperature,
+            "stream": True,
+        }
+        with llm_scheduler.slot(priority=priority, owner=owner):
+            response = self._get_session().post(
+                f"{self.base_url}/chat/completions",
+                json=payload,
+                stream=True,
+                timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT),
+            )
+            # Se cierra al terminar o al abandonar el generador (GeneratorExit)
+            with response:
+                if response.status_code != 200:
+                    raise LLMError(f"Error en la llamada al LLM: {response.status_code} {response.text}")
+                decoder = SSEDecoder()
+                for chunk in response.iter_content(chunk_size=None):
+                    for data in decoder.feed(chunk):
+                        if data.strip() == "[DONE]":
+                            return
+                        yield from _deltas(data)
+                for data in decoder.flush():
+                    if data.strip() == "[DONE]":
+                        return
+                    yield from _deltas(data)
+                raise LLMError("El stream del LLM terminó sin [DONE]")
+
+    def complete(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Devuelve la respuesta completa (consumiendo el stream)."""
+        return "".join(self.stream_chat(messages, **kwargs))
+
+
+llm_client = LLMClient()
@@ -0,0 +1,155 @@
+# llm_scheduler.py
+"""
+Planificador de las llamadas al LLM, compartido por todos los threads del proceso.
+
+Versión con threads para el pipeline de Streamlit (el backend usa la asíncrona en
+alejandria/backend/src/llm_scheduler.py, con la misma política):
+- `slots` peticiones simultáneas como máximo; una petición ocupa su hueco mientras dura el stream.
+- Prioridad por petición: los resúmenes interactivos pasan antes que la generación por lotes
+  (congruencia, notebooks).
+- Dentro de una misma prioridad, turno rotatorio entre propietarios. Por defecto el propietario
+  es el thread que llama (Streamlit ejecuta cada sesión en su propio thread).
+- Tiempo máximo de espera en cola (LLMQueueTimeout) y métricas de espera y ocupación.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from config import LLM_MAX_INFLIGHT, LLM_QUEUE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0  # resúmenes que un usuario está esperando
+PRIORITY_BATCH = 10  # congruencia, generación de notebooks
+
+
+class LLMQueueTimeout(Exception):
+    """La petición no obtuvo hueco en el LLM dentro del tiempo de espera."""
+
+
+class _Waiter:
+    __slots__ = ("owner", "priority", "granted", "enqueued_at")
+
+    def __init__(self, owner: str, priority: int):
+        self.owner = owner
+        self.priority = priority
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+
+class LLMScheduler:
+    """Semáforo con prioridades y reparto equitativo por propietario."""
+
+    def __init__(self, slots: int = LLM_MAX_INFLIGHT, queue_timeout: Optional[float] = LLM_QUEUE_TIMEOUT):
+        self.slots = slots
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        # prioridad -> propietario -> cola de espera (el orden de los propietarios es el turno)
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        # Métricas
+        self.granted = 0
+        self.timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_hold = 0.0
+        self._completed = 0
+
+    def _queued(self) -> int:
+        return sum(len(waiters) for owners in self._queues.values() for waiters in owners.values())
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_INTERACTIVE, owner: Optional[str] = None, timeout: Optional[float] = None) -> Iterator[None]:
+        """Ocupa un hueco del LLM durante el bloque `with`."""
+        self.acquire(priority, owner, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._total_hold += time.monotonic() - started
+                self._completed += 1
+            self.release()
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, owner: Optional[str] = None, timeout: Optional[float] = None) -> None:
+        owner = owner or threading.current_thread().name
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._cond:
+            if self._in_flight < self.slots and not self._queued():
+                self._in_flight += 1
+                self._record_wait(0.0)
+                return
+            waiter = _Waiter(owner, priority)
+            self._queues.setdefault(priority, OrderedDict()).setdefault(owner, deque()).append(waiter)
+            granted = self._cond.wait_for(lambda: waiter.granted, timeout=timeout)
+            if not granted:
+                self._remove(waiter)
+                self.timeouts += 1
+                logger.warning(f"[llm_scheduler] Tiempo de espera agotado para {owner} (prioridad {priority})")
+                raise LLMQueueTimeout(f"El LLM está ocupado: sin hueco tras {timeout} s en cola")
+            self._record_wait(time.monotonic() - waiter.enqueued_at)
+
+    def release(self) -> None:
+        """Libera un hueco y se lo pasa al siguiente en espera, si lo hay."""
+        with self._cond:
+            waiter = self._next_waiter()
+            if waiter is None:
+                self._in_flight -= 1
+                return
+            # El hueco pasa directamente al siguiente: _in_flight no cambia
+            waiter.granted = True
+            self._cond.notify_all()
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in sorted(self._queues):
+            owners = self._queues[priority]
+            owner, waiters = next(iter(owners.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                # Turno rotatorio: el propietario pasa al final de su prioridad
+                owners.move_to_end(owner)
+            else:
+                del owners[owner]
+                if not owners:
+                    del self._queues[priority]
+            return waiter
+        return None
+
+    def _remove(self, waiter: _Waiter) -> None:
+        owners = self._queues.get(waiter.priority)
+        if not owners or waiter.owner not in owners:
+            return
+        waiters = owners[waiter.owner]
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            return
+        if not waiters:
+            del owners[waiter.owner]
+        if not owners:
+            del self._queues[waiter.priority]
+
+    def _record_wait(self, wait: float) -> None:
+        self.granted += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "in_flight": self._in_flight,
+                "queued": self._queued(),
+                "granted": self.granted,
+                "timeouts": self.timeouts,
+                "avg_wait": round(self._total_wait / self.granted, 3) if self.granted else 0.0,
+                "max_wait": round(self._max_wait, 3),
+                "avg_hold": round(self._total_hold / self._completed, 3) if self._completed else 0.0,
+            }
+
+
+llm_scheduler = LLMScheduler()
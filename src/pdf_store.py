@@ -0,0 +1,263 @@
+# pdf_store.py
+"""
+Almacén de PDFs en disco direccionado por contenido (versión síncrona del pipeline de Streamlit).
+
+Los ficheros se guardan como objects/<sha256[:2]>/<sha256>.pdf y un índice SQLite
+relaciona cada clave (ID/versión de arXiv o URL) con su hash, sus validadores HTTP
+(ETag / Last-Modified) y su último acceso. El directorio es compartido con el backend
+(alejandria/backend/src/services/pdf_store.py), así que un paper se descarga una sola vez.
+"""
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import requests
+
+from config import (
+    PDF_STORE_DIR,
+    PDF_STORE_MAX_BYTES,
+    PDF_STORE_MAX_FILE_BYTES,
+    PDF_STORE_REVALIDATE_AFTER,
+    PDF_STORE_EVICT_GRACE,
+    PDF_DOWNLOAD_TIMEOUT,
+)
+from paper_identity import parse_arxiv_id
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+class PdfDownloadError(Exception):
+    """No se pudo obtener un PDF válido."""
+
+
+def store_key(url: str) -> Tuple[str, bool]:
+    """
+    Devuelve (clave, inmutable). Los PDFs de arXiv se identifican por ID y versión;
+    una versión concreta (vN) nunca cambia, así que no necesita revalidarse.
+    """
+    # https://arxiv.org/pdf/2401.01234v2(.pdf) o esquemas antiguos como hep-th/9901001v1
+    identity = parse_arxiv_id(url)
+    if identity is not None:
+        return identity.versioned_key, bool(identity.version)
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    return f"url:{host}{parts.path}" + (f"?{parts.query}" if parts.query else ""), False
+
+
+class PdfStore:
+    """
+    Almacén de PDFs con:
+
+    - GET condicional (If-None-Match / If-Modified-Since) para revalidar entradas.
+    - Escritura en streaming a un fichero temporal y rename atómico al hash final.
+    - Expulsión LRU cuando el tamaño total supera `max_bytes`.
+    - Deduplicación de descargas concurrentes de la misma clave dentro del proceso.
+    """
+
+    def __init__(
+        self,
+        directory: str = PDF_STORE_DIR,
+        max_bytes: int = PDF_STORE_MAX_BYTES,
+        max_file_bytes: int = PDF_STORE_MAX_FILE_BYTES,
+        revalidate_after: float = PDF_STORE_REVALIDATE_AFTER,
+        evict_grace: float = PDF_STORE_EVICT_GRACE,
+    ):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.revalidate_after = revalidate_after
+        self.evict_grace = evict_grace
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._conn = self._connect()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Abre (o crea) el índice; si falla, el almacén no cachea y cada petición descarga."""
+        try:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pdf_index ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, sha256 TEXT NOT NULL, size INTEGER NOT NULL, "
+                "etag TEXT, last_modified TEXT, validated_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pdf_index_access ON pdf_index (last_access)")
+            conn.commit()
+            return conn
+        except Exception as e:
+            logger.warning(f"No se pudo abrir el índice de PDFs en {self.directory}: {e}")
+            return None
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.pdf")
+
+    # --- Índice ---
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, etag, last_modified, validated_at FROM pdf_index WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or not os.path.exists(self.object_path(row[0])):
+            # Entrada expulsada por otro proceso: se trata como fallo
+            return None
+        return {"sha256": row[0], "etag": row[1], "last_modified": row[2], "validated_at": row[3]}
+
+    def _touch(self, key: str, validated: bool = False) -> None:
+        if self._conn is None:
+            return
+        now = time.time()
+        with self._lock:
+            if validated:
+                self._conn.execute(
+                    "UPDATE pdf_index SET last_access = ?, validated_at = ? WHERE key = ?", (now, now, key)
+                )
+            else:
+                self._conn.execute("UPDATE pdf_index SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+    def _record(self, key: str, url: str, sha256: str, size: int, etag: Optional[str], last_modified: Optional[str]) -> None:
+        if self._conn is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdf_index "
+                "(key, url, sha256, size, etag, last_modified, validated_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, sha256, size, etag, last_modified, now, now),
+            )
+            self._conn.commit()
+
+    def total_bytes(self) -> int:
+        """Tamaño total de los objetos (cada hash cuenta una vez aunque tenga varias claves)."""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM pdf_index GROUP BY sha256)"
+            ).fetchone()
+        return int(row[0])
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Expulsa los objetos usados hace más tiempo hasta quedar por debajo de `max_bytes`.
+        `keep` es el hash recién servido, que nunca se expulsa. Tampoco se expulsan los
+        servidos en los últimos `evict_grace` segundos (por este proceso o por el otro que
+        comparte el almacén): su ruta puede estar esperando a que se parsee el PDF.
+        Devuelve los bytes liberados.
+        """
+        if self._conn is None:
+            return 0
+        excess = self.total_bytes() - self.max_bytes
+        freed = 0
+        if excess <= 0:
+            return 0
+        with self._lock:
+            candidates = self._conn.execute(
+                "SELECT sha256, MAX(size), MAX(last_access) AS accessed FROM pdf_index "
+                "GROUP BY sha256 ORDER BY accessed ASC"
+            ).fetchall()
+            in_use_since = time.time() - self.evict_grace
+            for sha256, size, accessed in candidates:
+                if freed >= excess or accessed >= in_use_since:
+                    # Por orden de acceso: a partir de aquí todos se usaron hace poco
+                    break
+                if sha256 == keep:
+                    continue
+                self._conn.execute("DELETE FROM pdf_index WHERE sha256 = ?", (sha256,))
+                try:
+                    os.remove(self.object_path(sha256))
+                except FileNotFoundError:
+                    pass
+                freed += size
+            self._conn.commit()
+        logger.info(f"[pdf_store] Expulsados {freed} bytes del almacén de PDFs")
+        return freed
+
+    # --- Descarga ---
+
+    def fetch(self, url: str) -> str:
+        """
+        Devuelve la ruta local del PDF de `url`, descargándolo o revalidándolo si hace falta.
+        Las llamadas concurrentes para la misma clave esperan a la primera descarga.
+        """
+        key, immutable = store_key(url)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            return self._fetch(key, url, immutable)
+
+    def _fetch(self, key: str, url: str, immutable: bool) -> str:
+        entry = self._lookup(key)
+        if entry is not None:
+            fresh = immutable or time.time() - entry["validated_at"] < self.revalidate_after
+            if fresh:
+                self._touch(key)
+                return self.object_path(entry["sha256"])
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with requests.get(url, headers=headers, stream=True, timeout=PDF_DOWNLOAD_TIMEOUT) as response:
+            if response.status_code == 304 and entry is not None:
+                logger.info(f"[pdf_store] {key} no ha cambiado (304)")
+                self._touch(key, validated=True)
+                return self.object_path(entry["sha256"])
+            if response.status_code != 200:
+                raise PdfDownloadError(f"Error descargando PDF: {response.status_code}")
+            sha256, size = self._write_stream(response)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        self._record(key, url, sha256, size, etag, last_modified)
+        logger.info(f"[pdf_store] {key} descargado ({size} bytes, {sha256[:12]})")
+        self.evict(keep=sha256)
+        return self.object_path(sha256)
+
+    def _write_stream(self, response: requests.Response) -> Tuple[str, int]:
+        """Escribe el cuerpo por bloques a un temporal y lo renombra atómicamente a su hash."""
+        tmp_path = os.path.join(self.objects_dir, f"tmp-{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    if size == 0 and not chunk.lstrip().startswith(b"%PDF"):
+                        raise PdfDownloadError("La respuesta no es un PDF")
+                    size += len(chunk)
+                    if size > self.max_file_bytes:
+                        raise PdfDownloadError(f"El PDF supera el tamaño máximo ({self.max_file_bytes} bytes)")
+                    digest.update(chunk)
+                    f.write(chunk)
+            if size == 0:
+                raise PdfDownloadError("Respuesta vacía")
+            sha256 = digest.hexdigest()
+            final_path = self.object_path(sha256)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            # Mismo contenido => mismo nombre: si ya existe, el rename es inocuo
+            os.replace(tmp_path, final_path)
+            return sha256, size
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+pdf_store = PdfStore()
@@ -4,6 +4,7 @@ import logging
 import requests
 import xml.etree.ElementTree as ET
 from scraping.agent_link_extractor import extract_github_links
+from scraping.link_cache import check_github_link
 from scraping.config import ARXIV_API_URL, QUERY_TOPIC, TYPE_QUERY, START, MAX_RES, SORTBY, SORTORDER
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -85,13 +86,8 @@ class ArxivAgent:
                 # Verificar estado del enlace de GitHub
                 github_status = "No link"
                 if github_link:
-                    try:
-                        github_link = github_link.rstrip(".,;:!?\"')")
-                        r = requests.head(github_link, timeout=5, allow_redirects=True)
-                        github_status = "OK" if r.status_code == 200 else "Broken"
-                    except Exception as e:
-                        logging.warning(f"Error verificando enlace GitHub {github_link}: {e}")
-                        github_status = "Error"
+                    github_link = github_link.rstrip(".,;:!?\"')")
+                    github_status = check_github_link(github_link)
                 
                 # Construir el artículo
                 article = {
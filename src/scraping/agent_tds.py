@@ -9,6 +9,8 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime
 from urllib.parse import urljoin
+from scraping.agent_link_extractor import extract_github_links
+from scraping.link_cache import check_github_link
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -263,13 +265,8 @@ class TdsAgent:
                 github_status = "No link"
                 
                 if github_link:
-                    try:
-                        github_link = github_link.rstrip(".,;:!?\"')")
-                        r = requests.head(github_link, timeout=5, allow_redirects=True)
-                        github_status = "OK" if r.status_code == 200 else "Broken"
-                    except Exception as e:
-                        logging.warning(f"Error verificando enlace GitHub {github_link}: {e}")
-                        github_status = "Error"
+                    github_link = github_link.rstrip(".,;:!?\"')")
+                    github_status = check_github_link(github_link)
                 
                 # Construir el artículo
                 article_id = f"tds-{hash(url) & 0xffffffff}" if url else f"tds-{hash(str(title)) & 0xffffffff}"
@@ -1,5 +1,8 @@
 import os
 
+# Raíz del repositorio (src/scraping -> raíz)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
 ### ARXIV ###
 
 # Formato de URL para arXiv (se deben incluir todos los parámetros)
@@ -25,3 +28,11 @@ TDS_URL = "https://towardsdatascience.com/?s={query}"
 
 # Parámetros
 QUERY_TOPIC_TDS = "RAG"
+
+### Caché de estado de enlaces de GitHub ###
+# Misma base de datos que usa el backend, para compartir los resultados
+LINK_CACHE_PATH = os.path.join(PROJECT_ROOT, "input", "database", "link_status.sqlite")
+LINK_CACHE_MAX_ENTRIES = 5000
+LINK_CACHE_TTL_OK = 7 * 24 * 3600  # segundos
+LINK_CACHE_TTL_BROKEN = 24 * 3600  # segundos (caché negativa)
+LINK_CACHE_TTL_ERROR = 15 * 60  # segundos (caché negativa para errores transitorios)
@@ -0,0 +1,109 @@
+# summary_cache.py
+"""
+Caché persistente de resúmenes generados por el LLM.
+
+Las llamadas de resumen usan temperature 0, así que la salida es determinista para
+(texto del paper, modelo, prompt de sistema, max_tokens). La clave combina esos cuatro
+valores; el texto y el prompt se identifican por su SHA-256.
+"""
+from typing import Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import SUMMARY_CACHE_PATH, SUMMARY_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def summary_key(text: str, model: str, system_prompt: str, max_tokens) -> str:
+    """Clave de caché: hash del paper, modelo, hash del prompt de sistema y max_tokens."""
+    parts = [sha256_text(text), model, sha256_text(system_prompt), str(max_tokens)]
+    return sha256_text("|".join(parts))
+
+
+class SummaryCache:
+    """
+    Tabla SQLite con la salida completa del LLM por clave. Se expulsan las entradas
+    usadas hace más tiempo cuando se supera `max_entries`.
+    """
+
+    def __init__(self, path: str = SUMMARY_CACHE_PATH, max_entries: int = SUMMARY_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Abre (o crea) la base de datos; si falla, la caché queda desactivada."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, max_tokens TEXT, "
+                "full_output TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.commit()
+            return conn
+        except Exception as e:
+            logger.warning(f"No se pudo abrir la caché de resúmenes en {self.path}: {e}")
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        """Devuelve la salida completa cacheada del LLM, o None."""
+        if self._conn is None:
+            return None
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT full_output FROM summaries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute("UPDATE summaries SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+                return row[0]
+            except sqlite3.Error as e:
+                logger.warning(f"Error leyendo la caché de resúmenes: {e}")
+                return None
+
+    def set(self, key: str, full_output: str, model: str, max_tokens) -> None:
+        """Guarda la salida completa del LLM (solo de respuestas terminadas)."""
+        if self._conn is None or not full_output:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries (key, model, max_tokens, full_output, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, str(max_tokens), full_output, now, now),
+                )
+                self._conn.execute(
+                    "DELETE FROM summaries WHERE key IN ("
+                    "SELECT key FROM summaries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Error escribiendo en la caché de resúmenes: {e}")
+
+
+_cache: Optional[SummaryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """Devuelve la instancia compartida de la caché de resúmenes."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SummaryCache()
+        return _cache